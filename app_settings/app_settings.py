@@ -7,6 +7,7 @@ import boto3
 import watchtower
 
 from aws_tools.s3_handler import S3Handler
+from door43_tools.catalog_client import CatalogClient
 from rq_settings import debug_mode_flag
 
 
@@ -133,6 +134,8 @@ class AppSettings:
 
         cls.repo_api = dcs_api_client.RepositoryApi(dcs_api_client.ApiClient(api_config))
         cls.catalog_api = dcs_api_client.CatalogApi(dcs_api_client.ApiClient(api_config))
+        # Memoized read-only access to both of the above
+        cls.catalog_client = CatalogClient(cls.catalog_api, cls.repo_api, logger=cls.logger)
 
         test_mode_flag = os.getenv('TEST_MODE', '')
         travis_flag = os.getenv('TRAVIS_BRANCH', '')
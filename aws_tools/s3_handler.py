@@ -4,8 +4,12 @@ import json
 import boto3
 import botocore
 from boto3.session import Session
+from boto3.s3.transfer import TransferConfig
 
 
+S3_UPLOAD_PART_SIZE_MB = int(os.getenv('S3_UPLOAD_PART_SIZE_MB', '16')) # S3 needs at least 5MB (except for the last part)
+S3_UPLOAD_THREADS = int(os.getenv('S3_UPLOAD_THREADS', '8'))
+
 
 class S3Handler:
     def __init__(self, bucket_name=None, aws_access_key_id=None, aws_secret_access_key=None,
@@ -45,17 +49,17 @@ class S3Handler:
             self.bucket = self.resource.Bucket(self.bucket_name)
 
 
-    # def download_file(self, key, local_file):
-    #     """
-    #     Download file from S3 bucket. Similar to s3.download_file except that does
-    #     not play nicely with moto, this however, does.
-    #     :param string key: object to download
-    #     :param string local_file: file to download to
-    #     """
-    #     body = self.resource.Object(bucket_name=self.bucket_name, key=key).get()['Body']
-    #     with open(local_file, 'wb') as f:
-    #         for chunk in iter(lambda: body.read(1024), b''):
-    #             f.write(chunk)
+    def download_file(self, key, local_file) -> None:
+        """
+        Download file from S3 bucket. Similar to s3.download_file except that does
+        not play nicely with moto, this however, does.
+        :param string key: object to download
+        :param string local_file: file to download to
+        """
+        body = self.resource.Object(bucket_name=self.bucket_name, key=key).get()['Body']
+        with open(local_file, 'wb') as f:
+            for chunk in iter(lambda: body.read(65536), b''):
+                f.write(chunk)
 
 
     # # Downloads all the files in S3 that have a prefix of `key_prefix` from `bucket` to the `local` directory
@@ -154,30 +158,54 @@ class S3Handler:
         :param string path: file to upload
         :param string key: name of the object in the bucket
         """
-        from general_tools.file_utils import get_mime_type
         #from app_settings.app_settings import AppSettings
         #AppSettings.logger.debug(f"s3_handler.upload_file({path}, {key}, {cache_time}, {content_type})")
         assert 'http' not in key
 
         with open(path, 'rb') as f:
             binary = f.read()
-        if content_type is None:
-            mime_type = get_mime_type(path)
-            content_type = mime_type # Let browser figure out the encoding
-            # content_type = f'{mime_type}; charset=utf-8' if 'usfm' in mime_type \
-            #                 else mime_type # RJH added charset Oct2019
         # from app_settings.app_settings import AppSettings
         # AppSettings.logger.debug(f"Uploading {path} to S3 {key} with cache_time={cache_time} content_type='{content_type}'…")
         # AppSettings.logger.debug(f"Bucket is {self.bucket}")
         self.bucket.put_object(
             Key=key,
             Body=binary,
-            ContentType=content_type,
-            CacheControl=f'max-age={cache_time}'
+            **self.get_upload_args(path, cache_time, content_type)
         )
         #AppSettings.logger.debug(f"put_response is {put_response}")
 
 
+    def upload_file_in_parts(self, path, key, cache_time=600, content_type=None,
+                             part_size_mb=S3_UPLOAD_PART_SIZE_MB, num_threads=S3_UPLOAD_THREADS) -> None:
+        """
+        Upload a (possibly very large) file to S3 storage a part at a time,
+            with several parts being sent at once,
+            so that only about part_size_mb * num_threads of it is ever in memory.
+        Files no bigger than one part are sent with a single (streamed) put.
+        :param string path: file to upload
+        :param string key: name of the object in the bucket
+        """
+        assert 'http' not in key
+
+        part_size = max(part_size_mb, 5) * 1024 * 1024
+        transfer_config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size,
+                                         max_concurrency=num_threads, use_threads=num_threads > 1)
+        self.bucket.upload_file(path, key, ExtraArgs=self.get_upload_args(path, cache_time, content_type),
+                                Config=transfer_config)
+
+
+    @staticmethod
+    def get_upload_args(path, cache_time, content_type) -> dict:
+        from general_tools.file_utils import get_mime_type
+
+        if content_type is None:
+            mime_type = get_mime_type(path)
+            content_type = mime_type # Let browser figure out the encoding
+            # content_type = f'{mime_type}; charset=utf-8' if 'usfm' in mime_type \
+            #                 else mime_type # RJH added charset Oct2019
+        return {'ContentType': content_type, 'CacheControl': f'max-age={cache_time}'}
+
+
     # def get_object(self, key):
     #     return self.resource.Object(bucket_name=self.bucket_name, key=key)
 
@@ -11,6 +11,7 @@ from typing import Dict, Optional, List, Any
 from rq_settings import prefix, debug_mode_flag
 from general_tools.file_utils import add_contents_to_zip, remove_tree, remove_file, get_files, unzip
 from general_tools.url_utils import download_file
+from general_tools.repo_cache import get_repo_cache, get_commit_sha
 from app_settings.app_settings import AppSettings
 from converters.convert_logger import ConvertLogger
 
@@ -114,6 +115,19 @@ class Converter(metaclass=ABCMeta):
         if ref != "master":
             refs.append("master")
 
+        repo_cache = get_repo_cache()
+        if repo_cache:
+            for owner in owners:
+                for try_ref in refs:
+                    commit_sha = get_commit_sha(self.dcs_domain, owner, repo, try_ref)
+                    if not commit_sha:
+                        continue
+                    # Download by SHA so the archive matches the cache key even if the branch moves
+                    relation_url = f"{self.dcs_domain}/{owner}/{repo}/archive/{commit_sha}.zip"
+                    if repo_cache.checkout(owner, repo, try_ref, commit_sha, relation_url, self.download_dir):
+                        return
+            AppSettings.logger.warning(f"Unable to use repo cache for {repo}: downloading directly…")
+
         relation_filepath = os.path.join(self.download_dir, f"{repo}.zip")
         AppSettings.logger.debug(f"relation_filepath: {relation_filepath}")
 
@@ -252,7 +266,7 @@ class Converter(metaclass=ABCMeta):
             copy(self.output_zip_file, self.cdn_file_key)
         elif AppSettings.cdn_s3_handler():
             #AppSettings.logger.debug("converter.upload_archive() using S3 handler")
-            AppSettings.cdn_s3_handler().upload_file(self.output_zip_file, self.cdn_file_key, cache_time=0)
+            AppSettings.cdn_s3_handler().upload_file_in_parts(self.output_zip_file, self.cdn_file_key, cache_time=0)
 
 
     def populate_manifest_dict(self):
@@ -72,8 +72,8 @@ class AlignedBiblePdfConverter(PdfConverter):
     def get_appendix_rcs(self):
         pass
 
-    def replace_rc_links(self, text):
-        return text
+    def replace_rc_links_in_soup(self, soup):
+        pass
 
     def get_default_project_ids(self):
         return [PROJECT_FULL] + list(map(lambda project: project['identifier'], self.main_resource.projects))
@@ -17,6 +17,7 @@ import general_tools.html_tools as html_tools
 from door43_tools.subjects import OBS_STUDY_NOTES
 from bs4 import BeautifulSoup
 from .pdf_converter import PdfConverter
+from .rc_link import ResourceContainerLinks
 from general_tools import obs_tools, alignment_tools
 from general_tools.url_utils import download_file
 from general_tools.file_utils import unzip
@@ -89,7 +90,7 @@ class ObsSnPdfConverter(PdfConverter):
             self.bad_highlights = {}
             self.rcs = {}
             self.appendix_rcs = {}
-            self.all_rcs = {}
+            self.all_rcs = ResourceContainerLinks()
             self.generate_html_file()
             self.generate_pdf_file()
 
@@ -20,6 +20,14 @@ import shutil
 import general_tools.html_tools as html_tools
 import googletrans
 import json
+import hashlib
+import inspect
+import tempfile
+import functools
+import traceback
+from glob import glob
+from time import time
+from concurrent.futures import ThreadPoolExecutor
 from dcs_api_client.rest import ApiException
 from collections import Counter
 from cssutils import parseStyle
@@ -29,11 +37,15 @@ from abc import abstractmethod
 from weasyprint import HTML
 from urllib.parse import urlsplit, urlunsplit, urlparse
 from general_tools.font_utils import get_font_html_with_local_fonts
-from general_tools.file_utils import write_file, read_file, load_json_object, unzip
+from general_tools.file_utils import write_file, read_file, load_json_object, unzip, get_file_hash, get_dir_hash
 from general_tools.url_utils import download_file, get_url
+from general_tools.repo_cache import get_repo_cache
+from general_tools.artifact_store import get_artifact_store, put_build_manifest, ARTIFACT_STORE
+from general_tools.pool_utils import imap_in_workers
 from .resource import Resource, Resources, DEFAULT_REF, DEFAULT_OWNER, OWNERS
-from .rc_link import ResourceContainerLink
+from .rc_link import ResourceContainerLink, ResourceContainerLinks
 from converters.converter import Converter
+from rq_settings import pdf_workers
 from door43_tools.bible_books import BOOK_NUMBERS
 from door43_tools.subjects import SUBJECT_ALIASES, REQUIRED_RESOURCES, HEBREW_OLD_TESTAMENT, GREEK_NEW_TESTAMENT, ALIGNED_BIBLE, BIBLE, \
     OPEN_BIBLE_STORIES, TRANSLATION_ACADEMY, TRANSLATION_WORDS
@@ -59,6 +71,10 @@ TW_CATS = ['kt', 'names', 'other']
 APPENDIX_LINKING_LEVEL = 1
 APPENDIX_RESOURCES = ['ta', 'tw']
 CONTRIBUTORS_TO_HIDE = ['ugnt', 'uhb']
+MAX_RESOURCE_THREADS = 6 # Resources downloaded and unzipped at once (can be overridden with the 'resource_threads' option)
+BUILD_MANIFEST_VERSION = 2 # Bump this to stop reusing any previously stored PDFs
+BUILD_CODE_PACKAGES = ['converters', 'general_tools', 'tx_usfm_tools', 'door43_tools', 'resource_container']
+MANIFEST_VERSION_FIELDS = ['version', 'issued', 'modified'] # Only shown on the cover and license pages
 
 
 class PdfConverter(Converter):
@@ -70,6 +86,7 @@ class PdfConverter(Converter):
 
         self.resources = Resources()
         self.relation_resources = Resources()
+        self.resource_setup_times = {}
         self.project_id = None
 
         if not os.path.isdir(self.source_dir):
@@ -81,6 +98,7 @@ class PdfConverter(Converter):
         self.output_logger_handler = None
 
         self.images_dir = None
+        self._artifact_store = None
 
         self.reinit()
 
@@ -97,7 +115,11 @@ class PdfConverter(Converter):
         self.bad_highlights = {}
         self.rcs = {}
         self.appendix_rcs = {}
-        self.all_rcs = {}
+        self.all_rcs = ResourceContainerLinks()
+        self.image_files = {}
+        self.toc_and_body_html = None
+        self.front_matter_hash = None
+        self.build_inputs = None
 
     def __del__(self):
         self.close_loggers()
@@ -420,7 +442,7 @@ class PdfConverter(Converter):
             copy(self.output_zip_file, self.cdn_file_key)
         elif AppSettings.cdn_s3_handler():
             # AppSettings.logger.debug("converter.upload_archive() using S3 handler")
-            AppSettings.cdn_s3_handler().upload_file(
+            AppSettings.cdn_s3_handler().upload_file_in_parts(
                 self.output_zip_file, self.cdn_file_key, cache_time=0)
 
     def upload_pdf_and_json_to_cdn(self):
@@ -507,14 +529,81 @@ class PdfConverter(Converter):
     def get_default_project_ids(self):
         return list(map(lambda project: project['identifier'], self.main_resource.projects))
 
+    @property
+    def num_workers(self):
+        return max(1, int(self.options.get('pdf_workers', pdf_workers)))
+
     def generate_all_files(self):
         if not self.project_ids:
             self.project_ids = self.get_default_project_ids()
+        num_workers = min(self.num_workers, len(self.project_ids))
+        if num_workers > 1:
+            self.generate_all_files_in_parallel(num_workers)
+            return
         for project_id in self.project_ids:
             self.reinit()
             self.project_id = project_id
-            self.generate_html_file()
-            self.generate_pdf_file()
+            self.generate_project_html_and_pdf_files()
+
+    def generate_project_files(self, project_id):
+        """
+        Generates the HTML and PDF files of one project in a pool worker process.
+
+        Returns the project's errors, bad highlights and new log messages
+            so they can be merged back into the parent converter.
+        """
+        log_starts = {log_type: len(messages) for log_type, messages in self.log.logs.items()}
+        self.reinit()
+        self.project_id = project_id
+        try:
+            self.generate_project_html_and_pdf_files()
+        except SystemExit: # The generate functions exit() on fatal errors, which would kill the pool worker
+            self.log.error(f'Generating files for {project_id} exited early')
+        except Exception as e:
+            self.log.error(f'Generating files for {project_id} failed: {e}')
+            AppSettings.logger.debug(traceback.format_exc())
+        logs = {log_type: messages[log_starts[log_type]:] for log_type, messages in self.log.logs.items()}
+        return project_id, self.errors, self.bad_highlights, logs
+
+    def generate_all_files_in_parallel(self, num_workers):
+        """
+        Generates the projects on several cores at once.
+
+        The worker processes are forked after setup, so they share the already downloaded
+            resources, style sheets, fonts and locale, which are only read from then on.
+        """
+        self.log.info(f'Generating {len(self.project_ids)} projects with {num_workers} worker processes...')
+        # Fill in the lazily created shared data now so the workers don't each create it
+        self.translate('table_of_contents')
+        _ = self.font_html
+        global _pool_converter
+        _pool_converter = self
+        all_errors = {}
+        all_bad_highlights = {}
+        try:
+            for project_id, errors, bad_highlights, logs \
+                    in imap_in_workers(_generate_project_files, self.project_ids, num_workers, chunk_size=1):
+                self.log.info(f'Finished generating files for {project_id}')
+                all_errors.update(errors)
+                all_bad_highlights.update(bad_highlights)
+                for log_type, messages in logs.items():
+                    self.log.logs[log_type].extend(messages)
+        finally:
+            _pool_converter = None
+        self.reinit()
+        self.errors = all_errors
+        self.bad_highlights = all_bad_highlights
+
+    def generate_project_html_and_pdf_files(self):
+        """
+        Generates the HTML and PDF files of the current project,
+            unless they can be restored from the artifact store.
+        """
+        fully_restored = self.restore_project_files()
+        self.generate_html_file()
+        self.generate_pdf_file()
+        if not fully_restored:
+            self.store_project_files()
 
     def generate_html_file(self):
         if not os.path.exists(self.html_file):
@@ -529,13 +618,12 @@ class PdfConverter(Converter):
 
             self.log.info('Generating body HTML...')
             body_html = self.get_body_html()
-            body_html = self.add_fit_to_page_wrappers(body_html)
             if not body_html:
                 return False
             write_file("/tmp/out.html", body_html)
             self.log.info('Generating appendix RCs...')
             self.get_appendix_rcs()
-            self.all_rcs = {**self.rcs, **self.appendix_rcs}
+            self.all_rcs = ResourceContainerLinks({**self.rcs, **self.appendix_rcs})
             if 'ta' in self.resources:
                 self.log.info('Generating UTA appendix HTML...')
                 body_html += self.get_appendix_html(self.resources['ta'])
@@ -545,29 +633,26 @@ class PdfConverter(Converter):
             self.log.info('Fixing links in body HTML...')
             body_html = self.fix_links(body_html)
             body_html = self._fix_links(body_html)
+
+            # From here on the body is only parsed once, with each step changing the tree,
+            #   and is only turned back into a string once at the end
+            self.log.info('Parsing body HTML...')
+            body_soup = BeautifulSoup(body_html, 'html.parser')
+            del body_html
+            self.wrap_fit_to_page_elements(body_soup)
             self.log.info('Replacing RC links in body HTML...')
-            body_html = self.replace_rc_links(body_html)
+            self.replace_rc_links_in_soup(body_soup)
             self.log.info('Generating Contributors HTML...')
-            body_html += self.get_contributors_html()
+            body_soup.append(BeautifulSoup(self.get_contributors_html(), 'html.parser'))
             self.log.info('Generating TOC HTML...')
-            body_html, toc_html = self.get_toc_html(body_html)
+            toc_html = self.get_toc_html_from_soup(body_soup)
             self.log.info('Done generating TOC HTML.')
 
-            self.log.info('Populating HTML template...')
-            with open(os.path.join(self.pdf_converters_dir, 'templates', 'pdf_template.html')) as template_file:
-                html_template = string.Template(template_file.read())
-            title = f'{self.title} - v{self.version}'
-
-            self.log.info('Piecing together the HTML file...')
-            body_html = '\n'.join(
-                [cover_html, license_html, toc_html, body_html])
-            body_html = self.download_all_images(body_html)
-            head = '\n'.join(
-                [f'<link href="{style}" rel="stylesheet">' for style in self.style_sheets])
-            head += self.head_html
-            html = html_template.safe_substitute(lang=self.language_id, dir=self.language_direction, title=title,
-                                                 head=head, body=body_html)
-            write_file(self.html_file, html)
+            self.download_all_images_in_soup(body_soup)
+            # Kept so that it can be stored (see store_project_files()) and reused with a different cover
+            self.toc_and_body_html = f'{toc_html}\n{body_soup}'
+            del body_soup
+            self.write_html_file(cover_html, license_html, self.toc_and_body_html)
             self.save_errors_html()
             self.save_bad_highlights_html()
             self.log.info('Generated HTML file.')
@@ -575,20 +660,40 @@ class PdfConverter(Converter):
             self.log.info(
                 f'HTML file {self.html_file} is already there. Not generating. Use -r to force regeneration.')
 
-    @classmethod
-    def add_fit_to_page_wrappers(cls, html):
-        if 'fit-to-page' not in html:
-            return html
-        soup = BeautifulSoup(html, 'html.parser')
+    def write_html_file(self, cover_html, license_html, toc_and_body_html):
+        self.log.info('Populating HTML template...')
+        with open(os.path.join(self.pdf_converters_dir, 'templates', 'pdf_template.html')) as template_file:
+            html_template = string.Template(template_file.read())
+        title = f'{self.title} - v{self.version}'
+        self.front_matter_hash = self.get_front_matter_hash(cover_html, license_html)
+
+        self.log.info('Piecing together the HTML file...')
+        front_soup = BeautifulSoup('\n'.join([cover_html, license_html]), 'html.parser')
+        self.download_all_images_in_soup(front_soup)
+        body_html = f'{front_soup}\n{toc_and_body_html}'
+        del front_soup
+        head = '\n'.join(
+            [f'<link href="{style}" rel="stylesheet">' for style in self.style_sheets])
+        head += self.head_html
+        html = html_template.safe_substitute(lang=self.language_id, dir=self.language_direction, title=title,
+                                             head=head, body=body_html)
+        write_file(self.html_file, html)
+
+    @staticmethod
+    def wrap_fit_to_page_elements(soup):
+        """
+        Wraps the contents of each fit-to-page element in a numbered span
+            so generate_pdf_file() can find and resize them.
+
+        Returns True if any were found.
+        """
         elements = soup.find_all(class_="fit-to-page")
-        if not elements:
-            return html
         for i, element in enumerate(elements):
             span = soup.new_tag("span", id=f"fit-to-page-{i+1}")
             for content in reversed(element.contents):
                 span.insert(0, content.extract())
             element.append(span)
-        return str(soup)
+        return bool(elements)
 
     def generate_pdf_file(self):
         if not os.path.exists(self.html_file):
@@ -598,10 +703,12 @@ class PdfConverter(Converter):
             self.log.info(f'Generating PDF file {self.pdf_file}...')
             # Convert HTML to PDF with weasyprint
             base_url = f'file://{self.output_dir}'
-            all_pages_fitted = False
-            soup = BeautifulSoup(read_file(self.html_file), 'html.parser')
-            doc = HTML(string=str(soup), base_url=base_url).render()
+            html = read_file(self.html_file)
+            doc = HTML(string=html, base_url=base_url).render()
             if self.main_resource.subject == OPEN_BIBLE_STORIES:
+                # Only need to parse the HTML if elements might have to be resized
+                soup = BeautifulSoup(html, 'html.parser')
+                del html
                 all_pages_fit = False
                 tries = 0
                 while not all_pages_fit and tries < 10:
@@ -744,11 +851,259 @@ class PdfConverter(Converter):
         self.log.info(
             f'BAD HIGHLIGHTS file can be found at {self.bad_hightlights_file}')
 
+    @property
+    def artifact_store(self):
+        # Created on first use, so that each pool worker process has its own connection
+        if not self._artifact_store:
+            self._artifact_store = get_artifact_store(self.options.get('artifact_store', ARTIFACT_STORE))
+        return self._artifact_store
+
+    @property
+    def artifact_key(self):
+        return f'{self.__class__.__name__}/{self.owner}/{self.repo_name}/{self.file_project_id}'
+
+    @staticmethod
+    def get_hash(value):
+        return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get_front_matter_hash(self, cover_html, license_html):
+        # The head is rewritten along with the cover and license pages, and has the issued date
+        return self.get_hash([cover_html, license_html, self.title, self.version, self.head_html])
+
+    def get_build_input_hash(self, name):
+        """
+        Returns the hash of the file or folder named by a build input name,
+            i.e., `<resource identifier>:<path in the repo>` or `pdf:<path in the pdf converters folder>`
+        """
+        source, _, relative_path = name.partition(':')
+        if source == 'pdf':
+            base_dir = self.pdf_converters_dir
+        elif source in self.resources and self.resources[source].repo_dir:
+            base_dir = self.resources[source].repo_dir
+        else:
+            return None
+        path = os.path.join(base_dir, relative_path) if relative_path else base_dir
+        return get_dir_hash(path) if os.path.isdir(path) else get_file_hash(path)
+
+    def get_build_input_names(self):
+        """
+        Returns the names of the files and folders that the current project is built from
+            (other than the TA and TW articles it links to, see get_article_input_names()).
+
+        Resource repo files and folders are picked if the project id is part of their name
+            (e.g., `tn_GEN.tsv`, `01-GEN.usfm` or `gen/`), else the whole repo is used.
+        """
+        names = []
+        for module_path in {inspect.getsourcefile(cls) for cls in type(self).__mro__
+                            if issubclass(cls, Converter)}:
+            names.append(f'pdf:{os.path.relpath(module_path, self.pdf_converters_dir)}')
+        names.append('pdf:templates/pdf_template.html')
+        names.append(f'pdf:locale/{self.language_id}.json')
+        names += [f'pdf:{style_sheet}' for style_sheet in self.style_sheets]
+        project_id = self.project_id.lower() if self.project_id else None
+        for resource_id, resource in self.resources.items():
+            if not resource.repo_dir or not os.path.isdir(resource.repo_dir):
+                continue
+            entries = [entry for entry in os.listdir(resource.repo_dir)
+                       if project_id and project_id in re.split(r'[^a-z0-9]+', entry.lower())]
+            if entries:
+                names += [f'{resource_id}:{entry}' for entry in entries]
+            elif resource_id not in APPENDIX_RESOURCES or resource == self.main_resource:
+                names.append(f'{resource_id}:')
+        return sorted(names)
+
+    def get_article_input_names(self):
+        """
+        Returns the names of the TA and TW article files and folders that the current project linked to.
+        """
+        names = set()
+        for rc in self.all_rcs.values():
+            if rc.resource not in APPENDIX_RESOURCES or rc.resource not in self.resources or not rc.path:
+                continue
+            if rc.resource == 'ta':
+                names.add(f'ta:{rc.project}/config.yaml')
+                names.add(f'ta:{rc.project}/{rc.path}')
+            else:
+                names.add(f'tw:{rc.project}/{rc.path}.md')
+        return sorted(names)
+
+    def get_build_settings_hash(self):
+        manifests = {}
+        for resource_id, resource in self.resources.items():
+            manifest = dict(resource.manifest) if resource.manifest else {}
+            if 'dublin_core' in manifest and resource_id not in APPENDIX_RESOURCES:
+                manifest['dublin_core'] = {key: value for key, value in manifest['dublin_core'].items()
+                                           if key not in MANIFEST_VERSION_FIELDS}
+            manifests[resource_id] = manifest
+        return self.get_hash({
+            'build_manifest_version': BUILD_MANIFEST_VERSION,
+            'code': get_build_code_hash(),
+            'converter': self.__class__.__name__,
+            'project_id': self.project_id,
+            'manifests': manifests,
+            'style_sheets': self.style_sheets,
+        })
+
+    def get_build_inputs(self, names):
+        inputs = {name: self.get_build_input_hash(name) for name in names}
+        inputs['settings'] = self.get_build_settings_hash()
+        return inputs
+
+    def is_build_up_to_date(self, manifest):
+        """
+        Returns True if all the inputs recorded in the stored build manifest
+            (including the articles that were linked to back then) still have the same hashes,
+            and no new inputs have turned up since.
+        """
+        if manifest.get('version') != BUILD_MANIFEST_VERSION:
+            return False
+        stored_inputs = manifest['inputs']
+        names = self.get_build_input_names()
+        if stored_inputs.get('settings') != self.get_build_settings_hash() \
+                or any(name not in stored_inputs for name in names):
+            return False
+        for name, stored_hash in stored_inputs.items():
+            if name != 'settings' and self.get_build_input_hash(name) != stored_hash:
+                self.log.info(f'Build input {name} has changed.')
+                return False
+        return True
+
+    def restore_project_files(self):
+        """
+        Restores the current project's files from the artifact store if they were built from the same inputs.
+
+        If only the cover or license pages (e.g., the version) have changed, the stored table of contents
+            and body are used to write a new HTML file, but the PDF file still needs to be generated.
+
+        Returns True if the HTML and PDF files were both restored.
+        """
+        if not self.artifact_store or os.path.exists(self.html_file):
+            return False
+        manifest = self.artifact_store.get_json(f'{self.artifact_key}/manifest.json')
+        if not manifest:
+            self.log.info(f'No stored build of {self.file_project_id} in {self.artifact_store}.')
+            return False
+        if not self.is_build_up_to_date(manifest):
+            self.log.info(f'Stored build of {self.file_project_id} is out of date.')
+            return False
+        self.log.info(f'Restoring {self.file_project_id} from {self.artifact_store}...')
+        cover_html = self.get_cover_html()
+        license_html = self.get_license_html()
+        fully_restored = manifest['front_matter'] == self.get_front_matter_hash(cover_html, license_html)
+        artifact_files = {
+            'errors': self.errors_file,
+            'bad_highlights': self.bad_hightlights_file,
+        }
+        if fully_restored:
+            artifact_files['html'] = self.html_file
+            artifact_files['pdf'] = self.pdf_file
+        build_key = f"{self.artifact_key}/{manifest['build']}"
+        try:
+            for artifact, filepath in artifact_files.items():
+                if artifact in manifest['artifacts'] and \
+                        not self.artifact_store.get_file(f'{build_key}/{artifact}', filepath):
+                    raise FileNotFoundError(f'No stored {artifact} file')
+                if artifact in ['errors', 'bad_highlights'] and os.path.exists(filepath):
+                    # These link to the HTML file, whose name changes with the ref
+                    write_file(filepath, read_file(filepath).replace(manifest['html_file'],
+                                                                     os.path.basename(self.html_file)))
+            if not fully_restored:
+                self.log.info(f'Cover or license of {self.file_project_id} has changed. Reusing the stored body...')
+                with tempfile.NamedTemporaryFile(suffix='.html') as body_file:
+                    if not self.artifact_store.get_file(f'{build_key}/toc_and_body', body_file.name):
+                        raise FileNotFoundError('No stored toc_and_body file')
+                    self.toc_and_body_html = read_file(body_file.name)
+                self.write_html_file(cover_html, license_html, self.toc_and_body_html)
+        except Exception as e:
+            self.log.warning(f'Unable to restore {self.file_project_id} from {self.artifact_store}: {e}')
+            for filepath in list(artifact_files.values()) + [self.html_file]:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            self.toc_and_body_html = None
+            return False
+        for file_path, url in manifest['images'].items():
+            full_file_path = os.path.join(self.output_dir, file_path)
+            if not os.path.exists(full_file_path):
+                os.makedirs(os.path.dirname(full_file_path), exist_ok=True)
+                try:
+                    download_file(url, full_file_path)
+                except:
+                    pass
+        self.image_files = {**manifest['images'], **self.image_files}
+        self.build_inputs = manifest['inputs']
+        _ = self.font_html # Makes sure the fonts the HTML links to are in the output folder
+        return fully_restored
+
+    def store_project_files(self):
+        """
+        Saves the current project's files in the artifact store, along with a build manifest
+            of the hashes of the inputs they were built from.
+
+        The files are saved under a key made from the hash of their inputs,
+            and the manifest (which says which build to use) is saved last, in one write,
+            so that it never refers to missing or partly saved files,
+            nor to the files of another job building the same project at the same time.
+        The files of the build that the manifest replaced are then deleted.
+        """
+        if not self.artifact_store or not self.toc_and_body_html \
+                or not os.path.exists(self.html_file) or not os.path.exists(self.pdf_file):
+            return
+        self.log.info(f'Storing {self.file_project_id} in {self.artifact_store}...')
+        if not self.build_inputs:
+            self.build_inputs = self.get_build_inputs(self.get_build_input_names() + self.get_article_input_names())
+        artifact_files = {
+            'html': self.html_file,
+            'pdf': self.pdf_file,
+            'errors': self.errors_file,
+            'bad_highlights': self.bad_hightlights_file,
+        }
+        build = self.get_hash([self.build_inputs, self.front_matter_hash])
+        build_key = f'{self.artifact_key}/{build}'
+        try:
+            stored_artifacts = []
+            for artifact, filepath in artifact_files.items():
+                if os.path.exists(filepath):
+                    self.artifact_store.put_file(filepath, f'{build_key}/{artifact}')
+                    stored_artifacts.append(artifact)
+            with tempfile.NamedTemporaryFile(suffix='.html') as body_file:
+                write_file(body_file.name, self.toc_and_body_html)
+                self.artifact_store.put_file(body_file.name, f'{build_key}/toc_and_body')
+            stored_artifacts.append('toc_and_body')
+            put_build_manifest(self.artifact_store, self.artifact_key, {
+                'version': BUILD_MANIFEST_VERSION,
+                'build': build,
+                'inputs': self.build_inputs,
+                'front_matter': self.front_matter_hash,
+                'html_file': os.path.basename(self.html_file),
+                'artifacts': stored_artifacts,
+                'images': self.image_files,
+            })
+        except Exception as e:
+            self.log.warning(f'Unable to store {self.file_project_id} in {self.artifact_store}: {e}')
+            AppSettings.logger.debug(traceback.format_exc())
+
     def setup_resource(self, resource):
         self.log.info(f'Setting up resource {resource.identifier}...')
+        start_time = time()
         self.download_resource(resource)
+        self.resource_setup_times[resource.identifier] = time() - start_time
         self.log.info(
-            f'  ...set up to use `{resource.repo_name}`: `{resource.ref}`')
+            f'  ...set up to use `{resource.repo_name}`: `{resource.ref}` ({self.resource_setup_times[resource.identifier]:.1f}s)')
+
+    def setup_resources_concurrently(self, resources):
+        """
+        Downloads and unzips the resources using a bounded pool of threads,
+            so the wait is about that of the slowest resource rather than the sum of them all.
+        """
+        if not resources:
+            return
+        num_threads = min(int(self.options.get('resource_threads', MAX_RESOURCE_THREADS)), len(resources))
+        start_time = time()
+        with ThreadPoolExecutor(max_workers=max(1, num_threads)) as executor:
+            futures = [executor.submit(self.setup_resource, resource) for resource in resources]
+            for future in futures:
+                future.result() # Re-raises any exception from the thread
+        self.log.info(f'Set up {len(resources)} resources in {time() - start_time:.1f}s using {num_threads} threads')
 
     def setup_resources(self):
         # if not self.manifest_dict:
@@ -786,8 +1141,7 @@ class PdfConverter(Converter):
                 self.resources[resource.identifier] = resource
 
         # Now setup the resources we have gathered
-        for resource in self.resources.values():
-            self.setup_resource(resource)
+        self.setup_resources_concurrently(list(self.resources.values()))
 
     def already_have_subject(self, subject):
         count = 0
@@ -803,8 +1157,7 @@ class PdfConverter(Converter):
                 return resource
         return None
 
-    def download_all_images(self, html):
-        soup = BeautifulSoup(html, 'html.parser')
+    def download_all_images_in_soup(self, soup):
         for img in soup.find_all('img'):
             if img['src'].startswith('http'):
                 u = urlsplit(img['src'])._replace(query="", fragment="")
@@ -819,7 +1172,7 @@ class PdfConverter(Converter):
                     except:
                         pass
                 img['src'] = file_path
-        return str(soup)
+                self.image_files[file_path] = url
 
     @abstractmethod
     def get_body_html(self):
@@ -830,18 +1183,19 @@ class PdfConverter(Converter):
         pass
 
     def get_rc_by_article_id(self, article_id):
-        for rc_link, rc in self.all_rcs.items():
-            if rc.article_id == article_id:
-                return rc
+        return self.all_rcs.get_by_article_id(article_id)
 
-    def get_toc_html(self, body_html):
+    def get_toc_html_from_soup(self, soup):
+        """
+        Returns the TOC HTML for the section headers in the soup,
+            adding the right header spans into the soup as it goes.
+        """
         toc_html = f'''
 <article id="contents">
     {self.toc_title}
 '''
         prev_toc_level = 0
         prev_header_level = 0
-        soup = BeautifulSoup(body_html, 'html.parser')
         header_titles = [None, None, None, None, None, None]
         headers = soup.find_all(re.compile(r'^h\d'), {
                                 'class': 'section-header'})
@@ -919,7 +1273,7 @@ class PdfConverter(Converter):
             toc_html += '</li>\n</ul>\n'
         toc_html += '</article>'
 
-        return [str(soup), toc_html]
+        return toc_html
 
     def get_cover_html(self):
         version_str = f'{self.translate("version")} {self.version}'
@@ -1028,8 +1382,7 @@ class PdfConverter(Converter):
         self.log.error(f'FOUND SOME MALFORMED RC LINKS: {m.group()}')
         return m.group()
 
-    def replace_rc_links(self, text):
-        soup = BeautifulSoup(text, 'html.parser')
+    def replace_rc_links_in_soup(self, soup):
         rc_pattern = 'rc://[/A-Za-z0-9*_-]+'
         rc_regex = re.compile(rc_pattern)
 
@@ -1065,8 +1418,6 @@ class PdfConverter(Converter):
                 last_part.insert_after(part)
                 last_part = part
 
-        return str(soup)
-
     @staticmethod
     def _fix_links(html):
         # Change [[http.*]] to <a href="http\1">http\1</a>
@@ -1392,7 +1743,7 @@ class PdfConverter(Converter):
                 repo = f'{lang}_{resource_name}'
                 for ref in refs:
                     try:
-                        return AppSettings.catalog_api.catalog_get_entry(owner, repo, ref)
+                        return AppSettings.catalog_client.catalog_get_entry(owner, repo, ref)
                     except ApiException as e:
                         AppSettings.logger.critical(f"Exception when calling catalog_api->catalog_get_entry [{owner}, {repo}, {ref}]: {e}\n")
 
@@ -1440,7 +1791,7 @@ class PdfConverter(Converter):
         if not entry:
             # We didn't find an entry for all the possible guessed owners, langs and refs, so we just try to find any repo with the name in the catalog
             try:
-                entries = AppSettings.catalog_api.catalog_search(
+                entries = AppSettings.catalog_client.catalog_search(
                     repo=repo_name)
                 if entries and len(entries.data):
                     entry = entries.data[0]
@@ -1531,7 +1882,7 @@ class PdfConverter(Converter):
 
         for keyed_args in keyed_args_to_find_best_match:
             try:
-                response = AppSettings.catalog_api.catalog_search(
+                response = AppSettings.catalog_client.catalog_search(
                     subject=subject, sort='released', order='desc', **keyed_args)
                 if response and response.ok and len(response.data):
                     return response.data
@@ -1574,6 +1925,8 @@ class PdfConverter(Converter):
             repo_dir = os.path.join(self.download_dir, resource.repo_name)
         self.log.info(
             f"source_filepath: {source_filepath}, repo_dir: {repo_dir}")
+        if not os.path.exists(repo_dir) and not resource.repo_dir:
+            self.checkout_cached_resource(resource)
         if not os.path.exists(repo_dir):
             if not self.debug_mode or not os.path.exists(source_filepath):
                 try:
@@ -1605,6 +1958,48 @@ class PdfConverter(Converter):
         #         symlink(resource.repo_dir, new_repo_dir)
     # end of download_source_file function
 
+    def checkout_cached_resource(self, resource):
+        """
+        Puts the unzipped (relation) resource into the download dir from the worker's repo cache
+            (downloading it into the cache first if needed).
+
+        Returns True if the resource is now in the download dir.
+        """
+        if resource is self.main_resource:
+            # Built from the commit in repo_data_url, which may not be the head of the branch any more
+            return False
+        repo_cache = get_repo_cache()
+        if not repo_cache:
+            return False
+        if not resource.last_commit:
+            self.log.warning(f"Unable to find the last commit for {resource.owner}/{resource.repo_name}: not using repo cache")
+            return False
+        commit_sha = resource.last_commit.sha
+        # Download by SHA (not the zipball_url of the branch or tag) so the archive matches the cache key
+        archive_url = f"{self.dcs_domain}/{resource.owner}/{resource.repo_name}/archive/{commit_sha}.zip"
+        return repo_cache.checkout(resource.owner, resource.repo_name, resource.ref, commit_sha,
+                                   archive_url, self.download_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def get_build_code_hash():
+    """
+    Returns a hash of the Python source of all the packages that the PDFs are built with,
+        so that stored PDFs aren't reused once any of that code has changed.
+    """
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    sha = hashlib.sha256()
+    for package in BUILD_CODE_PACKAGES:
+        for filepath in sorted(glob(os.path.join(root_dir, package, '**', '*.py'), recursive=True)):
+            sha.update(os.path.relpath(filepath, root_dir).encode('utf-8'))
+            sha.update((get_file_hash(filepath) or '').encode('ascii'))
+    return sha.hexdigest()
+
+
+_pool_converter = None # The converter that forked the pool (only set while the pool is running)
+def _generate_project_files(project_id):
+    return _pool_converter.generate_project_files(project_id)
+
 
 def represent_int(s):
     try:
@@ -15,11 +15,12 @@ Classes for a resource containers
 import os
 import re
 import json
+import weakref
+from collections.abc import MutableMapping
 from bs4 import BeautifulSoup, Tag
 
 
 class ResourceContainerLink(object):
-
     def __init__(self, rc_link, article='', title=None, linking_level=0, article_id=None):
         self._rc_link = rc_link
         self.resource = ''
@@ -42,7 +43,8 @@ class ResourceContainerLink(object):
         self._title = title
         self.linking_level = linking_level
         self._article_id = article_id
-        self.references = []
+        self.references = {}  # rc_links as keys: a set that keeps the order they were added in
+        self._article_id_indexes = weakref.WeakSet()  # Of the ResourceContainerLinks this is in
 
     @property
     def rc_link(self):
@@ -112,10 +114,101 @@ class ResourceContainerLink(object):
 
     def set_article_id(self, article_id):
         self._article_id = article_id
+        for article_id_index in list(self._article_id_indexes):
+            article_id_index.clear()
 
     def add_reference(self, rc):
-        if rc.rc_link not in self.references:
-            self.references.append(rc.rc_link)
+        self.references.setdefault(rc.rc_link, None)
+
+    def __getstate__(self):
+        # The weak references to the indexes can't be pickled (e.g., when returned from pool workers),
+        #   and the unpickled link isn't in those collections anyway
+        state = self.__dict__.copy()
+        del state['_article_id_indexes']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._article_id_indexes = weakref.WeakSet()
 
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True, indent=4)
+        return json.dumps(self, default=lambda o: {key: value for key, value in o.__dict__.items()
+                                                   if key != '_article_id_indexes'},
+                          sort_keys=True, indent=4)
+
+
+class _ArticleIdIndex(object):
+    """
+    The links of one ResourceContainerLinks keyed by article_id,
+        built when first needed and cleared whenever the collection or any of its links' article_ids change.
+    """
+
+    def __init__(self):
+        self.rcs = None
+
+    def clear(self):
+        self.rcs = None
+
+
+class ResourceContainerLinks(MutableMapping):
+    """
+    Dict of ResourceContainerLinks keyed by rc_link, which can also be looked up by article_id.
+
+    All changes go through __setitem__ and __delitem__ (the other dict methods come from MutableMapping),
+        and each link tells the collections it's in when its article_id changes,
+        so the article_id index is only rebuilt when this collection has changed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._rcs = {}
+        self._article_id_index = _ArticleIdIndex()
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, rc_link):
+        return self._rcs[rc_link]
+
+    def __setitem__(self, rc_link, rc):
+        self._rcs[rc_link] = rc
+        rc._article_id_indexes.add(self._article_id_index)
+        self._article_id_index.clear()
+
+    def __delitem__(self, rc_link):
+        del self._rcs[rc_link]
+        self._article_id_index.clear()
+
+    def __contains__(self, rc_link):
+        return rc_link in self._rcs
+
+    def __iter__(self):
+        return iter(self._rcs)
+
+    def __len__(self):
+        return len(self._rcs)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._rcs!r})'
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    # The (read-only) views of the wrapped dict are quicker than the MutableMapping ones
+    def keys(self):
+        return self._rcs.keys()
+
+    def values(self):
+        return self._rcs.values()
+
+    def items(self):
+        return self._rcs.items()
+
+    def reindex(self):
+        self._article_id_index.rcs = {}
+        for rc in self._rcs.values():
+            # Keep the first one, the same as a scan in order would find
+            self._article_id_index.rcs.setdefault(rc.article_id, rc)
+
+    def get_by_article_id(self, article_id):
+        if self._article_id_index.rcs is None:
+            self.reindex()
+        return self._article_id_index.rcs.get(article_id)
@@ -75,7 +75,7 @@ class Resource(object):
     def last_commit(self):
         if not self._last_commit:
             try:
-                commits = AppSettings.repo_api.repo_get_all_commits(self.owner, self.repo_name, sha=self.ref, limit=1)
+                commits = AppSettings.catalog_client.repo_get_all_commits(self.owner, self.repo_name, sha=self.ref, limit=1)
                 if commits and len(commits) > 0:
                     self._last_commit = commits[0]
             except ApiException as e:
@@ -103,13 +103,13 @@ class Resource(object):
                 self._manifest = load_yaml_object(os.path.join(self.repo_dir, 'manifest.yaml'))
             else:
                 try:
-                    response = AppSettings.repo_api.repo_get_contents(self.owner, self.repo_name, "manifest.yaml", ref=self.ref)
+                    response = AppSettings.catalog_client.repo_get_contents(self.owner, self.repo_name, "manifest.yaml", ref=self.ref)
                     self._manifest = yaml.safe_load(base64.b64decode(response.content))
                 except ApiException as e:
                     print("Exception when calling RepositoryApi->repo_get_contents: %s\n" % e)
             if not self._manifest:
                 try:
-                    repo = AppSettings.repo_api.repo_get(self.owner, self.repo_name)
+                    repo = AppSettings.catalog_client.repo_get(self.owner, self.repo_name)
                     self._manifest = {
                         "dublin_core": {
                             "contributor": [self.owner],
@@ -204,7 +204,7 @@ class Resource(object):
     def catalog_entry(self):
         if not self._catalog_entry:
             try:
-                self._catalog_entry = AppSettings.catalog_api.catalog_get_entry(self.owner, self.repo_name, self.ref)
+                self._catalog_entry = AppSettings.catalog_client.catalog_get_entry(self.owner, self.repo_name, self.ref)
             except ApiException as e:
                 AppSettings.logger.critical(f"Exception when calling catalog_api->catalog_get_entry [{self.owner}, {self.repo_name}, {self.ref}]: {e}\n")
 
@@ -294,7 +294,8 @@ class SnPdfConverter(TsvPdfConverter):
             return None
         quote = context_id['quote']
         occurrence = int(context_id['occurrence'])
-        alignment = get_alignment(verse_objects, quote, occurrence)
+        alignment = get_alignment(verse_objects, quote, occurrence,
+                                  self.get_verse_alignment_index(bible_id, chapter, verse))
         if not alignment:
             title = f'{self.project_title} {chapter}:{verse}'
             aligned_text_rc_link = f'rc://{self.language_id}/{bible_id}/bible/{self.project_id}/{self.pad(chapter)}/{str(verse).zfill(3)}'
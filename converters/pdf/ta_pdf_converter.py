@@ -16,6 +16,7 @@ import markdown
 from bs4 import BeautifulSoup
 from door43_tools.subjects import TRANSLATION_ACADEMY
 from .pdf_converter import PdfConverter
+from .rc_link import ResourceContainerLinks
 from general_tools.file_utils import read_file
 
 
@@ -88,7 +89,7 @@ class TaPdfConverter(PdfConverter):
         self.bad_highlights = {}
         self.rcs = {}
         self.appendix_rcs = {}
-        self.all_rcs = {}
+        self.all_rcs = ResourceContainerLinks()
         self.generate_html_file()
         self.generate_pdf_file()
 
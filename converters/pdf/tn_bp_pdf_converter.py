@@ -28,6 +28,7 @@ QUOTES_TO_IGNORE = ['general information:', 'connecting statement:']
 
 class TnPdfConverter(TsvPdfConverter):
     my_subject = TSV_TRANSLATION_NOTES
+    needs_translation_helps = True
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
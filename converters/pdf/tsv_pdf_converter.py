@@ -21,18 +21,24 @@ from collections import OrderedDict
 from .pdf_converter import PdfConverter
 from tx_usfm_tools.singleFilelessHtmlRenderer import SingleFilelessHtmlRenderer
 from door43_tools.subjects import ALIGNED_BIBLE, BIBLE
-from general_tools.alignment_tools import get_alignment, flatten_quote
+from general_tools.alignment_tools import get_alignment, flatten_quote, get_verse_alignment_index
 from general_tools.file_utils import read_file, load_json_object, get_latest_version_path, get_child_directories
 from general_tools.usfm_utils import unalign_usfm
+from general_tools.verse_objects import usfm_to_verse_objects
+
+CHAPTER_CACHE_SIZE = 50 # Most recently used chapter JSON files kept loaded (notes mostly go through a book in order)
 
 
 class TsvPdfConverter(PdfConverter):
+    needs_translation_helps = False # Only set if the translationHelps data of processBibles.js is used
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.alignment_bibles = []
         self.resources_dir = None
         self.ult = None
         self.ust = None
+        self.bible_version_paths = {}
 
         self.add_style_sheet('css/resource/tsv_style.css')
 
@@ -43,6 +49,11 @@ class TsvPdfConverter(PdfConverter):
         self.last_ended_with_paragraph_tag = False
         self.open_quote = False
         self.next_follows_quote = False
+        self.chapter_verse_objects = OrderedDict() # LRU cache of (bible_id, chapter) -> loaded chapter JSON
+        self.chapter_cache_hits = 0
+        self.chapter_cache_misses = 0
+        self.verse_alignment_indexes = {}
+        self.book_verse_objects = {}
 
 
     def get_sample_text(self):
@@ -87,10 +98,15 @@ class TsvPdfConverter(PdfConverter):
             exit(1)
 
     def process_bibles(self):
-        self.resources_dir = os.path.join(self.download_dir, f'resources')
         if not self.ult:
             self.log.error('No Bible found!')
             exit(1)
+        if not self.needs_translation_helps:
+            # The verse objects of the aligned Bibles are parsed from their USFM as needed (see get_book_verse_objects())
+            self.log.info('Parsing aligned Bibles in process')
+            self.resources_dir = None
+            return
+        self.resources_dir = os.path.join(self.download_dir, f'resources')
         if not os.path.exists(self.resources_dir):
             args = ['node', 'start.js',
                     '--resources_dir', self.resources_dir,
@@ -161,16 +177,16 @@ class TsvPdfConverter(PdfConverter):
             return
         if not language_id:
             language_id = self.language_id
-        bible_path = os.path.join(self.resources_dir, language_id, 'bibles', bible_id)
-        if not bible_path:
-            self.log.error(f'{bible_path} not found!')
-            exit(1)
-        bible_version_path = get_latest_version_path(bible_path)
-        if not bible_version_path:
-            self.log.error(f'No versions found in {bible_path}!')
-            exit(1)
+        if self.resources_dir:
+            bible_path = os.path.join(self.resources_dir, language_id, 'bibles', bible_id)
+            if not bible_path:
+                self.log.error(f'{bible_path} not found!')
+                exit(1)
+            bible_version_path = get_latest_version_path(bible_path)
+            if not bible_version_path:
+                self.log.error(f'No versions found in {bible_path}!')
+                exit(1)
 
-        book_data = OrderedDict()
         book_file = os.path.join(self.resources[bible_id].repo_dir, f'{self.book_number_padded}-{self.project_id.upper()}.usfm')
         if not os.path.exists(book_file):
             return
@@ -178,35 +194,7 @@ class TsvPdfConverter(PdfConverter):
 
         unaligned_usfm = unalign_usfm(book_usfm)
         self.log.info(f'Converting {self.project_id.upper()} from USFM to HTML...')
-        book_html, warnings = SingleFilelessHtmlRenderer({self.project_id.upper(): unaligned_usfm}).render()
-        html_verse_splits = re.split(r'(<span id="[^"]+-ch-0*(\d+)-v-(\d+(?:-\d+)?)" class="v-num">)', book_html)
-        usfm_chapter_splits = re.split(r'\\c ', unaligned_usfm)
-        usfm_verse_splits = None
-        chapter_verse_index = 0
-        for i in range(1, len(html_verse_splits), 4):
-            chapter = html_verse_splits[i+1]
-            verses = html_verse_splits[i+2]
-            if chapter not in book_data:
-                book_data[chapter] = OrderedDict()
-                usfm_chapter = f'\\c {usfm_chapter_splits[int(chapter)]}'
-                usfm_verse_splits = re.split(r'\\v ', usfm_chapter)
-                chapter_verse_index = 0
-            chapter_verse_index += 1
-            verse_usfm = f'\\v {usfm_verse_splits[chapter_verse_index]}'
-            verse_html = html_verse_splits[i] + html_verse_splits[i+3]
-            verse_html = re.split('<h2', verse_html)[0]  # remove next chapter since only split on verses
-            verse_soup = BeautifulSoup(verse_html, 'html.parser')
-            for tag in verse_soup.find_all():
-                if (not tag.contents or len(tag.get_text(strip=True)) <= 0) and tag.name not in ['br', 'img']:
-                    tag.decompose()
-            verse_html = str(verse_soup)
-            verses = re.findall(r'\d+', verses)
-            for verse in verses:
-                verse = verse.lstrip('0')
-                book_data[chapter][verse] = {
-                    'usfm': verse_usfm,
-                    'html': verse_html
-                }
+        book_data, warnings = SingleFilelessHtmlRenderer({self.project_id.upper(): unaligned_usfm}).renderVerses()
         self.book_data[bible_id] = book_data
 
     @staticmethod
@@ -244,23 +232,84 @@ class TsvPdfConverter(PdfConverter):
                           flags=re.IGNORECASE | re.MULTILINE)
         return html
 
-    def get_verse_objects(self, bible_id, chapter, verse):
-        bible_path = os.path.join(self.resources_dir, self.language_id, 'bibles', bible_id)
-        if not bible_path:
-            self.log.error(f'{bible_path} not found!')
-            exit(1)
-        bible_version_path = get_latest_version_path(bible_path)
-        if not bible_version_path:
-            self.log.error(f'No versions found in {bible_path}!')
-            exit(1)
+    def get_bible_version_path(self, bible_id):
+        if bible_id not in self.bible_version_paths:
+            bible_path = os.path.join(self.resources_dir, self.language_id, 'bibles', bible_id)
+            if not bible_path:
+                self.log.error(f'{bible_path} not found!')
+                exit(1)
+            bible_version_path = get_latest_version_path(bible_path)
+            if not bible_version_path:
+                self.log.error(f'No versions found in {bible_path}!')
+                exit(1)
+            self.bible_version_paths[bible_id] = bible_version_path
+        return self.bible_version_paths[bible_id]
+
+    def get_book_verse_objects(self, bible_id):
+        """
+        Returns the verse objects of the whole current project of the Bible, by chapter and verse,
+            parsed from its USFM the first time they are needed
+        """
+        if bible_id not in self.book_verse_objects:
+            book_verse_objects = {}
+            if bible_id in self.resources:
+                book_file = os.path.join(self.resources[bible_id].repo_dir,
+                                         f'{self.book_number_padded}-{self.project_id.upper()}.usfm')
+                if os.path.exists(book_file):
+                    self.log.info(f'Parsing the verse objects of {bible_id} {self.project_id.upper()}...')
+                    book_verse_objects = usfm_to_verse_objects(read_file(book_file))
+                else:
+                    self.log.warning(f'{book_file} not found!')
+            self.book_verse_objects[bible_id] = book_verse_objects
+        return self.book_verse_objects[bible_id]
+
+    def get_chapter_verse_objects(self, bible_id, chapter):
+        """
+        Returns the verse objects of the chapter of the current project, by verse.
 
-        chapter_json_path = f'{bible_version_path}/{self.project_id}/{chapter}.json'
+        If processBibles.js was run, this is the loaded {chapter}.json, which is only read again
+            if it has dropped out of the CHAPTER_CACHE_SIZE most recently used chapters.
+
+        The returned data is shared, so must not be changed.
+        """
+        if not self.resources_dir:
+            return self.get_book_verse_objects(bible_id).get(str(chapter), {})
+        key = (bible_id, chapter)
+        if key in self.chapter_verse_objects:
+            self.chapter_cache_hits += 1
+            self.chapter_verse_objects.move_to_end(key)
+            return self.chapter_verse_objects[key]
+        self.chapter_cache_misses += 1
+        chapter_json_path = f'{self.get_bible_version_path(bible_id)}/{self.project_id}/{chapter}.json'
         data = load_json_object(chapter_json_path)
+        self.chapter_verse_objects[key] = data
+        if len(self.chapter_verse_objects) > CHAPTER_CACHE_SIZE:
+            self.chapter_verse_objects.popitem(last=False)
+        return data
+
+    def get_verse_objects(self, bible_id, chapter, verse):
+        data = self.get_chapter_verse_objects(bible_id, chapter)
         if verse in data:
             return data[verse]['verseObjects']
         else:
             return []
 
+    def get_verse_alignment_index(self, bible_id, chapter, verse):
+        """
+        Returns the alignment milestone index of the verse (see alignment_tools.get_verse_alignment_index()),
+            which is built once for all of the verse's notes and words
+        """
+        key = (bible_id, chapter, verse)
+        if key not in self.verse_alignment_indexes:
+            self.verse_alignment_indexes[key] = get_verse_alignment_index(self.get_verse_objects(bible_id, chapter, verse))
+        return self.verse_alignment_indexes[key]
+
+    def generate_html_file(self):
+        super().generate_html_file()
+        if self.chapter_cache_hits or self.chapter_cache_misses:
+            self.log.info(f'Chapter JSON cache for {self.project_id}: {self.chapter_cache_hits} hits, '
+                          f'{self.chapter_cache_misses} misses (files loaded)')
+
     def get_text_from_verse_objects(self, verse_objects):
         text = ''
         for verse_object in verse_objects:
@@ -281,7 +330,8 @@ class TsvPdfConverter(PdfConverter):
             return None
         quote = context_id['quote']
         occurrence = int(context_id['occurrence'])
-        alignment = get_alignment(verse_objects, quote, occurrence)
+        alignment = get_alignment(verse_objects, quote, occurrence,
+                                  self.get_verse_alignment_index(bible_id, chapter, verse))
         if not alignment:
             title = f'{self.project_title} {chapter}:{verse}'
             aligned_text_rc_link = f'rc://{self.language_id}/{bible_id}/bible/{self.project_id}/{self.pad(chapter)}/{str(verse).zfill(3)}'
@@ -1,16 +1,68 @@
 import os
-import tempfile
 import string
 from bs4 import BeautifulSoup
 from shutil import copyfile
 
-from rq_settings import prefix, debug_mode_flag
+from rq_settings import usfm_workers
 from app_settings.app_settings import AppSettings
-from general_tools.file_utils import write_file, remove_tree, get_files
+from general_tools.file_utils import write_file, read_file, get_files
+from general_tools.pool_utils import imap_in_workers
 from converters.converter import Converter
 from tx_usfm_tools.transform import UsfmTransform
 
 
+def convert_usfm_book(args):
+    """
+    Converts one USFM book file to the HTML page written out for it.
+
+    This runs in the worker processes of Usfm2HtmlConverter.convert(), so rather than logging,
+        it returns the converter warnings and the (level, message) logger messages along with the HTML.
+    """
+    filename, template_html, title = args
+    base_name = os.path.basename(filename)
+    filebase = os.path.splitext(base_name)[0]
+    html_filename = filebase + '.html'
+    result = {'html_filename': html_filename, 'warnings': [], 'log_messages': [], 'success': False}
+
+    # Do the actual USFM -> HTML conversion
+    converted_html, warning_list = UsfmTransform.buildSingleHtmlFromString(read_file(filename))
+    for warning_msg in warning_list:
+        result['warnings'].append(f"{filebase} - {warning_msg}")
+
+    # This code seems to be cleaning up or adjusting the converted HTML file
+    converted_html_length = len(converted_html)
+    if '</p></p></p>' in converted_html:
+        result['log_messages'].append(('debug', f"Usfm2HtmlConverter got multiple consecutive paragraph closures in converted {html_filename}"))
+    # Put the converted html into the template
+    template_soup = BeautifulSoup(template_html, 'html.parser')
+    template_soup.head.title.string = title
+    converted_soup = BeautifulSoup(converted_html, 'html.parser')
+    content_div = template_soup.find('div', id='content')
+    content_div.clear()
+    if converted_soup and converted_soup.body:
+        content_div.append(converted_soup.body)
+        content_div.body.unwrap()
+        result['success'] = True
+    else:
+        content_div.append("ERROR! NOT CONVERTED!")
+        result['warnings'].append(f"USFM parsing or conversion error for {base_name}")
+        result['log_messages'].append(('debug', f"Got converted html: {converted_html[:600]}{' …' if len(converted_html)>600 else ''}"))
+        if not converted_soup:
+            result['log_messages'].append(('debug', f"No converted_soup"))
+        elif not converted_soup.body:
+            result['log_messages'].append(('debug', f"No converted_soup.body"))
+    template_soup_string = str(template_soup)
+    template_soup_string_length = len(template_soup_string)
+    if '</p></p></p>' in template_soup_string:
+        result['log_messages'].append(('warning', f"Usfm2HtmlConverter got multiple consecutive paragraph closures in {html_filename}"))
+    if template_soup_string_length < converted_html_length * 0.67: # What is the 33% or so that's lost ???
+        result['log_messages'].append(('debug', f"### Usfm2HtmlConverter wrote souped-up html of length {template_soup_string_length:,} from {converted_html_length:,} = {template_soup_string_length*100.0/converted_html_length}%"))
+        result['warnings'].append(f"Usfm2HtmlConverter possibly lost converted html for {html_filename}")
+        result['log_messages'].append(('info', f"Usfm2HtmlConverter {html_filename} was {converted_html_length:,} now {template_soup_string_length:,}"))
+    result['html'] = template_soup_string
+    return result
+
+
 class Usfm2HtmlConverter(Converter):
 
     def convert(self):
@@ -29,76 +81,13 @@ class Usfm2HtmlConverter(Converter):
         template_html = template_html.safe_substitute(lang=self.manifest_dict['dublin_core']['language']['identifier'])
 
         # Convert usfm files and copy across other files
-        num_successful_books = num_failed_books = 0
+        usfm_filenames = []
         for filename in sorted(files):
             if filename.endswith('.usfm'):
                 base_name = os.path.basename(filename)
                 if convert_only_list and (base_name not in convert_only_list):  # see if this is a file we are to convert
                     continue
-
-                # Convert the USFM file
-                self.log.info(f"Converting Bible USFM file: {base_name} …") # Logger also issues DEBUG msg
-                # Copy just the single file to be converted into a single scratch folder
-                scratch_dir = tempfile.mkdtemp(prefix='tX_convert_usfm_scratch_')
-                delete_scratch_dir_flag = True # Set to False for debugging this code
-                copyfile(filename, os.path.join(scratch_dir, os.path.basename(filename)))
-                filebase = os.path.splitext(os.path.basename(filename))[0]
-                # Do the actual USFM -> HTML conversion
-                warning_list = UsfmTransform.buildSingleHtml(scratch_dir, scratch_dir, filebase)
-                if warning_list:
-                    for warning_msg in warning_list:
-                        self.log.warning(f"{filebase} - {warning_msg}")
-
-                # This code seems to be cleaning up or adjusting the converted HTML file
-                html_filename = filebase + '.html'
-                with open(os.path.join(scratch_dir, html_filename), 'rt', encoding='utf-8') as html_file:
-                    converted_html = html_file.read()
-                converted_html_length = len(converted_html)
-                # AppSettings.logger.debug(f"### Usfm2HtmlConverter got converted html of length {converted_html_length:,}")
-                # AppSettings.logger.debug(f"Got converted html: {converted_html[:500]}{' …' if len(converted_html)>500 else ''}")
-                if '</p></p></p>' in converted_html:
-                    AppSettings.logger.debug(f"Usfm2HtmlConverter got multiple consecutive paragraph closures in converted {html_filename}")
-                # Now what are we doing with the converted html ???
-                template_soup = BeautifulSoup(template_html, 'html.parser')
-                template_soup.head.title.string = self.repo_subject
-                converted_soup = BeautifulSoup(converted_html, 'html.parser')
-                content_div = template_soup.find('div', id='content')
-                content_div.clear()
-                if converted_soup and converted_soup.body:
-                    content_div.append(converted_soup.body)
-                    content_div.body.unwrap()
-                    num_successful_books += 1
-                else:
-                    content_div.append("ERROR! NOT CONVERTED!")
-                    self.log.warning(f"USFM parsing or conversion error for {base_name}")
-                    AppSettings.logger.debug(f"Got converted html: {converted_html[:600]}{' …' if len(converted_html)>600 else ''}")
-                    if not converted_soup:
-                        AppSettings.logger.debug(f"No converted_soup")
-                    elif not converted_soup.body:
-                        AppSettings.logger.debug(f"No converted_soup.body")
-                    # from bs4.diagnose import diagnose
-                    # diagnose(converted_html)
-                    num_failed_books += 1
-                output_filepath = os.path.join(self.output_dir, html_filename)
-                #print("template_soup type is", type(template_soup)) # <class 'bs4.BeautifulSoup'>
-                template_soup_string = str(template_soup)
-                write_file(output_filepath, template_soup_string)
-                template_soup_string_length = len(template_soup_string)
-                # AppSettings.logger.debug(f"### Usfm2HtmlConverter wrote souped-up html of length {template_soup_string_length:,} from {converted_html_length:,}")
-                if '</p></p></p>' in template_soup_string:
-                    AppSettings.logger.warning(f"Usfm2HtmlConverter got multiple consecutive paragraph closures in {html_filename}")
-                if template_soup_string_length < converted_html_length * 0.67: # What is the 33% or so that's lost ???
-                    AppSettings.logger.debug(f"### Usfm2HtmlConverter wrote souped-up html of length {template_soup_string_length:,} from {converted_html_length:,} = {template_soup_string_length*100.0/converted_html_length}%")
-                    self.log.warning(f"Usfm2HtmlConverter possibly lost converted html for {html_filename}")
-                    AppSettings.logger.info(f"Usfm2HtmlConverter {html_filename} was {converted_html_length:,} now {template_soup_string_length:,}")
-                    # AppSettings.logger.debug(f"Usfm2HtmlConverter {html_filename} was: {converted_html}")
-                    write_file(os.path.join(scratch_dir,filebase+'.converted.html'), template_soup_string)
-                    if prefix and debug_mode_flag:
-                        delete_scratch_dir_flag = False
-                #print("Got converted x2 html:", str(template_soup)[:500])
-                # self.log.info(f"Converted {os.path.basename(filename)} to {os.path.basename(html_filename)}.")
-                if delete_scratch_dir_flag:
-                    remove_tree(scratch_dir)
+                usfm_filenames.append(filename)
             else:
                 # Directly copy over files that are not USFM files
                 try:
@@ -107,6 +96,25 @@ class Usfm2HtmlConverter(Converter):
                         copyfile(filename, output_filepath)
                 except:
                     pass
+
+        num_successful_books = num_failed_books = 0
+        book_args = [(filename, template_html, self.repo_subject) for filename in usfm_filenames]
+        num_workers = min(usfm_workers, len(book_args))
+        if num_workers > 1:
+            AppSettings.logger.debug(f"Converting {len(book_args)} books with {num_workers} worker processes…")
+        # The books take a while each, so send them to the workers one at a time
+        for filename, result in zip(usfm_filenames, imap_in_workers(convert_usfm_book, book_args, num_workers, chunk_size=1)):
+            # Logger also issues DEBUG msg
+            self.log.info(f"Converting Bible USFM file: {os.path.basename(filename)} …")
+            for warning_msg in result['warnings']:
+                self.log.warning(warning_msg)
+            for level, msg in result['log_messages']:
+                getattr(AppSettings.logger, level)(msg)
+            if result['success']:
+                num_successful_books += 1
+            else:
+                num_failed_books += 1
+            write_file(os.path.join(self.output_dir, result['html_filename']), result['html'])
         if num_failed_books and not num_successful_books:
             self.log.error(f"Conversion of all books failed!")
         self.log.info(f"Finished processing {num_successful_books} Bible USFM files.")
@@ -0,0 +1,155 @@
+"""
+Memoizing wrapper around the DCS catalog and repository APIs.
+
+The PDF converters look up the same catalog entries, commits and manifests
+    many times per job (and again in the next job for the same language),
+    so results are kept in memory for a while, and optionally on disk
+    so they survive from one (forked) rq job to the next.
+404 responses are cached too (for a shorter time), since most of the
+    owner/language/ref combinations that get tried don't exist.
+Commits and file contents are only cached for a full commit SHA,
+    since a branch can be pushed to at any time (and can't be told from a tag by its name).
+"""
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+import threading
+import tempfile
+from time import time
+from typing import Dict, Tuple, Any, Optional
+
+from dcs_api_client.rest import ApiException
+
+
+CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '600')) # seconds
+CATALOG_CACHE_NEGATIVE_TTL = int(os.getenv('CATALOG_CACHE_NEGATIVE_TTL', '300')) # seconds
+CATALOG_CACHE_DIR = os.getenv('CATALOG_CACHE_DIR', '') # On-disk cache is only used if this is set
+
+COMMIT_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+
+def is_fixed_ref(ref:Optional[str]) -> bool:
+    """
+    Returns True if the ref is a full commit SHA, i.e., can't move the way a branch (or the default branch) can.
+    """
+    return bool(ref) and COMMIT_SHA_RE.fullmatch(ref) is not None
+
+
+class CatalogClient:
+    """
+    Offers the (read-only) catalog_api and repo_api calls used by the converters,
+        with the same signatures, return values and ApiExceptions.
+    """
+
+    def __init__(self, catalog_api, repo_api, logger:Optional[logging.Logger]=None,
+                 ttl:int=CATALOG_CACHE_TTL, negative_ttl:int=CATALOG_CACHE_NEGATIVE_TTL,
+                 cache_dir:Optional[str]=CATALOG_CACHE_DIR) -> None:
+        self.catalog_api = catalog_api
+        self.repo_api = repo_api
+        self.logger = logger if logger else logging.getLogger(__name__)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_dir = cache_dir
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._cache:Dict[str,Tuple[float,bool,Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+
+    def catalog_get_entry(self, owner:str, repo:str, tag:str):
+        return self._call(self.catalog_api, 'catalog_get_entry', owner, repo, tag)
+
+    def catalog_search(self, **kwargs):
+        return self._call(self.catalog_api, 'catalog_search', **kwargs)
+
+    def repo_get(self, owner:str, repo:str):
+        return self._call(self.repo_api, 'repo_get', owner, repo)
+
+    def repo_get_all_commits(self, owner:str, repo:str, **kwargs):
+        if not is_fixed_ref(kwargs.get('sha')):
+            return self._call_uncached(self.repo_api, 'repo_get_all_commits', owner, repo, **kwargs)
+        return self._call(self.repo_api, 'repo_get_all_commits', owner, repo, **kwargs)
+
+    def repo_get_contents(self, owner:str, repo:str, filepath:str, **kwargs):
+        if not is_fixed_ref(kwargs.get('ref')):
+            return self._call_uncached(self.repo_api, 'repo_get_contents', owner, repo, filepath, **kwargs)
+        return self._call(self.repo_api, 'repo_get_contents', owner, repo, filepath, **kwargs)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache = {}
+
+
+    @staticmethod
+    def _make_key(method_name:str, args, kwargs) -> str:
+        # Lists (e.g., of owners) are given to catalog_search, so make a string key
+        return json.dumps([method_name, args, sorted(kwargs.items())], default=str)
+
+
+    def _call(self, api, method_name:str, *args, **kwargs):
+        key = self._make_key(method_name, args, kwargs)
+        cached = self._get_cached(key)
+        if cached is not None:
+            self.hits += 1
+            _expires_at, is_not_found, value = cached
+            if is_not_found:
+                raise ApiException(status=404, reason=value)
+            return value
+        self.misses += 1
+        try:
+            value = getattr(api, method_name)(*args, **kwargs)
+        except ApiException as e:
+            if e.status == 404:
+                self._set_cached(key, (time() + self.negative_ttl, True, e.reason))
+            raise e
+        self._set_cached(key, (time() + self.ttl, False, value))
+        return value
+
+
+    def _call_uncached(self, api, method_name:str, *args, **kwargs):
+        self.misses += 1
+        return getattr(api, method_name)(*args, **kwargs)
+
+
+    def _get_disk_path(self, key:str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pickle')
+
+
+    def _get_cached(self, key:str) -> Optional[Tuple[float,bool,Any]]:
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is None and self.cache_dir:
+            try:
+                with open(self._get_disk_path(key), 'rb') as cache_file:
+                    cached = pickle.load(cache_file)
+            except FileNotFoundError:
+                pass
+            except Exception as e: # e.g., a truncated file or a changed api model class
+                self.logger.debug(f"CatalogClient ignoring unreadable cache file for {key}: {e}")
+            if cached is not None:
+                with self._lock:
+                    self._cache[key] = cached
+        if cached is not None and cached[0] < time():
+            return None # expired
+        return cached
+
+
+    def _set_cached(self, key:str, cached:Tuple[float,bool,Any]) -> None:
+        with self._lock:
+            self._cache[key] = cached
+        if self.cache_dir:
+            # Write to a temp file and rename it so other processes never see a partial file
+            fd, temp_filepath = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as cache_file:
+                    pickle.dump(cached, cache_file)
+                os.replace(temp_filepath, self._get_disk_path(key))
+            except Exception as e:
+                self.logger.debug(f"CatalogClient unable to save {key} to disk: {e}")
+                if os.path.exists(temp_filepath):
+                    os.remove(temp_filepath)
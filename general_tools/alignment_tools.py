@@ -13,6 +13,8 @@ from general_tools.file_utils import load_json_object
 
 hebrew_punctuation = '׃׀־׳״׆'
 punctuation = string.punctuation + hebrew_punctuation
+# Ways the words of a quote can be joined in the content of an alignment milestone
+quote_joiners = ['', ' ', '\u2060']
 
 
 def get_quote_combinations(quote):
@@ -86,17 +88,67 @@ def convert_single_dimensional_quote_to_multidimensional(quote):
     return multi_quote
 
 
-def get_alignment(verse_objects, quote, occurrence=1):
+def get_verse_alignment_index(verse_objects):
+    """
+    Returns a dict of (content, occurrence) -> list of paths (tuples of indexes into the verse objects
+        and their children) of all the alignment milestones of a verse.
+
+    Build it once per verse and pass it to get_alignment() for each quote of the verse.
+    """
+    index = {}
+
+    def add_milestones(objects, path):
+        for idx, verse_object in enumerate(objects):
+            if 'type' in verse_object and verse_object['type'] == 'milestone':
+                if 'content' in verse_object:
+                    index.setdefault((verse_object['content'], verse_object.get('occurrence')), []).append(path + (idx,))
+                if 'children' in verse_object:
+                    add_milestones(verse_object['children'], path + (idx,))
+
+    add_milestones(verse_objects, ())
+    return index
+
+
+def get_quote_combinations_by_key(quote, verse_index=None):
+    """
+    Returns a dict of (joined words, occurrence) -> quote combination (see get_quote_combinations())
+        for every way a run of the quote's words could appear as a milestone's content,
+        keeping only keys found in the verse index if one is given.
+
+    When several combinations have the same key, the first one is kept, as with get_alignment_by_combinations().
+    """
+    combinations_by_key = {}
+    for i in range(0, len(quote)):
+        words = []
+        for j in range(i, len(quote)):
+            words.append(quote[j]['word'])
+            combo_occurrence = quote[i]['occurrence'] if j == i else 1
+            for joiner in quote_joiners:
+                key = (joiner.join(words), combo_occurrence)
+                if key not in combinations_by_key and (verse_index is None or key in verse_index):
+                    combinations_by_key[key] = {
+                        'word': words[:],
+                        'occurrence': combo_occurrence,
+                        'indexes': list(range(i, j + 1)),
+                        'found': False
+                    }
+    return combinations_by_key
+
+
+def get_alignment(verse_objects, quote, occurrence=1, verse_index=None):
     orig_quote = quote
     if isinstance(quote, str):
         quote = split_string_into_quote(quote, occurrence)
     elif not isinstance(quote[0], list):
         quote = convert_single_dimensional_quote_to_multidimensional(quote)
+    if verse_index is None:
+        verse_index = get_verse_alignment_index(verse_objects)
 
     alignment = []
     for group in quote:
-        quote_combinations = get_quote_combinations(group)
-        alignment += get_alignment_by_combinations(verse_objects, group, quote_combinations)
+        combinations_by_key = get_quote_combinations_by_key(group, verse_index)
+        if combinations_by_key:
+            alignment += get_alignment_by_index(verse_objects, group, combinations_by_key)
 
     for phrase in quote:
         for word in phrase:
@@ -152,6 +204,49 @@ def get_alignment_by_combinations(verse_objects, quote, quote_combinations, foun
     return alignments
 
 
+def get_alignment_by_index(verse_objects, quote, combinations_by_key, found=False):
+    """
+    Same as get_alignment_by_combinations(), but finds the quote combination that matches a milestone
+        with one dict lookup (see get_quote_combinations_by_key()) rather than by trying each one.
+    """
+    alignments = []
+    in_between_alignments = []
+    last_found = False
+    for verse_object in verse_objects:
+        my_found = found
+        if 'type' in verse_object and verse_object['type'] == 'milestone':
+            if 'content' in verse_object:
+                combo = combinations_by_key.get((verse_object['content'], verse_object.get('occurrence')))
+                if combo:
+                    my_found = True
+                    for index in combo['indexes']:
+                        quote[index]['found'] = True
+                if not my_found:
+                    last_found = False
+                    in_between_alignments = []
+            if 'children' in verse_object:
+                my_alignments = get_alignment_by_index(verse_object['children'], quote, combinations_by_key, my_found)
+                if not found and my_found:
+                    if last_found:
+                        alignments[-1] += in_between_alignments + my_alignments
+                        in_between_alignments = []
+                    else:
+                        alignments.append(my_alignments)
+                        last_found = True
+                else:
+                    alignments += my_alignments
+        elif 'text' in verse_object and (found or last_found):
+            alignment = {
+                'word': verse_object['text'],
+                'occurrence': verse_object['occurrence'] if 'occurrence' in verse_object else 0
+            }
+            if found:
+                alignments.append(alignment)
+            elif last_found:
+                in_between_alignments.append(alignment)
+    return alignments
+
+
 def flatten_alignment(alignment):
     if not alignment:
         return alignment
@@ -0,0 +1,193 @@
+"""
+Store of build artifacts (e.g., rendered PDF and HTML files) kept from one job to the next,
+    so that outputs whose inputs haven't changed can be reused rather than rebuilt.
+
+The store is either a local folder or an S3 bucket (with an optional key prefix),
+    chosen by the ARTIFACT_STORE environment variable, e.g.,
+        ARTIFACT_STORE=/mnt/tX_artifacts
+        ARTIFACT_STORE=s3://tx-artifacts/pdf
+"""
+import os
+import json
+import shutil
+import tempfile
+from typing import Dict, Any, Optional
+
+import botocore
+
+from aws_tools.s3_handler import S3Handler
+from general_tools.file_utils import write_file, load_json_object
+from app_settings.app_settings import AppSettings
+
+
+ARTIFACT_STORE = os.getenv('ARTIFACT_STORE', '') # Artifacts aren't stored if this isn't set
+
+
+class LocalArtifactStore:
+    """
+    Artifact store in a local (or mounted) folder.
+    """
+
+    def __init__(self, store_dir:str) -> None:
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+
+    def __repr__(self) -> str:
+        return f"LocalArtifactStore({self.store_dir})"
+
+
+    def _get_path(self, key:str) -> str:
+        return os.path.join(self.store_dir, *key.split('/'))
+
+
+    def get_file(self, key:str, filepath:str) -> bool:
+        """
+        Copies the stored artifact to <filepath>.
+
+        Returns False if there's no such artifact.
+        """
+        try:
+            shutil.copyfile(self._get_path(key), filepath)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+    def put_file(self, filepath:str, key:str) -> None:
+        artifact_path = self._get_path(key)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        # Copy to a temp file and rename it so that other jobs never see a partial file
+        fd, temp_filepath = tempfile.mkstemp(dir=os.path.dirname(artifact_path), suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(filepath, temp_filepath)
+        os.replace(temp_filepath, artifact_path)
+
+
+    def get_json(self, key:str) -> Optional[Dict[str,Any]]:
+        return load_json_object(self._get_path(key))
+
+
+    def put_json(self, key:str, contents:Dict[str,Any]) -> None:
+        artifact_path = self._get_path(key)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        fd, temp_filepath = tempfile.mkstemp(dir=os.path.dirname(artifact_path), suffix='.tmp')
+        os.close(fd)
+        write_file(temp_filepath, contents)
+        os.replace(temp_filepath, artifact_path)
+
+
+    def delete(self, key:str) -> None:
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+
+    def delete_prefix(self, prefix:str) -> None:
+        """
+        Deletes all the artifacts whose keys start with <prefix>/.
+        """
+        shutil.rmtree(self._get_path(prefix), ignore_errors=True)
+
+
+class S3ArtifactStore:
+    """
+    Artifact store in an S3 bucket.
+    """
+
+    def __init__(self, s3_handler:S3Handler, prefix:str='') -> None:
+        self.s3_handler = s3_handler
+        self.prefix = prefix.strip('/')
+
+
+    def __repr__(self) -> str:
+        return f"S3ArtifactStore(s3://{self.s3_handler.bucket_name}/{self.prefix})"
+
+
+    def _get_key(self, key:str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+
+    def get_file(self, key:str, filepath:str) -> bool:
+        try:
+            self.s3_handler.download_file(self._get_key(key), filepath)
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return False
+            raise e
+        return True
+
+
+    def put_file(self, filepath:str, key:str) -> None:
+        self.s3_handler.upload_file_in_parts(filepath, self._get_key(key), cache_time=0)
+
+
+    def get_json(self, key:str) -> Optional[Dict[str,Any]]:
+        fd, temp_filepath = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            if not self.get_file(key, temp_filepath):
+                return None
+            return load_json_object(temp_filepath)
+        finally:
+            os.remove(temp_filepath)
+
+
+    def put_json(self, key:str, contents:Dict[str,Any]) -> None:
+        self.s3_handler.bucket.put_object(Key=self._get_key(key), Body=json.dumps(contents, sort_keys=True),
+                                          ContentType='application/json', CacheControl='max-age=0')
+
+
+    def delete(self, key:str) -> None:
+        self.s3_handler.bucket.Object(self._get_key(key)).delete()
+
+
+    def delete_prefix(self, prefix:str) -> None:
+        """
+        Deletes all the artifacts whose keys start with <prefix>/.
+        """
+        self.s3_handler.bucket.objects.filter(Prefix=f'{self._get_key(prefix)}/').delete()
+
+
+def put_build_manifest(artifact_store, key_prefix:str, manifest:Dict[str,Any]) -> None:
+    """
+    Saves the manifest of the build whose files were stored under <key_prefix>/<manifest['build']>/,
+        and then deletes the files of the build that the previous manifest was for
+        (or, for manifests from before builds had their own keys, the artifacts it listed).
+    """
+    manifest_key = f'{key_prefix}/manifest.json'
+    try:
+        previous_manifest = artifact_store.get_json(manifest_key)
+    except Exception as e: # e.g., a partly written file
+        AppSettings.logger.warning(f"Unable to load previous manifest {manifest_key} from {artifact_store}: {e}")
+        previous_manifest = None
+    artifact_store.put_json(manifest_key, manifest)
+    if not previous_manifest:
+        return
+    previous_build = previous_manifest.get('build')
+    if not previous_build:
+        for artifact in previous_manifest.get('artifacts', []):
+            artifact_store.delete(f'{key_prefix}/{artifact}')
+    elif previous_build != manifest['build']:
+        AppSettings.logger.debug(f"Deleting superseded build {key_prefix}/{previous_build} from {artifact_store}…")
+        artifact_store.delete_prefix(f'{key_prefix}/{previous_build}')
+
+
+def get_artifact_store(location:str=ARTIFACT_STORE):
+    """
+    Returns the artifact store for the s3:// URL or folder path, or None if no location is given.
+    """
+    if not location:
+        return None
+    if location.startswith('s3://'):
+        bucket_name, _, prefix = location[5:].partition('/')
+        return S3ArtifactStore(S3Handler(bucket_name=bucket_name,
+                                         aws_access_key_id=AppSettings.aws_access_key_id,
+                                         aws_secret_access_key=AppSettings.aws_secret_access_key,
+                                         aws_region_name=AppSettings.aws_region_name), prefix)
+    try:
+        return LocalArtifactStore(location)
+    except OSError as e:
+        AppSettings.logger.error(f"Unable to use artifact store in {location}: {e}")
+        return None
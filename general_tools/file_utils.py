@@ -4,7 +4,10 @@ import zipfile
 import shutil
 import yaml
 import tempfile
+import hashlib
 from glob import glob
+from collections import OrderedDict
+from contextlib import contextmanager
 from mimetypes import MimeTypes
 from typing import Dict, List, Any, Optional, Union
 from distutils.version import LooseVersion
@@ -13,6 +16,9 @@ from general_tools.data_utils import json_serial
 from app_settings.app_settings import AppSettings
 
 
+FILE_CONTENTS_CACHE_MAX_MB = int(os.getenv('FILE_CONTENTS_CACHE_MAX_MB', '256')) # Roughly, as it counts characters
+
+
 def unzip(source_file:str, destination_dir:str) -> None:
     """
     Unzips <source_file> into <destination_dir>.
@@ -111,7 +117,17 @@ def read_file(filepath:str, encoding:str='utf-8') -> str:
         remove the optional BOM prefix,
         convert Windows line endings to Linux line endings,
         and remove the text
+
+    While a file contents cache is being used (see use_file_contents_cache()),
+        UTF-8 files are only read from the disk the first time (unless they've changed since).
     """
+    if file_contents_cache and encoding == 'utf-8':
+        return file_contents_cache.read_file(filepath)
+    return _read_file(filepath, encoding)
+# end of read_file function
+
+
+def _read_file(filepath:str, encoding:str='utf-8') -> str:
     with open(filepath, 'r', encoding=encoding) as f:
         content = f.read()
     if content.startswith(chr(65279)): # U+FEFF or \ufeff
@@ -119,7 +135,82 @@ def read_file(filepath:str, encoding:str='utf-8') -> str:
         content = content[1:] # remove (optional) BOM prefix
     content = content.replace('\r\n', '\n') # convert Windows line endings to Linux line endings
     return content
-# end of read_file function
+# end of _read_file function
+
+
+class FileContentsCache:
+    """
+    Texts of the files read by read_file() while a job is being processed,
+        so that the linter checks and the converters only read each file from the disk once.
+
+    Each text is kept along with the file's modification time and size, so that a file that's been
+        written since is read again. Once the texts add up to more than max_chars, the ones read
+        longest ago are dropped. Texts of more than max_file_chars (e.g., a big PDF converter HTML file)
+        aren't kept at all.
+    """
+
+    def __init__(self, max_chars:int=FILE_CONTENTS_CACHE_MAX_MB*1_000_000, max_file_chars:Optional[int]=None) -> None:
+        self.max_chars = max_chars
+        self.max_file_chars = max_chars // 8 if max_file_chars is None else max_file_chars
+        self.texts:OrderedDict = OrderedDict() # Absolute file path -> ((modification time, size), text)
+        self.total_chars = 0
+        self.hit_count = self.miss_count = 0
+
+
+    def read_file(self, filepath:str) -> str:
+        file_stat = os.stat(filepath)
+        file_key = os.path.abspath(filepath)
+        entry = self.texts.get(file_key)
+        if entry and entry[0] == (file_stat.st_mtime_ns, file_stat.st_size):
+            self.hit_count += 1
+            self.texts.move_to_end(file_key)
+            return entry[1]
+        self.miss_count += 1
+        text = _read_file(filepath)
+        self._keep(file_key, (file_stat.st_mtime_ns, file_stat.st_size), text)
+        return text
+
+
+    def add(self, filepath:str, text:str) -> None:
+        """
+        Keeps the text of the file just read by read_file() somewhere else, e.g., in a worker process.
+        """
+        file_stat = os.stat(filepath)
+        self._keep(os.path.abspath(filepath), (file_stat.st_mtime_ns, file_stat.st_size), text)
+
+
+    def _keep(self, file_key:str, file_version:tuple, text:str) -> None:
+        if file_key in self.texts:
+            self.total_chars -= len(self.texts.pop(file_key)[1])
+        if len(text) > self.max_file_chars:
+            return
+        self.texts[file_key] = (file_version, text)
+        self.total_chars += len(text)
+        while self.total_chars > self.max_chars:
+            _file_key, (_file_version, dropped_text) = self.texts.popitem(last=False)
+            self.total_chars -= len(dropped_text)
+
+
+file_contents_cache:Optional[FileContentsCache] = None # Used by read_file() while a job is being processed
+
+
+@contextmanager
+def use_file_contents_cache():
+    """
+    Makes read_file() keep the texts of the files that it reads until the end of the with block
+        (or of the outermost one, if they're nested).
+    """
+    global file_contents_cache
+    if file_contents_cache:
+        yield file_contents_cache
+        return
+    file_contents_cache = FileContentsCache()
+    try:
+        yield file_contents_cache
+    finally:
+        AppSettings.logger.debug(f"File contents cache read {file_contents_cache.miss_count:,} files"
+                                 f" and reused {file_contents_cache.hit_count:,}.")
+        file_contents_cache = None
 
 
 def write_file(filepath:str, file_contents:Union[str,Dict[str,Any]], indent=None) -> None:
@@ -147,6 +238,34 @@ def write_file(filepath:str, file_contents:Union[str,Dict[str,Any]], indent=None
         out_file.write(text_to_write)
 
 
+def get_file_hash(filepath:str) -> Optional[str]:
+    """
+    Returns the SHA-256 hex digest of the file's contents, or None if there's no such file.
+    """
+    sha = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                sha.update(chunk)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    return sha.hexdigest()
+
+
+def get_dir_hash(directory:str, exclude=None) -> Optional[str]:
+    """
+    Returns a SHA-256 hex digest of the relative paths and contents of all the files
+        under <directory> (see get_files() for <exclude>), or None if there's no such folder.
+    """
+    if not os.path.isdir(directory):
+        return None
+    sha = hashlib.sha256()
+    for filepath in sorted(get_files(directory, relative_paths=True, exclude=exclude)):
+        sha.update(filepath.encode('utf-8'))
+        sha.update((get_file_hash(os.path.join(directory, filepath)) or '').encode('ascii')) # e.g., a broken link
+    return sha.hexdigest()
+
+
 def get_mime_type(path:str) -> str:
     mime = MimeTypes()
 
@@ -0,0 +1,70 @@
+"""
+In-memory index of the files and folders of directory trees, so that many paths
+    (e.g., the targets of all the links in a repo's markdown files) can be checked
+    with set lookups rather than a filesystem call for each one.
+
+Folders outside the indexed trees (e.g., of another repo that links point into)
+    are listed the first time that a path in them is looked up, and then remembered.
+The index doesn't see changes made to the files after a folder has been listed.
+"""
+import os
+from typing import Dict, Set, Optional
+
+
+class PathIndex:
+
+    def __init__(self, *root_dirs:str) -> None:
+        self.listings:Dict[str,Set[str]] = {} # Absolute folder path -> names of the (existing) files and folders in it
+        for root_dir in root_dirs:
+            self.add_tree(root_dir)
+
+
+    def add_tree(self, root_dir:str) -> None:
+        """
+        Lists the folder and all its subfolders (without following symbolic links to folders).
+        """
+        folders = [os.path.abspath(root_dir)]
+        while folders:
+            folder = folders.pop()
+            if folder not in self.listings:
+                folders.extend(self.list_folder(folder, find_subfolders=True))
+
+
+    def list_folder(self, folder:str, find_subfolders:bool=False) -> list:
+        """
+        Saves the names in the (absolute) folder path, leaving out broken symbolic links as os.path.exists() would,
+            and returns the paths of the subfolders (if asked for).
+        """
+        names, subfolders = set(), []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_symlink() and not os.path.exists(entry.path):
+                        continue
+                    names.add(entry.name)
+                    if find_subfolders and entry.is_dir(follow_symlinks=False):
+                        subfolders.append(entry.path)
+        except OSError: # Not there or not a folder
+            pass
+        self.listings[folder] = names
+        return subfolders
+
+
+    def get_names(self, folder:str) -> Set[str]:
+        if folder not in self.listings:
+            self.list_folder(folder)
+        return self.listings[folder]
+
+
+    def exists(self, path:str, relative_to:Optional[str]=None) -> bool:
+        """
+        Same as os.path.exists(os.path.abspath(os.path.join(relative_to, path))) for paths that don't change,
+            but only lists each folder once.
+        """
+        if relative_to:
+            path = os.path.join(relative_to, path)
+        path = os.path.abspath(path) # Also normalises away any '..'s
+        folder, name = os.path.split(path)
+        if not name: # The root folder
+            return os.path.exists(path)
+        return name in self.get_names(folder)
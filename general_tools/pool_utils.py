@@ -0,0 +1,39 @@
+"""
+Running a function over many arguments in a pool of forked worker processes.
+
+The workers are forked, so the function can use whatever this process has already set up
+    (e.g., downloaded resources or a linter's settings), and only its arguments and results
+    need to be pickled.
+"""
+import multiprocessing
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+
+ArgsType = TypeVar('ArgsType')
+ResultType = TypeVar('ResultType')
+
+
+def imap_in_workers(func:Callable[[ArgsType],ResultType], args_list:Iterable[ArgsType], num_workers:int,
+                    chunk_size:Optional[int]=None) -> Iterator[ResultType]:
+    """
+    Yields func(args) for each of the args, in order (so that warnings and logs stay in file or book order).
+
+    The calls are made in <num_workers> worker processes (but never more than there are args),
+        or in this process if that's only one.
+    Unless a chunk_size is given, the args are sent to the workers in batches,
+        as many of the calls (e.g., for small markdown files) take less time than sending them one at a time.
+    The pool is closed when all the results have been used (or the iterator is closed).
+    """
+    args_list = list(args_list)
+    num_workers = min(num_workers, len(args_list))
+    if num_workers <= 1:
+        yield from map(func, args_list)
+        return
+    if chunk_size is None:
+        chunk_size = max(1, len(args_list) // (num_workers * 4))
+    pool = multiprocessing.get_context('fork').Pool(num_workers)
+    try:
+        yield from pool.imap(func, args_list, chunksize=chunk_size)
+    finally:
+        pool.close()
+        pool.join()
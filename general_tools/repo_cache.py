@@ -0,0 +1,270 @@
+"""
+Persistent cache of unzipped DCS repos, shared by all the jobs run on a worker.
+
+Entries are keyed by owner/repo/ref and commit SHA so a moved branch is never
+    served stale, and the cache is kept under a size limit by evicting the
+    least recently used entries.
+
+NOTE: Jobs get hard-linked copies of the cached files (see checkout()),
+        so converters must create new files rather than modify downloaded files in place.
+"""
+import os
+import json
+import shutil
+import fcntl
+import tempfile
+from time import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+from general_tools.file_utils import unzip, remove_tree, remove_file
+from general_tools.url_utils import download_file, get_url
+from app_settings.app_settings import AppSettings
+
+
+REPO_CACHE_DIR = os.getenv('REPO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tX_repo_cache'))
+REPO_CACHE_MAX_MB = int(os.getenv('REPO_CACHE_MAX_MB', '4096')) # Set to 0 to disable the cache
+ENTRY_INFO_FILENAME = '.cache_entry.json'
+LOCK_FILENAME = '.lock'
+TEMP_DIRNAME = '.tmp'
+SHA_LENGTH = 10 # Same as Resource.last_commit_sha
+
+
+def get_commit_sha(dcs_domain:str, owner:str, repo_name:str, ref:str) -> Optional[str]:
+    """
+    Ask DCS for the SHA of the commit that <ref> (a branch, tag or SHA) currently points to.
+
+    Returns None if the repo or ref doesn't exist (or DCS can't be reached).
+    """
+    commits_url = f"{dcs_domain}/api/v1/repos/{owner}/{repo_name}/commits?sha={ref}&limit=1&stat=false"
+    response = get_url(commits_url, catch_exception=True)
+    if not response:
+        return None
+    try:
+        commits = json.loads(response)
+    except ValueError:
+        return None
+    if isinstance(commits, list) and commits and commits[0].get('sha'):
+        return commits[0]['sha']
+    return None
+
+
+class RepoCache:
+    """
+    Size-bounded, least-recently-used store of unzipped repo archives.
+
+    Each entry directory holds the unzipped archive contents (normally a single <repo_name>/ folder)
+        plus a small JSON info file with the entry's key, size and last-used time.
+    All changes to the cache are made while holding an exclusive lock on a file in the cache folder,
+        so several worker processes (or threads) can safely share one cache folder.
+    """
+
+    def __init__(self, cache_dir:str=REPO_CACHE_DIR, max_bytes:int=REPO_CACHE_MAX_MB*1024*1024) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.temp_dir = os.path.join(self.cache_dir, TEMP_DIRNAME)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.cache_dir, LOCK_FILENAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+    @staticmethod
+    def _safe_name(name:str) -> str:
+        return name.replace(os.path.sep, '%2F') if name else '_'
+
+
+    def entry_dir(self, owner:str, repo_name:str, ref:str, commit_sha:str) -> str:
+        return os.path.join(self.cache_dir, self._safe_name(owner), self._safe_name(repo_name),
+                            self._safe_name(ref), commit_sha[:SHA_LENGTH])
+
+
+    def _read_info(self, entry_dir:str) -> Optional[Dict[str,Any]]:
+        try:
+            with open(os.path.join(entry_dir, ENTRY_INFO_FILENAME), 'rt') as info_file:
+                return json.load(info_file)
+        except (OSError, ValueError):
+            return None
+
+
+    def _write_info(self, entry_dir:str, info:Dict[str,Any]) -> None:
+        with open(os.path.join(entry_dir, ENTRY_INFO_FILENAME), 'wt') as info_file:
+            json.dump(info, info_file)
+
+
+    def _touch(self, entry_dir:str) -> None:
+        info = self._read_info(entry_dir)
+        if info is not None:
+            info['last_used'] = time()
+            self._write_info(entry_dir, info)
+
+
+    def get(self, owner:str, repo_name:str, ref:str, commit_sha:str) -> Optional[str]:
+        """
+        Returns the entry folder if the repo at that commit is cached, else None.
+
+        The entry is marked as the most recently used.
+        """
+        entry_dir = self.entry_dir(owner, repo_name, ref, commit_sha)
+        with self._lock():
+            if self._read_info(entry_dir) is None:
+                return None
+            self._touch(entry_dir)
+        return entry_dir
+
+
+    def put_zip(self, owner:str, repo_name:str, ref:str, commit_sha:str, zip_filepath:str) -> str:
+        """
+        Unzips the archive into the cache (if it's not already there) and returns the entry folder.
+
+        The (slow) unzipping is done outside the lock into a private temp folder
+            which is then renamed into place.
+        """
+        entry_dir = self.entry_dir(owner, repo_name, ref, commit_sha)
+        unzip_dir = tempfile.mkdtemp(prefix=f'{self._safe_name(repo_name)}_', dir=self.temp_dir)
+        try:
+            unzip(zip_filepath, unzip_dir)
+            info = {'owner': owner, 'repo_name': repo_name, 'ref': ref, 'commit_sha': commit_sha,
+                    'size': self._get_dir_size(unzip_dir), 'last_used': time()}
+            self._write_info(unzip_dir, info)
+            with self._lock():
+                if self._read_info(entry_dir) is None: # Another process didn't beat us to it
+                    remove_tree(entry_dir)
+                    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+                    os.rename(unzip_dir, entry_dir)
+                    AppSettings.logger.info(f"Added {owner}/{repo_name} {ref} ({commit_sha[:SHA_LENGTH]}) to repo cache ({info['size']:,} bytes).")
+                else:
+                    self._touch(entry_dir)
+                self._evict(keep=entry_dir)
+        finally:
+            remove_tree(unzip_dir)
+        return entry_dir
+
+
+    def fetch(self, owner:str, repo_name:str, ref:str, commit_sha:str, zipball_url:str) -> Optional[str]:
+        """
+        Returns the entry folder for the repo at that commit, downloading the zipball if it's not cached.
+
+        Returns None if the download fails.
+        """
+        entry_dir = self.get(owner, repo_name, ref, commit_sha)
+        if entry_dir:
+            AppSettings.logger.info(f"Using cached {owner}/{repo_name} {ref} ({commit_sha[:SHA_LENGTH]}).")
+            return entry_dir
+        fd, zip_filepath = tempfile.mkstemp(prefix=f'{self._safe_name(repo_name)}_', suffix='.zip', dir=self.temp_dir)
+        os.close(fd)
+        try:
+            AppSettings.logger.info(f"Downloading {zipball_url} into repo cache…")
+            download_file(zipball_url, zip_filepath)
+            return self.put_zip(owner, repo_name, ref, commit_sha, zip_filepath)
+        except Exception as e:
+            AppSettings.logger.error(f"Unable to add {zipball_url} to repo cache: {e}")
+            return None
+        finally:
+            remove_file(zip_filepath)
+
+
+    def checkout(self, owner:str, repo_name:str, ref:str, commit_sha:str, zipball_url:str, destination_dir:str) -> bool:
+        """
+        Makes the unzipped repo (at that commit) appear in <destination_dir>
+            just as if the zipball had been unzipped there.
+
+        Files are hard-linked (or copied if that's not possible) while holding the lock,
+            so the entry can't be evicted part way through.
+
+        Returns True on success.
+        """
+        entry_dir = self.fetch(owner, repo_name, ref, commit_sha, zipball_url)
+        if not entry_dir:
+            return False
+        with self._lock():
+            if self._read_info(entry_dir) is None: # Was evicted in the meantime
+                return False
+            for name in os.listdir(entry_dir):
+                if name == ENTRY_INFO_FILENAME:
+                    continue
+                source_path = os.path.join(entry_dir, name)
+                destination_path = os.path.join(destination_dir, name)
+                remove_tree(destination_path)
+                if os.path.isdir(source_path):
+                    shutil.copytree(source_path, destination_path, symlinks=True, copy_function=self._link_or_copy)
+                else:
+                    self._link_or_copy(source_path, destination_path)
+        return True
+
+
+    @staticmethod
+    def _link_or_copy(source_path:str, destination_path:str) -> None:
+        try:
+            os.link(source_path, destination_path)
+        except OSError: # e.g., different filesystems
+            shutil.copy2(source_path, destination_path)
+
+
+    @staticmethod
+    def _get_dir_size(dir_path:str) -> int:
+        size = 0
+        for root, _dirs, files in os.walk(dir_path):
+            for f in files:
+                file_path = os.path.join(root, f)
+                if not os.path.islink(file_path):
+                    size += os.path.getsize(file_path)
+        return size
+
+
+    def get_entries(self) -> List[Dict[str,Any]]:
+        """
+        Returns the info dicts (with an added 'entry_dir' field) of all cached entries.
+        """
+        entries = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            if root == self.cache_dir and TEMP_DIRNAME in dirs:
+                dirs.remove(TEMP_DIRNAME)
+            if ENTRY_INFO_FILENAME in files:
+                dirs.clear() # Don't walk down into the unzipped repo
+                info = self._read_info(root)
+                if info is not None:
+                    info['entry_dir'] = root
+                    entries.append(info)
+        return entries
+
+
+    def _evict(self, keep:Optional[str]=None) -> None:
+        """
+        Removes least recently used entries until the cache fits within max_bytes.
+
+        Must be called while holding the lock.
+        """
+        entries = sorted(self.get_entries(), key=lambda entry: entry['last_used'])
+        total_size = sum(entry['size'] for entry in entries)
+        for entry in entries:
+            if total_size <= self.max_bytes:
+                break
+            if entry['entry_dir'] == keep:
+                continue
+            AppSettings.logger.info(f"Evicting {entry['owner']}/{entry['repo_name']} {entry['ref']} from repo cache.")
+            # Remove the info file first so a half-deleted entry is never seen as valid
+            remove_file(os.path.join(entry['entry_dir'], ENTRY_INFO_FILENAME))
+            remove_tree(entry['entry_dir'])
+            total_size -= entry['size']
+
+
+_repo_cache:Optional[RepoCache] = None
+def get_repo_cache() -> Optional[RepoCache]:
+    """
+    Returns the worker-wide repo cache, or None if it's disabled.
+    """
+    global _repo_cache
+    if _repo_cache is None and REPO_CACHE_MAX_MB > 0:
+        try:
+            _repo_cache = RepoCache()
+        except OSError as e:
+            AppSettings.logger.error(f"Unable to create repo cache in {REPO_CACHE_DIR}: {e}")
+    return _repo_cache
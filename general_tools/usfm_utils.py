@@ -3,12 +3,143 @@
 import re
 
 
+# Alignment markup removed by unalign_usfm(), as one alternation so that it takes one pass,
+#   with a word and the alignment milestones around it matched together as they usually come.
+# Each alternative only matches markup with no other backslash markers inside it
+#   (see _unalign_chunk() for what happens with anything else)
+ALIGNMENT_MARKUP_RE = re.compile(r'''\\(?:
+    (?:zaln-s[^*\\]*\\?\*\\)*w\ ([^|\\]+)\|[^\\\n]*\\w\*(?:\\zaln-e\\\*)*
+  | zaln-s[^*\\]*\\?\*
+  | zaln-e\\\*
+  | ts(?:-s)*\s*\\\*\s*
+  | k-s[^\\\n]*\\\*
+  | k-e\\\*
+)''', flags=re.UNICODE | re.VERBOSE)
+# If any of these are left after removing the alignment markup, the markup wasn't all well-formed
+LEFTOVER_MARKUP = ('\\zaln-', '\\k-s', '\\k-e', '\\w ')
+
+CHAPTER_START_RE = re.compile(r'\n(?=\\c )')
+BLANK_LINES_RE = re.compile(r'\n\n+')
+JOINED_LINES_RE = re.compile(r'\n+(?=[^\\])')
+MULTIPLE_SPACES_RE = re.compile(r'  +')
+APOSTROPHE_S_RE = re.compile(r"\s*' s(?!\w)")
+S5_RE = re.compile(r'\\s5')
+UNCLOSED_FQA_RE = re.compile(r'\\fqa([^*]+)\\fqa(?![*])')
+CHAPTER_SPLIT_RE = re.compile(r'\\c ')
+QUOTE_PAIR_RE = re.compile(r'\s*"\s*([^"]+)\s*"\s*', flags=re.UNICODE | re.MULTILINE | re.DOTALL)
+QUOTE_PAIR_REPLACEMENT = r' "\1" '
+MARKER_PUNCTUATION_RE = re.compile(r'\\(\w+\**)([^\w* \n])')
+SPACE_BEFORE_PUNCTUATION_RE = re.compile(r' +([:;.?,!\]})-])')
+SPACE_AFTER_BRACKET_RE = re.compile(r'([{(\[-]) +')
+
+
 def unalign_usfm(aligned_usfm):
     """
     Converts an aligned USFM string to an unaligned USFM compatible string
     :param aligned_usfm:
     :return: the unaligned USFM of the string
     """
+    return ''.join(iter_unaligned_usfm(aligned_usfm))
+
+
+def iter_unaligned_usfm(aligned_usfm):
+    """
+    Yields the unaligned USFM of an aligned USFM string a chapter at a time,
+        which join up to exactly what the regex passes of _unalign_usfm_by_regex() give (stripped).
+
+    The alignment markup is removed in one pass over each chapter (the bulk of an aligned book),
+        then the clean-up passes run over the much smaller unaligned chapter.
+    A chapter whose clean-up could depend on the next chapter is held back and done along with it.
+    If any alignment markup isn't well-formed, the rest of the book is done by _unalign_usfm_by_regex().
+    :param aligned_usfm:
+    :return: generator of unaligned USFM strings
+    """
+    held_space = ''
+    started = False
+    for usfm in _iter_unaligned_chunks(aligned_usfm):
+        # Strip the book as a whole (as str.strip() does), holding back trailing space until more text comes
+        if not started:
+            usfm = usfm.lstrip()
+            if not usfm:
+                continue
+            started = True
+        text = usfm.rstrip()
+        if text:
+            yield held_space + text
+            held_space = usfm[len(text):]
+        else:
+            held_space += usfm
+
+
+def _iter_unaligned_chunks(aligned_usfm):
+    # The chunks end at the end of each line before a chapter marker
+    chunk_ends = [match.end() for match in CHAPTER_START_RE.finditer(aligned_usfm)] + [len(aligned_usfm)]
+    start = 0 # Start of what hasn't been yielded yet
+    held_usfm, held_end = None, 0 # Unaligned USFM up to held_end, if it could be yielded before the next chunk
+    for end in chunk_ends:
+        usfm = None
+        if held_usfm is not None:
+            usfm, is_safe_start, is_safe_end = _unalign_chunk(aligned_usfm[held_end:end])
+            if usfm is not None and is_safe_start:
+                yield held_usfm
+                start = held_end
+            else:
+                usfm = None
+        if usfm is None:
+            usfm, _is_safe_start, is_safe_end = _unalign_chunk(aligned_usfm[start:end])
+        if usfm is None:
+            yield _unalign_usfm_by_regex(aligned_usfm[start:])
+            return
+        held_usfm = usfm if is_safe_end else None
+        held_end = end
+    yield usfm
+
+
+def _unalign_chunk(aligned_usfm):
+    """
+    Returns the unaligned USFM of one or more whole chapters (or the book headers and first chapters),
+        and whether it could be joined on after the previous chapter and before the next chapter as is,
+        or None if there is alignment markup the single pass can't be sure about.
+    """
+    # Remove all tags used for alignments and words (keeping the words, which split() gives with the text between)
+    usfm = ''.join(filter(None, ALIGNMENT_MARKUP_RE.split(aligned_usfm)))
+    for markup in LEFTOVER_MARKUP:
+        if markup in usfm:
+            return None, False, False
+    # A chapter that lost its last newline with a \ts\* can have the next chapter marker join its last line
+    is_safe_end = usfm.endswith('\n')
+    usfm = usfm.lstrip('\n')
+    usfm = BLANK_LINES_RE.sub('\n', usfm)
+    usfm = JOINED_LINES_RE.sub(' ', usfm)
+    usfm = MULTIPLE_SPACES_RE.sub(' ', usfm)
+
+    # Clean up bad USFM data and fixing punctuation
+    usfm = APOSTROPHE_S_RE.sub("'s", usfm)
+    usfm = S5_RE.sub('', usfm)
+    # An unclosed \fqa could pair up with one in the next chapter
+    if usfm.rfind('\\fqa') > usfm.rfind('*'):
+        is_safe_end = False
+    usfm = UNCLOSED_FQA_RE.sub(r'\\fqa\1\\fqa*', usfm)
+    # The "\c " that starts the chapter can lose its space, e.g., to "\c' s" => "\c's"
+    is_safe_start = usfm.startswith('\\c ')
+
+    # Pair up quotes by chapter
+    chapters = CHAPTER_SPLIT_RE.split(usfm)
+    usfm = '\\c '.join([chapters[0]] + [QUOTE_PAIR_RE.sub(QUOTE_PAIR_REPLACEMENT, chapter) for chapter in chapters[1:]])
+    usfm = MARKER_PUNCTUATION_RE.sub(r'\\\1 \2', usfm)  # \\q1" => \q1 "
+    usfm = usfm.replace(" ' ", " '")
+    usfm = SPACE_BEFORE_PUNCTUATION_RE.sub(r'\1', usfm)
+    usfm = SPACE_AFTER_BRACKET_RE.sub(r'\1', usfm)
+    return usfm, is_safe_start, is_safe_end
+
+
+def _unalign_usfm_by_regex(aligned_usfm):
+    """
+    Converts an aligned USFM string to an unaligned USFM compatible string, one regex pass after another,
+        leaving the leading and trailing white space
+    :param aligned_usfm:
+    :return: the unaligned USFM of the string
+    """
     # Remove all tags used for alignments and words
     usfm = re.sub(r'\\ts(-s)*\s*\\\*\s*', r'', aligned_usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\zaln-s[^*]*?\*', r'', usfm, flags=re.UNICODE | re.MULTILINE)
@@ -25,7 +156,7 @@ def unalign_usfm(aligned_usfm):
     usfm = re.sub(r"\s*' s(?!\w)", "'s", usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\s5', '', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'\\fqa([^*]+)\\fqa(?![*])', r'\\fqa\1\\fqa*', usfm, flags=re.UNICODE | re.MULTILINE)
-    
+
     # Pair up quotes by chapter
     chapters = re.compile(r'\\c ').split(usfm)
     usfm = chapters[0]
@@ -37,4 +168,4 @@ def unalign_usfm(aligned_usfm):
     usfm = re.sub(r' +([:;.?,!\]})-])', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
     usfm = re.sub(r'([{(\[-]) +', r'\1', usfm, flags=re.UNICODE | re.MULTILINE)
 
-    return usfm.strip()
+    return usfm
@@ -0,0 +1,154 @@
+"""
+Parses aligned USFM (with \\zaln-s/\\zaln-e alignment milestones and \\w words) straight into
+    the verse objects structure that usfm-js (as run by converters/pdf/resources/processBibles.js)
+    writes out into chapter JSON files, i.e.,
+
+    {chapter: {verse: {'verseObjects': [
+        {'tag': 'zaln', 'type': 'milestone', 'strong': 'G39720', 'lemma': 'Παῦλος', 'morph': 'Gr,N,,,,,NMS,',
+         'occurrence': 1, 'occurrences': 1, 'content': 'Παῦλος', 'children': [
+            {'text': 'Paul', 'tag': 'w', 'type': 'word', 'occurrence': 1, 'occurrences': 1}
+        ], 'endTag': 'zaln-e\\\\*'},
+        {'type': 'text', 'text': ', '},
+        …
+    ]}}}
+
+Only what the PDF converters use is kept: milestones, words, text, footnotes
+    and paragraph/section/quote markers. Character styles (e.g., \\add…\\add*),
+    \\k-s/\\k-e milestones and \\ts\\* chunk markers are dropped, but their contents are kept.
+Content before the first verse of a chapter is kept under the 'front' verse,
+    and the verse objects of a verse bridge (e.g., \\v 1-2) are also found under each of its verses.
+"""
+import re
+from typing import Dict, List, Any
+
+
+CHARACTER_MARKERS = {'add', 'bd', 'bdit', 'bk', 'dc', 'em', 'fig', 'it', 'k', 'nd', 'no', 'ord', 'pn', 'png', 'qac',
+                     'qs', 'qt', 'rb', 'sc', 'sig', 'sls', 'sup', 'tl', 'wj', 'ca', 'va', 'vp', 'rq', 'ts'}
+INT_ATTRIBUTES = {'occurrence', 'occurrences'}
+
+TOKEN_REGEX = re.compile(r'''
+    \\zaln-s\s*\|(?P<milestone_attributes>.*?)\\\*
+  | (?P<milestone_end>\\zaln-e\\\*)
+  | \\w\s+(?P<word>[^|\\]*?)(?:\|(?P<word_attributes>[^\\]*?))?\\w\*
+  | \\(?P<note>[fx])\s+(?P<note_content>.*?)\\(?P=note)\*
+  | \\k-[se]\b[^\\]*?\\\*
+  | \\c\s+(?P<chapter>\d+)\s?
+  | \\v\s+(?P<verse>\d+(?:-\d+)?)\s?
+  | \\\+?(?P<marker>[a-z]+\d*(?:-[se])?)(?P<marker_end>\*)?\s?
+''', re.VERBOSE | re.DOTALL)
+ATTRIBUTE_REGEX = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+def get_attributes(attributes_string:str) -> Dict[str,Any]:
+    attributes = {}
+    for name, value in ATTRIBUTE_REGEX.findall(attributes_string):
+        if name.startswith('x-'):
+            name = name[2:]
+        if name in INT_ATTRIBUTES:
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+        attributes[name] = value
+    return attributes
+
+
+def get_marker_type(tag:str) -> str:
+    if re.match(r'^q(\d*|r|c|m\d*)$', tag):
+        return 'quote'
+    if re.match(r'^(s\d*|ms\d*|mr|sr|r|d)$', tag):
+        return 'section'
+    return 'paragraph'
+
+
+class VerseObjectsBuilder:
+    """
+    Collects the verse objects of a book as the USFM tokens are fed in.
+    """
+
+    def __init__(self) -> None:
+        self.book:Dict[str,Dict[str,Dict[str,List[Dict[str,Any]]]]] = {}
+        self.chapter = None
+        self.verse_objects:List[Dict[str,Any]] = []
+        self.open_milestones:List[Dict[str,Any]] = []
+
+    @property
+    def container(self) -> List[Dict[str,Any]]:
+        return self.open_milestones[-1]['children'] if self.open_milestones else self.verse_objects
+
+    def start_chapter(self, chapter:str) -> None:
+        self.chapter = chapter
+        self.book.setdefault(chapter, {})
+        self.start_verse('front')
+
+    def start_verse(self, verse:str) -> None:
+        self.open_milestones = []
+        self.verse_objects = []
+        if self.chapter is None:
+            return # Skip the book headers
+        self.book[self.chapter][verse] = {'verseObjects': self.verse_objects}
+        if '-' in verse:
+            first_verse, last_verse = verse.split('-', 1)
+            for bridged_verse in range(int(first_verse), int(last_verse) + 1):
+                self.book[self.chapter].setdefault(str(bridged_verse), {'verseObjects': self.verse_objects})
+
+    def add_text(self, text:str) -> None:
+        if not text:
+            return
+        container = self.container
+        if container and container[-1]['type'] == 'text':
+            container[-1]['text'] += text
+        else:
+            container.append({'type': 'text', 'text': text})
+
+    def add(self, verse_object:Dict[str,Any]) -> None:
+        self.container.append(verse_object)
+
+    def start_milestone(self, attributes:Dict[str,Any]) -> None:
+        milestone = {'tag': 'zaln', 'type': 'milestone', **attributes, 'children': []}
+        self.add(milestone)
+        self.open_milestones.append(milestone)
+
+    def end_milestone(self) -> None:
+        if self.open_milestones:
+            self.open_milestones.pop()['endTag'] = 'zaln-e\\*'
+
+    def finish(self) -> Dict[str,Dict[str,Dict[str,List[Dict[str,Any]]]]]:
+        # Drop any empty 'front' sections
+        for chapter_data in self.book.values():
+            if 'front' in chapter_data and not chapter_data['front']['verseObjects']:
+                del chapter_data['front']
+        return self.book
+
+
+def usfm_to_verse_objects(usfm:str) -> Dict[str,Dict[str,Dict[str,List[Dict[str,Any]]]]]:
+    """
+    Returns the {chapter: {verse: {'verseObjects': [...]}}} of the book's (aligned) USFM.
+    """
+    builder = VerseObjectsBuilder()
+    position = 0
+    for match in TOKEN_REGEX.finditer(usfm):
+        builder.add_text(usfm[position:match.start()])
+        position = match.end()
+        if match.group('milestone_attributes') is not None:
+            builder.start_milestone(get_attributes(match.group('milestone_attributes')))
+        elif match.group('milestone_end'):
+            builder.end_milestone()
+        elif match.group('word') is not None:
+            word = {'text': match.group('word'), 'tag': 'w', 'type': 'word'}
+            if match.group('word_attributes'):
+                word.update(get_attributes(match.group('word_attributes')))
+            builder.add(word)
+        elif match.group('note'):
+            builder.add({'tag': match.group('note'), 'type': 'footnote', 'content': match.group('note_content')})
+        elif match.group('chapter'):
+            builder.start_chapter(match.group('chapter'))
+        elif match.group('verse'):
+            builder.start_verse(match.group('verse'))
+        elif match.group('marker'):
+            tag = match.group('marker')
+            if match.group('marker_end') or tag in CHARACTER_MARKERS:
+                continue
+            builder.add({'tag': tag, 'type': get_marker_type(tag)})
+    builder.add_text(usfm[position:])
+    return builder.finish()
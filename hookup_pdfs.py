@@ -290,7 +290,7 @@ def upload_and_update(entry):
         cdn_links.append(cdn_link)
         if not os.path.exists(done) and not os.path.exists(done2):
             AppSettings.logger.info(f"Uploading {pdf} to {cdn_link}")
-            AppSettings.cdn_s3_handler().upload_file(pdf, key, cache_time=0)
+            AppSettings.cdn_s3_handler().upload_file_in_parts(pdf, key, cache_time=0)
             shutil.copyfile(pdf, done)
         else:
             AppSettings.logger.info(f"Already uploaded {pdf}")
@@ -0,0 +1,113 @@
+"""
+Cache of lint results kept from one job to the next,
+    so that only the files that have changed since a repo was last linted need to be checked again.
+
+Each result is keyed by a hash of everything it was worked out from (e.g., the file's name and contents,
+    and the linter settings), and the results for each linter and repo are kept together as one JSON object
+    in an artifact store (see general_tools.artifact_store) chosen by the LINT_CACHE environment variable, e.g.,
+        LINT_CACHE=/mnt/tX_lint_cache
+        LINT_CACHE=s3://tx-artifacts/lint
+
+The hashes also cover the source code of the linters,
+    so results from before any change to the lint checks are never replayed.
+Only the results that were used in the latest run are saved, so results for old versions of files
+    (and of the linters) drop out.
+"""
+import os
+import json
+import hashlib
+import functools
+import traceback
+from glob import glob
+from typing import Dict, Any, Optional
+
+from general_tools.artifact_store import get_artifact_store
+from app_settings.app_settings import AppSettings
+
+
+LINT_CACHE = os.getenv('LINT_CACHE', '') # Lint results aren't cached if this isn't set
+LINT_CODE_PACKAGES = ['linters', 'tx_usfm_tools'] # The USFM checks are in tx_usfm_tools
+
+
+class LintCache:
+
+    def __init__(self, artifact_store, name:str) -> None:
+        """
+        :param name: Identifies the results, e.g., 'TnLinter/unfoldingWord/en_tn'
+        """
+        self.artifact_store = artifact_store
+        self.key = f'{name}.json'
+        self.results:Optional[Dict[str,Any]] = None # Loaded when first needed
+        self.used_results:Dict[str,Any] = {}
+        self.hit_count = self.miss_count = 0
+
+
+    def __repr__(self) -> str:
+        return f"LintCache({self.artifact_store}/{self.key})"
+
+
+    @staticmethod
+    def get_hash(*values) -> str:
+        return hashlib.sha256(json.dumps([get_lint_code_hash(), values], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+    def get(self, key_hash:str) -> Any:
+        """
+        Returns the saved result, or None if there isn't one.
+        """
+        if self.results is None:
+            try:
+                self.results = self.artifact_store.get_json(self.key) or {}
+            except Exception as e:
+                AppSettings.logger.warning(f"Unable to load lint results from {self}: {e}")
+                self.results = {}
+            AppSettings.logger.debug(f"Loaded {len(self.results):,} lint results from {self}.")
+        result = self.results.get(key_hash)
+        if result is None:
+            self.miss_count += 1
+        else:
+            self.hit_count += 1
+            self.used_results[key_hash] = result
+        return result
+
+
+    def put(self, key_hash:str, result:Any) -> None:
+        self.used_results[key_hash] = result
+
+
+    def save(self) -> None:
+        """
+        Saves the results used (or worked out) in this run, unless they're the same as before.
+        """
+        if self.used_results == self.results:
+            return
+        AppSettings.logger.info(f"Replayed {self.hit_count:,} and saved {self.miss_count:,} new lint results in {self}.")
+        try:
+            self.artifact_store.put_json(self.key, self.used_results)
+        except Exception as e:
+            AppSettings.logger.warning(f"Unable to save lint results in {self}: {e}")
+            AppSettings.logger.debug(traceback.format_exc())
+        self.results = dict(self.used_results)
+
+
+@functools.lru_cache(maxsize=None)
+def get_lint_code_hash() -> str:
+    """
+    Returns a hash of the Python source of the linters (worked out once per process).
+    """
+    root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    sha = hashlib.sha256()
+    for package in LINT_CODE_PACKAGES:
+        for filepath in sorted(glob(os.path.join(root_dir, package, '**', '*.py'), recursive=True)):
+            sha.update(os.path.relpath(filepath, root_dir).encode('utf-8'))
+            with open(filepath, 'rb') as source_file:
+                sha.update(hashlib.sha256(source_file.read()).digest())
+    return sha.hexdigest()
+
+
+def get_lint_cache(name:str, location:str=LINT_CACHE) -> Optional[LintCache]:
+    """
+    Returns the lint cache in the s3:// URL or folder path, or None if no location is given.
+    """
+    artifact_store = get_artifact_store(location)
+    return LintCache(artifact_store, name) if artifact_store else None
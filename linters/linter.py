@@ -1,4 +1,4 @@
-from typing import Any, Optional, Union
+from typing import Any, Optional, Union, Callable, Dict, List, Tuple
 import json
 import os
 import tempfile
@@ -10,26 +10,161 @@ import re
 from app_settings.app_settings import AppSettings
 from rq_settings import prefix, debug_mode_flag
 from general_tools.url_utils import download_file
-from general_tools.file_utils import unzip, remove_tree
+from general_tools.file_utils import unzip, remove_tree, use_file_contents_cache
 from linters.lint_logger import LintLogger
+from linters.lint_cache import get_lint_cache
 from resource_container.ResourceContainer import RC
 
 
 
+PUNCTUATION_PAIRS = (('(',')'), ('[',']'), ('{','}'), ('**_','_**'))
+BRACKETS_RE = re.compile(r'[()\[\]{}]')
+OPENING_BRACKETS = {')':'(', ']':'[', '}':'{'}
+POSSIBLE_POINT_RE = re.compile(r'\s\d\) ')
+MAX_PAIR_REMOVAL_PASSES = 8
+
+
+def get_line_positions(some_text:str, indexes:List[int]) -> Dict[int,Tuple[int,int]]:
+    """
+    Returns the (line number, column) of each index into the text, both starting at 1,
+        counting the newlines in one pass up to the last index.
+    """
+    positions = {}
+    line_number, counted_to = 1, 0
+    for ix in sorted(indexes):
+        line_number += some_text.count('\n', counted_to, ix)
+        counted_to = ix
+        positions[ix] = (line_number, ix - some_text.rfind('\n', 0, ix))
+    return positions
+
+
+def scan_punctuation_pairs(some_text:str) -> Tuple[Dict[str,int], List[Tuple[str,int,int,str]], List[Tuple[str,int,int]]]:
+    """
+    Pairs up all the kinds of bracket in the text, using a compiled regex to pick out the brackets
+        so that the rest of the text isn't walked through in Python.
+    If a quick check shows that they're all nested properly, that's all that's needed;
+        otherwise they're paired up in one pass with a stack.
+
+    Returns:
+        the number of each bracket character,
+        the closing brackets that don't close the latest open one,
+            as (bracket, line number, column, the latest open bracket or ''),
+            but leaving out a ')' between a digit and a space or tab (as in a list like 1) … 2) …),
+        and the brackets still open at the end, as (bracket, line number, column).
+    """
+    all_brackets = ''.join(BRACKETS_RE.findall(some_text))
+    counts = {bracket: all_brackets.count(bracket) for bracket in '()[]{}'}
+
+    # Most texts are nested properly, which is quickly found by taking out the innermost pairs
+    #   a few times over (but not too many, as it's quadratic for deep nesting)
+    brackets = all_brackets
+    for _n in range(MAX_PAIR_REMOVAL_PASSES):
+        unmatched_brackets = brackets.replace('()', '').replace('[]', '').replace('{}', '')
+        if unmatched_brackets == brackets:
+            break
+        brackets = unmatched_brackets
+    if not brackets:
+        return counts, [], []
+
+    # Otherwise pair them up with a stack, numbering the brackets rather than finding where they all are
+    open_numbers:List[int] = []
+    unexpected_closings:List[Tuple[int,str]] = []
+    for n, bracket in enumerate(all_brackets):
+        if bracket in '([{':
+            open_numbers.append(n)
+        elif open_numbers and all_brackets[open_numbers[-1]] == OPENING_BRACKETS[bracket]:
+            open_numbers.pop() # Close off successful match
+        else:
+            unexpected_closings.append((n, all_brackets[open_numbers[-1]] if open_numbers else ''))
+
+    # Then find just the brackets that didn't pair up
+    wanted_numbers = {n for n, _open_bracket in unexpected_closings} | set(open_numbers)
+    indexes:Dict[int,int] = {}
+    if wanted_numbers:
+        last_wanted_number = max(wanted_numbers)
+        for n, bracket_match in enumerate(BRACKETS_RE.finditer(some_text)):
+            if n in wanted_numbers:
+                indexes[n] = bracket_match.start()
+            if n == last_wanted_number:
+                break
+    # A ')' between a digit and a space could be part of a list like 1) ... 2) ...
+    last_index = len(some_text) - 1
+    unexpected_closings = [(n, open_bracket) for n, open_bracket in unexpected_closings
+                            if not (all_brackets[n] == ')' and 0 < indexes[n] < last_index
+                                    and some_text[indexes[n]-1].isdigit() and some_text[indexes[n]+1] in ' \t')]
+
+    positions = get_line_positions(some_text, list(indexes.values()))
+    return counts, \
+            [(all_brackets[n], *positions[indexes[n]], open_bracket) for n, open_bracket in unexpected_closings], \
+            [(all_brackets[n], *positions[indexes[n]]) for n in open_numbers]
+# end of scan_punctuation_pairs function
+
+
+def find_punctuation_pair_warnings(some_text:str, ref:str, allow_close_parenthesis_points=False) -> List[str]:
+    """
+    Returns the warnings about mismatched numbers of pairs, bad bracket nesting, and odd numbers of
+        markdown bold/italic markers (see Linter.check_punctuation_pairs()).
+
+    Only the brackets (picked out by scan_punctuation_pairs()) are looked at one by one,
+        and only if they're not all nested properly. Everything else is counted by str.count().
+    """
+    warnings = []
+    counts, unexpected_closings, unclosed_brackets = scan_punctuation_pairs(some_text)
+    for pairStart,pairEnd in PUNCTUATION_PAIRS:
+        if pairStart in counts:
+            pairStartCount, pairEndCount = counts[pairStart], counts[pairEnd]
+        else:
+            pairStartCount, pairEndCount = some_text.count(pairStart), some_text.count(pairEnd)
+        if pairStartCount > pairEndCount:
+            warnings.append(f"{ref}: Possible missing closing '{pairEnd}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
+        elif pairEndCount > pairStartCount:
+            if allow_close_parenthesis_points:
+                pairEndCount -= len(POSSIBLE_POINT_RE.findall(some_text))
+            if pairEndCount > pairStartCount: # still
+                warnings.append(f"{ref}: Possible missing opening '{pairStart}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
+
+    if unexpected_closings:
+        lines = some_text.split('\n')
+        for bracket, line_number, _column, open_bracket in unexpected_closings:
+            locateString = f" after recent '{open_bracket}'" if open_bracket else ''
+            warnings.append(f"{ref} line {line_number:,}: Possible nesting error—found unexpected '{bracket}'{locateString} near {lines[line_number-1]}")
+    if unclosed_brackets:
+        reformatted_nesting_string = "'" + "', '".join(bracket for bracket, _line_number, _column in unclosed_brackets) + "'"
+        warnings.append(f"{ref}: Seem to have the following unclosed field(s): {reformatted_nesting_string}")
+    # NOTE: Notifying all those is probably overkill,
+    #  but never mind (it might help detect multiple errors)
+
+    # These are markdown specific checks, but hopefully shouldn't hurt to be done for all strings
+    # They don't seem to be picked up by the markdown linter libraries for some reason.
+    for field in ('___', '***', '__', '**'): # Put longest ones first
+        count = some_text.count(field) # Counts NON-OVERLAPPING occurrences
+        if count % 2:
+            content_snippet = some_text if len(some_text) < 85 \
+                                else f"{some_text[:40]} …… {some_text[-40:]}"
+            warnings.append(f"{ref}: Seem to have have mismatched '{field}' pairs in '{content_snippet}'")
+            break # Only want one warning per text
+    return warnings
+# end of find_punctuation_pair_warnings function
+
+
+
 class Linter(metaclass=ABCMeta):
     """
     """
     EXCLUDED_FILES = ['license.md', 'package.json', 'project.json', 'readme.md']
 
-    def __init__(self, repo_subject:str, source_dir:str) -> None:
+    def __init__(self, repo_subject:str, source_dir:str, cache_name:Optional[str]=None) -> None:
         """
         :param string source_dir: If set, will just use this directory
+        :param string cache_name: If set (e.g., to 'owner/repo_name'), results for unchanged files are reused
+                                    from (and saved in) the lint cache (if there is one)
         """
-        AppSettings.logger.debug(f"Linter.__init__(subj={repo_subject}, dir={source_dir})")
+        AppSettings.logger.debug(f"Linter.__init__(subj={repo_subject}, dir={source_dir}, cache={cache_name})")
         self.repo_subject = repo_subject
         self.source_dir = source_dir
 
         self.log = LintLogger()
+        self.lint_cache = get_lint_cache(f'{self.__class__.__name__}/{cache_name}') if cache_name else None
 
         self.temp_dir = tempfile.mkdtemp(prefix=f'tX_{repo_subject}_linter_' \
                                 + datetime.utcnow().strftime('%Y-%m-%d_%H:%M:%S_'))
@@ -88,7 +223,10 @@ class Linter(metaclass=ABCMeta):
             self.rc = RC(directory=self.source_dir)
             #AppSettings.logger.debug(f"Got RC = {self.rc}")
             AppSettings.logger.debug(f"Linting '{self.source_dir}' files…")
-            success = self.lint()
+            with use_file_contents_cache(): # So that the checks only read each file once
+                success = self.lint()
+            if success and self.lint_cache:
+                self.lint_cache.save()
             # AppSettings.logger.debug("Linting finished.")
         except Exception as e:
             message = f"Linting process ended abnormally: {e}"
@@ -114,6 +252,28 @@ class Linter(metaclass=ABCMeta):
     # end of Linter.run()
 
 
+    def lint_cached(self, lint_function:Callable[[],Any], *cache_inputs) -> None:
+        """
+        Calls lint_function() (which logs its warnings with self.log.warning()),
+            unless it was last called with the same cache inputs (which must be all that its warnings depend on),
+            in which case the warnings that it logged then are replayed.
+
+        Warnings are the only thing that are replayed, so lint_function() mustn't change anything else.
+        """
+        if not self.lint_cache:
+            lint_function()
+            return
+        key_hash = self.lint_cache.get_hash(*cache_inputs)
+        warnings = self.lint_cache.get(key_hash)
+        if warnings is None:
+            first_warning_index = len(self.log.warnings)
+            lint_function()
+            self.lint_cache.put(key_hash, self.log.warnings[first_warning_index:])
+        else:
+            self.log.warnings.extend(warnings)
+    # end of Linter.lint_cached()
+
+
     def check_punctuation_pairs(self, some_text:str, ref:str, allow_close_parenthesis_points=False) -> None:
         """
         Check matching number of pairs.
@@ -121,79 +281,7 @@ class Linter(metaclass=ABCMeta):
         If closing parenthesis is used for points, e.g., 1) This point.
             then set the optional flag.
         """
-        punctuation_pairs_to_check = (('(',')'), ('[',']'), ('{','}'), ('**_','_**'))
-
-        found_any_paired_chars = False
-        # found_mismatch = False
-        for pairStart,pairEnd in punctuation_pairs_to_check:
-            pairStartCount = some_text.count(pairStart)
-            pairEndCount   = some_text.count(pairEnd)
-            if pairStartCount or pairEndCount:
-                found_any_paired_chars = True
-            if pairStartCount > pairEndCount:
-                self.log.warning(f"{ref}: Possible missing closing '{pairEnd}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
-                # found_mismatch = True
-            elif pairEndCount > pairStartCount:
-                if allow_close_parenthesis_points:
-                    # possible_points_list = re.findall(r'\s\d\) ', some_text)
-                    # if possible_points_list: print("possible_points_list", possible_points_list)
-                    possible_point_count = len(re.findall(r'\s\d\) ', some_text))
-                    pairEndCount -= possible_point_count
-                if pairEndCount > pairStartCount: # still
-                    self.log.warning(f"{ref}: Possible missing opening '{pairStart}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
-                # found_mismatch = True
-        if found_any_paired_chars: # and not found_mismatch:
-            # Double-check the nesting
-            lines = some_text.split('\n')
-            nestingString = ''
-            line_number = 1
-            for ix, char in enumerate(some_text):
-                if char in '({[':
-                    nestingString += char
-                elif char in ')}]':
-                    if char == ')': wanted_start_char = '('
-                    elif char == '}': wanted_start_char = '{'
-                    elif char == ']': wanted_start_char = '['
-                    if nestingString and nestingString[-1] == wanted_start_char:
-                        nestingString = nestingString[:-1] # Close off successful match
-                    else: # not the closing that we expected
-                        if char==')' \
-                        and ix>0 and some_text[ix-1].isdigit() \
-                        and ix<len(some_text)-1 and some_text[ix+1] in ' \t':
-                            # This could be part of a list like 1) ... 2) ...
-                            pass # Just ignore this—at least they'll still get the above mismatched count message
-                        else:
-                            locateString = f" after recent '{nestingString[-1]}'" if nestingString else ''
-                            self.log.warning(f"{ref} line {line_number:,}: Possible nesting error—found unexpected '{char}'{locateString} near {lines[line_number-1]}")
-                elif char == '\n':
-                    line_number += 1
-            if nestingString: # handle left-overs
-                reformatted_nesting_string = "'" + "', '".join(nestingString) + "'"
-                self.log.warning(f"{ref}: Seem to have the following unclosed field(s): {reformatted_nesting_string}")
-        # NOTE: Notifying all those is probably overkill,
-        #  but never mind (it might help detect multiple errors)
-
-        # These are markdown specific checks, but hopefully shouldn't hurt to be done for all strings
-        # They don't seem to be picked up by the markdown linter libraries for some reason.
-        for field,regex in ( # Put longest ones first
-                        # Seems that the fancy ones (commented out) don't find occurrences at the start (or end?) of the text
-                        ('___', r'___'),
-                        # ('___', r'[^_]___[^_]'), # three underlines
-                        ('***', r'\*\*\*'),
-                        # ('***', r'[^\*]\*\*\*[^\*]'), # three asterisks
-                        ('__', r'__'),
-                        # ('__', r'[^_]__[^_]'), # two underlines
-                        ('**', r'\*\*'),
-                        # ('**', r'[^\*]\*\*[^\*]'), # two asterisks
-                    ):
-            count = len(re.findall(regex, some_text)) # Finds all NON-OVERLAPPING matches
-            if count:
-                # print(f"check_punctuation_pairs found {count} of '{field}' at {ref} in '{some_text}'")
-                if (count % 2) != 0:
-                    # print(f"{ref}: Seem to have have mismatched '{field}' pairs in '{some_text}'")
-                    content_snippet = some_text if len(some_text) < 85 \
-                                        else f"{some_text[:40]} …… {some_text[-40:]}"
-                    self.log.warning(f"{ref}: Seem to have have mismatched '{field}' pairs in '{content_snippet}'")
-                    break # Only want one warning per text
+        for warning in find_punctuation_pair_warnings(some_text, ref, allow_close_parenthesis_points):
+            self.log.warning(warning)
     # end of Linter.check_punctuation_pairs function
 #end of linter.py
\ No newline at end of file
@@ -1,12 +1,11 @@
 import os
-import json
 from html.parser import HTMLParser
-from typing import Dict, List, Any
+from typing import Dict, List, Tuple, Any
 
-from rq_settings import prefix, debug_mode_flag
+from rq_settings import markdown_workers
 from linters.linter import Linter
-from aws_tools.lambda_handler import LambdaHandler
 from general_tools.file_utils import read_file, get_files
+from general_tools.pool_utils import imap_in_workers
 from app_settings.app_settings import AppSettings
 
 from linters.py_markdown_linter.lint import MarkdownLinter as PyMarkdownLinter
@@ -14,12 +13,26 @@ from linters.py_markdown_linter.config import LintConfig
 
 
 
+def lint_markdown_string(args:Tuple[str,Dict[str,Any]]) -> List[Dict[str,Any]]:
+    """
+    Lints one markdown file's text with the rules of a markdownlint style config,
+        returning the results as the markdownlint (node.js) linter gave them.
+
+    This runs in the worker processes of MarkdownLinter.invoke_markdown_linter().
+    """
+    markdown_string, markdownlint_config = args
+    py_markdown_linter = PyMarkdownLinter(LintConfig.from_markdownlint_config(markdownlint_config))
+    return py_markdown_linter.lint_to_markdownlint_results(markdown_string)
+
+
+
 class MarkdownLinter(Linter):
 
-    def __init__(self, *args, **kwargs) -> None:
+    def __init__(self, *args, num_workers:int=markdown_workers, **kwargs) -> None:
         super(MarkdownLinter, self).__init__(*args, **kwargs)
         self.single_file = None
         self.single_dir = None
+        self.num_workers = num_workers
 
 
     def lint(self) -> bool:
@@ -32,58 +45,29 @@ class MarkdownLinter(Linter):
         """
         AppSettings.logger.debug("MarkdownLinter.lint()")
 
+        md_data = self.get_strings() # Each file is only read once, for all the checks
+
         # Do some preliminary checks on the files
-        for filename in self.get_files(relative_paths=True):
-            with open( os.path.join(self.source_dir, filename), 'rt') as md_file:
-                file_contents = md_file.read()
-            self.check_punctuation_pairs(file_contents, filename.replace('.md',''))
-
-
-        md_data = self.get_strings() # Used for AWS Lambda call
-        # Determine approximate length of the payload data
-        payloadString = json.dumps(md_data) # (it doesn't include 'config' yet)
-        if not isinstance(payloadString, str): # then it must be Python3 bytes
-            payloadString = payloadString.decode()
-        estimated_payload_length = len(payloadString) + 335 # Allow for 'config' strings (included later)
-        AppSettings.logger.debug(f"Approx length of Markdown Linter payload = {estimated_payload_length:,} characters.")
-        payload_oversize_flag = estimated_payload_length > 6_291_456 # 6 MB—AWS Lambda call will fail
-        if payload_oversize_flag:
-            AppSettings.logger.warning(f"Oversize Markdown Linter payload = {estimated_payload_length:,} characters.")
-
-        test_pyLinter = prefix and debug_mode_flag # True: always use new Python linter; False: mostly use AWS Lambda call
-        if test_pyLinter or payload_oversize_flag:
-            # New code using unfinished PyMarkdownLinter
-            AppSettings.logger.info("Invoking (unfinished) PyMarkdownLinter…")
-            lint_config = LintConfig()
-            for rule_id in ('MD009', 'MD010', 'MD013'): # Ignore
-                lint_config.disable_rule_by_id(rule_id)
-            py_markdown_linter = PyMarkdownLinter(lint_config)
-            for filename in self.get_files(relative_paths=True):
-                with open( os.path.join(self.source_dir, filename), 'rt') as md_file:
-                    linter_warnings = py_markdown_linter.lint(md_file.read())
-                if linter_warnings:
-                    AppSettings.logger.debug(f"Markdown linter result count for {filename} = {len(linter_warnings):,}.")
-                    for rule_violation in linter_warnings:
-                        self.log.warning(f"{filename.replace('.md','')} line {rule_violation.line_nr}: {rule_violation.message}")
-
-        else: # old (tx-Manager) code using AWS Lambda node.js call
-            AppSettings.logger.info("Invoking Node.js linter via AWS Lambda call…")
-            # print(len(md_data), md_data)
-            # AppSettings.logger.debug(f"Size of markdown data = {len(md_data)}") # Useless—always shows 1
-            lint_data = self.invoke_markdown_linter(self.get_invoke_payload(md_data))
-            if not lint_data:
-                return False
-            # RJH: What is this code doing? Why are warnings expressed as HTML segments here???
-            self.repo_owner = self.repo_name = '' # WE DON'T KNOW THIS STUFF
-            for f in lint_data.keys():
-                file_url = f'https://git.door43.org/{self.repo_owner}/{self.rc.repo_name}/src/master/{f}'
-                for item in lint_data[f]:
-                    error_context = ''
-                    if item['errorContext']:
-                        error_context = f'See "{self.strip_tags(item["errorContext"])}"'
-                    line = '<a href="{0}" target="_blank">{1}</a> - Line {2}: {3}. {4}'. \
-                        format(file_url, f, item['lineNumber'], item['ruleDescription'], error_context)
-                    self.log.warning(line)
+        for filename, file_contents in md_data.items():
+            ref = filename.replace('.md','')
+            self.lint_cached(lambda: self.check_punctuation_pairs(file_contents, ref),
+                             'check_punctuation_pairs', ref, file_contents)
+
+        AppSettings.logger.info(f"Linting {len(md_data):,} markdown files…")
+        lint_data = self.invoke_markdown_linter(self.get_invoke_payload(md_data))
+        if not lint_data:
+            return False
+        # RJH: What is this code doing? Why are warnings expressed as HTML segments here???
+        self.repo_owner = self.repo_name = '' # WE DON'T KNOW THIS STUFF
+        for f in lint_data.keys():
+            file_url = f'https://git.door43.org/{self.repo_owner}/{self.rc.repo_name}/src/master/{f}'
+            for item in lint_data[f]:
+                error_context = ''
+                if item['errorContext']:
+                    error_context = f'See "{self.strip_tags(item["errorContext"])}"'
+                line = '<a href="{0}" target="_blank">{1}</a> - Line {2}: {3}. {4}'. \
+                    format(file_url, f, item['lineNumber'], item['ruleDescription'], error_context)
+                self.log.warning(line)
         return True
 
 
@@ -106,13 +90,14 @@ class MarkdownLinter(Linter):
         return files
 
 
-    def get_strings(self) -> List[str]:
+    def get_strings(self) -> Dict[str,str]:
         strings = {}
         for filename in self.get_files(relative_paths=True):
             filepath = os.path.join(self.source_dir, filename)
             try: text = read_file(filepath)
             except Exception as e:
                 self.log.warning(f"Error reading {filename}: {e}")
+                continue
             strings[filename] = text
         return strings
 
@@ -138,18 +123,34 @@ class MarkdownLinter(Linter):
             }
         }
 
-    def invoke_markdown_linter(self, payload:Dict[str,Any]):
-        #AppSettings.logger.debug(f"MarkdownLinter.invoke_markdown_linter( {payload.keys()}/{len(payload['options'])}/{payload['options'].keys()} )")
-        AppSettings.logger.debug(f"MarkdownLinter.invoke_markdown_linter( {payload['options'].keys()}/{payload['options']['config']}/{len(payload['options']['strings'])} )")
-        lambda_handler = LambdaHandler()
-        lint_function = f'{AppSettings.prefix}tx_markdown_linter'
-        # AppSettings.logger.debug(f"Size of {self.s3_results_key} lint data={len(payload)}") # Useless data—always shows None/1
-        response = lambda_handler.invoke(lint_function, payload)
-        if 'errorMessage' in response:
-            AppSettings.logger.error(response['errorMessage'])
-            return None
-        elif 'Payload' in response:
-            return json.loads(response['Payload'].read())
+    def invoke_markdown_linter(self, payload:Dict[str,Any]) -> Dict[str,List[Dict[str,Any]]]:
+        """
+        Lints the markdown strings of the payload (as was sent to the tx_markdown_linter AWS Lambda function)
+            with the py_markdown_linter rules that its markdownlint style config enables.
+
+        Returns the results as markdownlint gave them, i.e., {filename: [{'lineNumber':…, 'ruleDescription':…, …}]},
+            with the files linted in worker processes if there are enough of them.
+        """
+        strings, config = payload['options']['strings'], payload['options']['config']
+        AppSettings.logger.debug(f"MarkdownLinter.invoke_markdown_linter( {config}/{len(strings)} )")
+        results = {}
+        if self.lint_cache: # Only lint the files that have changed since they were last linted
+            key_hashes = {filename: self.lint_cache.get_hash('markdownlint', strings[filename], config)
+                            for filename in strings}
+            for filename, key_hash in key_hashes.items():
+                cached_results = self.lint_cache.get(key_hash)
+                if cached_results is not None:
+                    results[filename] = cached_results
+        filenames = [filename for filename in strings if filename not in results]
+        file_args = [(strings[filename], config) for filename in filenames]
+        num_workers = min(self.num_workers, len(filenames))
+        if num_workers > 1:
+            AppSettings.logger.debug(f"Linting {len(filenames)} markdown files with {num_workers} worker processes…")
+        for filename, file_results in zip(filenames, imap_in_workers(lint_markdown_string, file_args, num_workers)):
+            results[filename] = file_results
+            if self.lint_cache:
+                self.lint_cache.put(key_hashes[filename], file_results)
+        return {filename: results[filename] for filename in strings}
 
     def get_dir_for_book(self, book: str) -> str:
         parts = book.split('-')
@@ -13,10 +13,20 @@ class LintConfigError(Exception):
 class LintConfig:
     """ Class representing markdownlint configuration """
     default_rule_classes = [rules.MaxLineLengthRule, rules.TrailingWhiteSpace, rules.HardTab]
+    # All the rules, in the (rule id) order that markdownlint applies and reports them
+    all_rule_classes = [rules.HeaderIncrement, rules.TopLevelHeader, rules.HeaderStyle, rules.UlStyle,
+                        rules.ListIndent, rules.UlStartLeft, rules.UlIndent, rules.TrailingWhiteSpace, rules.HardTab,
+                        rules.ReversedLink, rules.MaxLineLengthRule, rules.CommandsShowOutput,
+                        rules.NoMissingSpaceAtx, rules.NoMultipleSpaceAtx, rules.NoMissingSpaceClosedAtx,
+                        rules.NoMultipleSpaceClosedAtx, rules.BlanksAroundHeaders, rules.HeaderStartLeft,
+                        rules.OlPrefix, rules.BlanksAroundFences, rules.BlanksAroundLists, rules.HrStyle,
+                        rules.FencedCodeLanguage, rules.NoEmptyLinks, rules.RequiredHeaders, rules.ProperNames,
+                        rules.NoAltText]
 
-    def __init__(self):
+    def __init__(self, rule_classes=None):
         # Use an ordered dict so that the order in which rules are applied is always the same
-        self._rules = OrderedDict([(rule_cls.id, rule_cls()) for rule_cls in self.default_rule_classes])
+        self._rules = OrderedDict([(rule_cls.id, rule_cls())
+                                   for rule_cls in (self.default_rule_classes if rule_classes is None else rule_classes)])
 
     @property
     def rules(self):
@@ -38,6 +48,34 @@ class LintConfig:
         if rule:
             self.disable_rule_by_id(rule.id)
 
+    @staticmethod
+    def from_markdownlint_config(markdownlint_config):
+        """
+        Returns the config for a markdownlint style config dict, e.g.,
+            {'default': True, 'MD007': {'indent': 4}, 'line-length': False, 'whitespace': False}
+            where the keys can be rule ids, rule names (aliases) or tags,
+            and the values are True/False, or a dict of options to enable the rule with.
+        Later keys override earlier ones, as with markdownlint. Keys for rules that aren't implemented are ignored.
+        """
+        default = markdownlint_config.get('default', True)
+        rule_settings = OrderedDict([(rule_cls.id, default) for rule_cls in LintConfig.all_rule_classes])
+        for key, value in markdownlint_config.items():
+            if key == 'default':
+                continue
+            key_upper = key.upper()
+            for rule_cls in LintConfig.all_rule_classes:
+                if key_upper in (rule_cls.id, rule_cls.name.upper()) or key.lower() in rule_cls.tags:
+                    rule_settings[rule_cls.id] = value
+        config = LintConfig(rule_classes=[])
+        for rule_cls in LintConfig.all_rule_classes:
+            value = rule_settings[rule_cls.id]
+            if value:
+                try:
+                    config._rules[rule_cls.id] = rule_cls(value if isinstance(value, dict) else {})
+                except rules.RuleOptionError as e:
+                    raise LintConfigError(f"Invalid {rule_cls.id} options: {e}")
+        return config
+
     @staticmethod
     def apply_on_csv_string(rules_str, func):
         """ Splits a given string by comma, trims whitespace on the resulting strings and applies a given ```func``` to
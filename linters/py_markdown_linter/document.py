@@ -0,0 +1,361 @@
+import re
+
+
+FENCE_RE = re.compile(r'^(`{3,}|~{3,})(.*)$')
+ATX_HEADING_RE = re.compile(r'^(#{1,6})(?:([ \t]+)(.*?))?$')
+ATX_CLOSING_RE = re.compile(r'(^|[ \t]+)#+[ \t]*$')
+SETEXT_UNDERLINE_RE = re.compile(r'^(=+|-+)[ \t]*$')
+HR_RE = re.compile(r'^(?:(?:\*[ \t]*){3,}|(?:-[ \t]*){3,}|(?:_[ \t]*){3,})$')
+LIST_ITEM_RE = re.compile(r'^([*+-]|(\d{1,9})[.)])(?:([ \t]+)(.*)|$)')
+HTML_BLOCK_TAGS = 'address|article|aside|base|basefont|blockquote|body|caption|center|col|colgroup|dd|details|' \
+                  'dialog|dir|div|dl|dt|fieldset|figcaption|figure|footer|form|frame|frameset|h[1-6]|head|header|' \
+                  'hr|html|iframe|legend|li|link|main|menu|menuitem|nav|noframes|ol|optgroup|option|p|param|' \
+                  'section|source|summary|table|tbody|td|tfoot|th|thead|title|tr|track|ul'
+HTML_TAG_LINE_RE = re.compile(r'''^(?:<[a-zA-Z][a-zA-Z0-9-]*'''
+                              r'''(?:\s+[a-zA-Z_:][\w.:-]*(?:\s*=\s*(?:[^\s"'=<>`]+|'[^']*'|"[^"]*"))?)*\s*/?>'''
+                              r'''|</[a-zA-Z][a-zA-Z0-9-]*\s*>)\s*$''')
+# The (CommonMark) kinds of HTML block: the regex for how they start, for what ends them (or None for a blank line),
+#   and if they can interrupt a paragraph
+HTML_BLOCKS = (
+    (re.compile(r'^<(?:script|pre|style|textarea)(?:\s|>|$)', re.IGNORECASE),
+        re.compile(r'</(?:script|pre|style|textarea)>', re.IGNORECASE), True),
+    (re.compile(r'^<!--'), re.compile(r'-->'), True),
+    (re.compile(r'^<\?'), re.compile(r'\?>'), True),
+    (re.compile(r'^<![a-zA-Z]'), re.compile(r'>'), True),
+    (re.compile(r'^<!\[CDATA\['), re.compile(r'\]\]>'), True),
+    (re.compile(rf'^</?(?:{HTML_BLOCK_TAGS})(?:\s|/?>|$)', re.IGNORECASE), None, True),
+    (HTML_TAG_LINE_RE, None, False),
+)
+HTML_COMMENT_RE = re.compile(r'<!--.*?-->')
+CODE_SPAN_RE = re.compile(r'(`+)(.+?)(?<!`)\1(?!`)')
+DISABLE_COMMENT_RE = re.compile(r'^<!--\s*markdownlint[:-]disable\s*-->$')
+ENABLE_COMMENT_RE = re.compile(r'^<!--\s*markdownlint[:-]enable\s*-->$')
+
+# The kinds of lines whose inline text (links, images, etc.) is looked at
+INLINE_KINDS = ('paragraph', 'heading', 'list_item', 'list_continuation')
+
+
+def get_indent(line):
+    """ Returns the width of the leading whitespace of a line (with tabs to the next multiple of 4) """
+    stripped = line.lstrip(' \t')
+    return len(line[:len(line) - len(stripped)].expandtabs(4))
+
+
+class Heading:
+    def __init__(self, line_nr, level, style, text, end_line_nr=None):
+        self.line_nr = line_nr
+        self.end_line_nr = end_line_nr or line_nr
+        self.level = level
+        self.style = style # 'atx', 'atx_closed' or 'setext'
+        self.text = text
+
+
+class CodeBlock:
+    def __init__(self, line_nr, fence=None, info='', content_indent=0):
+        self.line_nr = line_nr
+        self.end_line_nr = line_nr
+        self.fence = fence # None for an indented code block
+        self.info = info
+        self.content_indent = content_indent # Of the list item that it's in (if any)
+        self.lines = []
+
+    @property
+    def fenced(self):
+        return self.fence is not None
+
+
+class ListItem:
+    def __init__(self, line_nr, indent, marker, content_indent, empty=False):
+        self.line_nr = line_nr
+        self.indent = indent
+        self.marker = marker
+        self.content_indent = content_indent
+        self.empty = empty # If there's nothing after the marker
+        self.ended = False # An empty item ends at a blank line, leaving nothing to be indented into it
+
+    @property
+    def number(self):
+        return self.marker[:-1] if self.marker[-1] in '.)' else None
+
+
+class MarkdownList:
+    def __init__(self, item, parent=None):
+        self.items = [item]
+        self.parent = parent
+        self.nesting = parent.nesting + 1 if parent else 0
+        self.end_line_nr = item.line_nr
+
+    @property
+    def line_nr(self):
+        return self.items[0].line_nr
+
+    @property
+    def indent(self):
+        return self.items[0].indent
+
+    @property
+    def ordered(self):
+        return self.items[0].number is not None
+
+    @property
+    def delimiter(self):
+        # The bullet character, or the '.' or ')' after the numbers
+        return self.items[0].marker[-1]
+
+    @property
+    def parents_unordered(self):
+        parent = self.parent
+        while parent:
+            if parent.ordered:
+                return False
+            parent = parent.parent
+        return True
+
+    def accepts(self, marker):
+        return (marker[-1] in '.)') == self.ordered and marker[-1] == self.delimiter
+
+
+class MarkdownDocument:
+    """
+    A markdown string parsed (once) into the lines, headings, code blocks, lists and horizontal rules
+        that the rules look at, roughly as CommonMark would see them.
+
+    Line numbers start at 1. Block quotes and HTML blocks are kept as such, without looking inside them.
+    """
+
+    def __init__(self, markdown_string):
+        self.lines = markdown_string.split('\n')
+        self.kinds = [None] * len(self.lines)
+        self.headings = []
+        self.code_blocks = []
+        self.lists = []
+        self.horizontal_rules = [] # (line_nr, rule text)
+        self.disabled_line_nrs = set()
+        self._open_lists = []
+        self._parse()
+
+    def line(self, line_nr):
+        return self.lines[line_nr - 1]
+
+    def kind(self, line_nr):
+        return self.kinds[line_nr - 1]
+
+    def is_blank(self, line_nr):
+        """ As markdownlint counts them, lines outside the document and lines of only HTML comments are blank too """
+        if line_nr < 1 or line_nr > len(self.lines):
+            return True
+        return not HTML_COMMENT_RE.sub('', self.lines[line_nr - 1]).strip()
+
+    def is_enabled(self, line_nr):
+        return line_nr not in self.disabled_line_nrs
+
+    def inline_lines(self):
+        """ Yields the line number and text (with any code spans blanked out) of the lines with inline content """
+        for line_nr, (line, kind) in enumerate(zip(self.lines, self.kinds), start=1):
+            if kind in INLINE_KINDS:
+                if '`' in line:
+                    line = CODE_SPAN_RE.sub(lambda match: ' ' * len(match.group(0)), line)
+                yield line_nr, line
+
+    @property
+    def top_level_lists(self):
+        return [markdown_list for markdown_list in self.lists if not markdown_list.nesting]
+
+    def _parse(self):
+        fence_block = indented_block = None
+        disabled = False
+        self._html_end = False # While in an HTML block, the regex for what ends it (or None for a blank line)
+        self._paragraph_line_nr = None # Where the last paragraph started
+        previous_kind = None
+        in_paragraph = False # If the previous line was paragraph text that the next line can lazily continue
+        for line_nr, line in enumerate(self.lines, start=1):
+            stripped = line.strip()
+            if disabled or DISABLE_COMMENT_RE.match(stripped):
+                self.disabled_line_nrs.add(line_nr)
+                disabled = not ENABLE_COMMENT_RE.match(stripped)
+
+            if fence_block and stripped and get_indent(line) < fence_block.content_indent:
+                fence_block = None # The end of the list item that the code was in
+            if fence_block:
+                kind = 'code'
+                fence_block.end_line_nr = line_nr
+                fence = fence_block.fence
+                if stripped.startswith(fence) and not stripped.strip(fence[0]) \
+                        and get_indent(line) < fence_block.content_indent + 4:
+                    fence_block = None
+                else:
+                    fence_block.lines.append(line)
+            elif self._html_end is not False and (stripped or self._html_end):
+                kind = 'html'
+                if self._html_end and self._html_end.search(line):
+                    self._html_end = False
+            elif not stripped:
+                kind = 'blank'
+                self._html_end = False
+                if previous_kind == 'list_item' and self._open_lists[-1].items[-1].empty:
+                    self._open_lists[-1].items[-1].ended = True
+            else:
+                kind, fence_block, indented_block = self._parse_line(line_nr, line, previous_kind, in_paragraph,
+                                                                     indented_block)
+                if fence_block:
+                    indented_block = None
+
+            if kind != 'blank' and kind != 'code':
+                indented_block = None
+            if stripped:
+                # The lists still open are the ones that this line is in
+                for markdown_list in self._open_lists:
+                    markdown_list.end_line_nr = line_nr
+            self.kinds[line_nr - 1] = kind
+            previous_kind = kind
+            in_paragraph = kind in ('paragraph', 'list_continuation') \
+                or (kind == 'list_item' and not self._open_lists[-1].items[-1].empty) \
+                or (kind == 'quote' and bool(stripped.lstrip('>').strip()))
+        self._open_lists = []
+        if fence_block and not self.lines[-1] and fence_block.end_line_nr == len(self.lines):
+            fence_block.end_line_nr -= 1 # An unclosed fence doesn't take in the empty 'line' after the last newline
+        for code_block in self.code_blocks:
+            if not code_block.fenced:
+                while code_block.lines and not code_block.lines[-1].strip():
+                    code_block.lines.pop()
+                code_block.end_line_nr = code_block.line_nr + len(code_block.lines) - 1
+
+    def _parse_line(self, line_nr, line, previous_kind, in_paragraph, indented_block):
+        """
+        Returns the kind of a non-blank line outside any fenced code, HTML comment or HTML block,
+            and the fenced or indented code block that it's in (if any).
+        """
+        indent = get_indent(line)
+        stripped = line.strip()
+        text = line.lstrip(' \t')
+        # The column that the content of the list item that the line could be in starts at
+        content_indent = 0
+        for markdown_list in self._open_lists:
+            if indent < markdown_list.items[-1].content_indent or markdown_list.items[-1].ended:
+                break
+            content_indent = markdown_list.items[-1].content_indent
+
+        # As markdown-it has it, a line indented 4 or more past that (but not into the list item of the paragraph)
+        #   ends the paragraph if it could start a block (other than a list) in the list item, making it code
+        if in_paragraph and self._open_lists and indent >= content_indent + 4 and self._starts_block(text):
+            in_paragraph = False
+        # Lines indented 4 or more past that are code (unless they just continue a paragraph)
+        if indent >= content_indent + 4 and not in_paragraph:
+            if indented_block is None:
+                indented_block = CodeBlock(line_nr)
+                self.code_blocks.append(indented_block)
+            indented_block.lines.extend([''] * (line_nr - indented_block.line_nr - len(indented_block.lines)))
+            indented_block.lines.append(line)
+            self._continue_lists(indent, True)
+            return 'code', None, indented_block
+
+        if indent < content_indent + 4:
+            match = FENCE_RE.match(text)
+            if match and not (match.group(1)[0] == '`' and '`' in match.group(2)):
+                self._continue_lists(indent, True)
+                fence_block = CodeBlock(line_nr, match.group(1), match.group(2).strip(),
+                                        self._open_lists[-1].items[-1].content_indent if self._open_lists else 0)
+                self.code_blocks.append(fence_block)
+                return 'code', fence_block, None
+
+            match = ATX_HEADING_RE.match(text.rstrip())
+            if match:
+                self._continue_lists(indent, True)
+                heading_text = match.group(3) or ''
+                closing = ATX_CLOSING_RE.search(heading_text)
+                style = 'atx_closed' if closing and heading_text[:closing.start()].strip() else 'atx'
+                if closing:
+                    heading_text = heading_text[:closing.start()]
+                self.headings.append(Heading(line_nr, len(match.group(1)), style, heading_text.strip()))
+                return 'heading', None, None
+
+            match = SETEXT_UNDERLINE_RE.match(text)
+            if match and previous_kind == 'paragraph' and not self._open_lists:
+                # The whole paragraph above is the heading
+                start_line_nr = self._paragraph_line_nr
+                heading_text = ' '.join(line.strip() for line in self.lines[start_line_nr - 1:line_nr - 1])
+                self.headings.append(Heading(start_line_nr, 1 if match.group(1)[0] == '=' else 2, 'setext',
+                                             heading_text, line_nr))
+                self.kinds[start_line_nr - 1:line_nr - 1] = ['heading'] * (line_nr - start_line_nr)
+                return 'heading', None, None
+
+            if HR_RE.match(text):
+                self._continue_lists(indent, True)
+                self.horizontal_rules.append((line_nr, stripped))
+                return 'hr', None, None
+
+            match = LIST_ITEM_RE.match(text.expandtabs(4))
+            if match and self._is_list_item(match, previous_kind):
+                marker = match.group(1)
+                spaces = len(match.group(3) or '')
+                item_content_indent = indent + len(marker) + (spaces if 0 < spaces <= 4 and match.group(4) else 1)
+                self._add_list_item(ListItem(line_nr, indent, marker, item_content_indent, not match.group(4)))
+                return 'list_item', None, None
+
+            if text.startswith('>'):
+                self._continue_lists(indent, True)
+                return 'quote', None, None
+
+            for start_regex, end_regex, can_interrupt in HTML_BLOCKS:
+                match = start_regex.match(text)
+                if match and (can_interrupt or not in_paragraph):
+                    self._continue_lists(indent, True)
+                    if end_regex is None or not end_regex.search(text, match.end()):
+                        self._html_end = end_regex
+                    return 'html', None, None
+
+        if self._continue_lists(indent, not in_paragraph):
+            return 'list_continuation', None, None
+        if previous_kind == 'quote' and in_paragraph:
+            return 'quote', None, None # A lazy continuation of the block quote
+        if previous_kind != 'paragraph':
+            self._paragraph_line_nr = line_nr
+        return 'paragraph', None, None
+
+    @staticmethod
+    def _starts_block(text):
+        match = FENCE_RE.match(text)
+        if match and not (match.group(1)[0] == '`' and '`' in match.group(2)):
+            return True
+        return bool(ATX_HEADING_RE.match(text.rstrip()) or HR_RE.match(text) or text.startswith('>')
+                    or any(start_regex.match(text) for start_regex, _end_regex, can_interrupt in HTML_BLOCKS
+                           if can_interrupt))
+
+    def _is_list_item(self, match, previous_kind):
+        if previous_kind != 'paragraph' or self._open_lists:
+            return True
+        # An item can only interrupt a paragraph if it's not empty (and, if numbered, starts at 1)
+        return bool(match.group(4) and match.group(4).strip()) and match.group(2) in (None, '1')
+
+    def _continue_lists(self, indent, interrupts):
+        """
+        Closes the open lists that a line (with the given indent) isn't indented into,
+            unless it lazily continues the paragraph of a list item.
+        Returns True if the line is still in a list.
+        """
+        if not self._open_lists:
+            return False
+        if not interrupts:
+            return True # A lazy continuation line
+        while self._open_lists and (indent < self._open_lists[-1].items[-1].content_indent
+                                    or self._open_lists[-1].items[-1].ended):
+            self._open_lists.pop()
+        return bool(self._open_lists)
+
+    def _add_list_item(self, item):
+        while self._open_lists:
+            markdown_list = self._open_lists[-1]
+            if item.indent >= markdown_list.items[-1].content_indent and not markdown_list.items[-1].ended:
+                break # The item starts a list inside the last item
+            base_indent = markdown_list.parent.items[-1].content_indent if markdown_list.parent else 0
+            if item.indent >= base_indent:
+                if markdown_list.accepts(item.marker):
+                    markdown_list.items.append(item)
+                    return
+                self._open_lists.pop() # A different marker starts another list at the same level
+                break
+            self._open_lists.pop()
+        parent = self._open_lists[-1] if self._open_lists else None
+        markdown_list = MarkdownList(item, parent)
+        self.lists.append(markdown_list)
+        self._open_lists.append(markdown_list)
@@ -1,5 +1,6 @@
 
 from linters.py_markdown_linter import rules
+from linters.py_markdown_linter.document import MarkdownDocument
 
 
 class MarkdownLinter:
@@ -10,6 +11,10 @@ class MarkdownLinter:
     def line_rules(self):
         return [rule for rule in self.config.rules if isinstance(rule, rules.LineRule)]
 
+    @property
+    def file_rules(self):
+        return [rule for rule in self.config.rules if isinstance(rule, rules.FileRule)]
+
     def _apply_line_rules(self, markdown_string):
         """ Iterates over the lines in a given markdown string and applies all the enabled line rules to each line """
         all_violations = []
@@ -34,11 +39,44 @@ class MarkdownLinter:
             line_nr += 1
         return all_violations
 
+    def _apply_file_rules(self, markdown_string):
+        """ Parses the markdown string (just once) and applies all the enabled file rules to it """
+        file_rules = self.file_rules
+        if not file_rules:
+            return []
+        document = MarkdownDocument(markdown_string)
+        all_violations = []
+        for rule in file_rules:
+            all_violations.extend(violation for violation in rule.validate(document)
+                                  if document.is_enabled(violation.line_nr))
+        return all_violations
+
     def lint(self, markdown_string):
         all_violations = []
         all_violations.extend(self._apply_line_rules(markdown_string))
+        all_violations.extend(self._apply_file_rules(markdown_string))
         return all_violations
 
+    def lint_to_markdownlint_results(self, markdown_string):
+        """
+        Returns the violations in the markdown string as the markdownlint (node.js) linter gives them,
+            i.e., a list of dicts in rule order, then line order.
+        """
+        rule_order = {rule.id: index for index, rule in enumerate(self.config.rules)}
+        results = []
+        for violation in sorted(self.lint(markdown_string), key=lambda v: (rule_order[v.rule_id], v.line_nr)):
+            rule = self.config.get_rule_by_name_or_id(violation.rule_id)
+            results.append({
+                'lineNumber': violation.line_nr,
+                'ruleName': rule.id,
+                'ruleAlias': rule.name,
+                'ruleDescription': rule.description,
+                'errorDetail': violation.detail,
+                'errorContext': violation.context,
+                'errorRange': violation.error_range,
+                })
+        return results
+
     def lint_files(self, files):
         """ Lints a list of files.
         :param files: list of files to lint
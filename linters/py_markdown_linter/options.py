@@ -37,3 +37,29 @@ class IntOption(RuleOption):
 
         if not self.allow_negative and self.value < 0:
             self.raise_exception(value)
+
+
+class StrOption(RuleOption):
+    def __init__(self, name, value, description, choices=None):
+        super(StrOption, self).__init__(name, value, description)
+        self.choices = choices
+
+    def set(self, value):
+        if not isinstance(value, str) or (self.choices and value not in self.choices):
+            raise RuleOptionError("Option '{0}' must be one of {1} (current value: {2})".format(
+                self.name, self.choices or 'the strings', value))
+        self.value = value
+
+
+class BoolOption(RuleOption):
+    def set(self, value):
+        if not isinstance(value, bool):
+            raise RuleOptionError("Option '{0}' must be true or false (current value: {1})".format(self.name, value))
+        self.value = value
+
+
+class ListOption(RuleOption):
+    def set(self, value):
+        if not isinstance(value, (list, tuple)):
+            raise RuleOptionError("Option '{0}' must be a list (current value: {1})".format(self.name, value))
+        self.value = list(value)
@@ -1,11 +1,18 @@
 import re
+import copy
 from abc import abstractmethod, ABCMeta
-from bs4 import BeautifulSoup
-import markdown
 
-from linters.py_markdown_linter.options import IntOption
+from linters.py_markdown_linter.options import RuleOptionError, IntOption, StrOption, BoolOption, ListOption
 
-RE_HEADERS = re.compile('^h[1-6]$')
+ATX_MISSING_SPACE_RE = re.compile(r'^#+[^#\s]')
+ATX_MULTIPLE_SPACES_RE = re.compile(r'^#+[ \t]{2,}')
+ATX_CLOSED_RE = re.compile(r'^(#+)([ \t]*)([^#]*?[^#\\ \t])([ \t]*)(#+)[ \t]*$')
+REVERSED_LINK_RE = re.compile(r'\([^)]+\)\[[^\]^][^\]]*\](?!\()')
+EMPTY_LINK_RE = re.compile(r'(?<!!)\[[^\]]*\]\(\s*#?\s*\)')
+NO_ALT_TEXT_RE = re.compile(r'!\[\s*\]\([^)]*\)')
+DOLLAR_COMMAND_RE = re.compile(r'^\s*\$\s')
+
+BULLET_STYLES = {'*': 'asterisk', '+': 'plus', '-': 'dash'}
 
 
 class Rule(metaclass=ABCMeta):
@@ -13,15 +20,17 @@ class Rule(metaclass=ABCMeta):
     options_spec = []
     id = []
     name = ""
+    description = ""
+    tags = ()
     error_str = ""
 
     def __init__(self, opts={}):
         self.options = {}
         for op_spec in self.options_spec:
-            self.options[op_spec.name] = op_spec
-            actual_option = opts.get(op_spec.name)
-            if actual_option:
-                self.options[op_spec.name].set(actual_option)
+            # Each rule gets its own copy, so setting an option doesn't change it for other rules
+            self.options[op_spec.name] = copy.copy(op_spec)
+            if op_spec.name in opts:
+                self.options[op_spec.name].set(opts[op_spec.name])
 
     def __eq__(self, other):
         return self.id == other.id and self.name == other.name
@@ -32,15 +41,14 @@ class Rule(metaclass=ABCMeta):
 
 
 class FileRule(Rule):
-    """ Class representing rules that act on an entire file """
+    """ Class representing rules that act on an entire file (as a parsed MarkdownDocument) """
+
+    def violation(self, line_nr, detail=None, context=None, error_range=None):
+        return RuleViolation(self.id, self.error_str or self.description, line_nr,
+                             detail=detail, context=context, error_range=error_range)
 
-    @staticmethod
-    def md_to_tree(md):
-        """
-        Converts a string of pure markdown into a bs4 object. Makes parsing much
-        easier, but not necessarily faster.
-        """
-        return BeautifulSoup(markdown.markdown(md, extensions=['md_in_html', 'tables', 'footnotes']), "html.parser")
+    def detail_violation(self, line_nr, expected, actual, context=None):
+        return self.violation(line_nr, f"Expected: {expected}; Actual: {actual}", context)
 
 
 class LineRule(Rule):
@@ -49,10 +57,13 @@ class LineRule(Rule):
 
 
 class RuleViolation:
-    def __init__(self, rule_id, message, line_nr=None):
+    def __init__(self, rule_id, message, line_nr=None, detail=None, context=None, error_range=None):
         self.rule_id = rule_id
         self.line_nr = line_nr
         self.message = message
+        self.detail = detail
+        self.context = context
+        self.error_range = error_range # [column, length], as markdownlint gives them
 
     def __eq__(self, other):
         return self.rule_id == other.rule_id and self.message == other.message and self.line_nr == other.line_nr
@@ -68,39 +79,138 @@ class HeaderIncrement(FileRule):
     """Rule: Header levels should only increment 1 level at a time."""
     name = "header-increment"
     id = "MD001"
-    error_str = "Headers don't increment"
+    description = "Header levels should only increment by one level at a time"
+    tags = ('headers',)
 
-    def validate(self, lines):
-        soup = self.md_to_tree(lines)
+    def validate(self, document):
+        violations = []
         old_level = None
-        for header in soup.find_all(RE_HEADERS):
-            level = int(header.name[-1])
-            if old_level and level > old_level + 1:
-                return RuleViolation(self.id, self.error_str)
-            old_level = level
+        for heading in document.headings:
+            if old_level and heading.level > old_level + 1:
+                violations.append(self.detail_violation(heading.line_nr, f'h{old_level + 1}', f'h{heading.level}'))
+            old_level = heading.level
+        return violations
 
 
 class TopLevelHeader(FileRule):
     """Rule: First header of the file must be h1."""
     name = "first-header-h1"
     id = "MD002"
-    options_spec = [IntOption("first-header-level", 1, "Top level header")]
-    error_str = "First header of the file must be top level header"
-
-    def validate(self, lines):
-        soup = self.md_to_tree(lines)
-        top_level = self.options['first-header-level'].value
-        first_header = soup.find(RE_HEADERS)
-        if first_header:
-            first_header_level = int(first_header.name[-1])
-            if top_level != first_header_level:
-                return RuleViolation(self.id, self.error_str)
+    description = "First header should be a top level header"
+    tags = ('headers',)
+    options_spec = [IntOption("level", 1, "Top level header")]
+
+    def validate(self, document):
+        top_level = self.options['level'].value
+        if document.headings and document.headings[0].level != top_level:
+            heading = document.headings[0]
+            return [self.detail_violation(heading.line_nr, f'h{top_level}', f'h{heading.level}')]
+        return []
+
+
+class HeaderStyle(FileRule):
+    """Rule: Headers should all use the same style (atx, atx_closed or setext)."""
+    name = "header-style"
+    id = "MD003"
+    description = "Header style"
+    tags = ('headers',)
+    options_spec = [StrOption("style", "consistent", "Header style",
+                              ('consistent', 'atx', 'atx_closed', 'setext', 'setext_with_atx'))]
+
+    def validate(self, document):
+        violations = []
+        style = self.options['style'].value
+        for heading in document.headings:
+            if style == 'consistent':
+                style = heading.style
+            if style == 'setext_with_atx':
+                expected = 'setext' if heading.level < 3 else 'atx'
+            else:
+                expected = style
+            if heading.style != expected:
+                violations.append(self.detail_violation(heading.line_nr, expected, heading.style))
+        return violations
+
+
+class UlStyle(FileRule):
+    """Rule: Unordered lists should all use the same bullet character."""
+    name = "ul-style"
+    id = "MD004"
+    description = "Unordered list style"
+    tags = ('bullet', 'ul')
+    options_spec = [StrOption("style", "consistent", "List style", ('consistent', 'asterisk', 'plus', 'dash'))]
+
+    def validate(self, document):
+        violations = []
+        style = self.options['style'].value
+        for markdown_list in document.lists:
+            if markdown_list.ordered:
+                continue
+            for item in markdown_list.items:
+                item_style = BULLET_STYLES[item.marker]
+                if style == 'consistent':
+                    style = item_style
+                if item_style != style:
+                    violations.append(self.detail_violation(item.line_nr, style, item_style))
+        return violations
+
+
+class ListIndent(FileRule):
+    """Rule: The items of a list should all be indented the same."""
+    name = "list-indent"
+    id = "MD005"
+    description = "Inconsistent indentation for list items at the same level"
+    tags = ('bullet', 'ul', 'indentation')
+
+    def validate(self, document):
+        violations = []
+        for markdown_list in document.lists:
+            for item in markdown_list.items[1:]:
+                if item.indent != markdown_list.indent:
+                    violations.append(self.detail_violation(item.line_nr, markdown_list.indent, item.indent))
+        return violations
+
+
+class UlStartLeft(FileRule):
+    """Rule: Top level bulleted lists should start at the beginning of the line."""
+    name = "ul-start-left"
+    id = "MD006"
+    description = "Consider starting bulleted lists at the beginning of the line"
+    tags = ('bullet', 'ul', 'indentation')
+
+    def validate(self, document):
+        return [self.detail_violation(markdown_list.line_nr, 0, markdown_list.indent)
+                for markdown_list in document.top_level_lists
+                if not markdown_list.ordered and markdown_list.indent]
+
+
+class UlIndent(FileRule):
+    """Rule: Bulleted lists inside bulleted lists should be indented by (default) 2 spaces a level."""
+    name = "ul-indent"
+    id = "MD007"
+    description = "Unordered list indentation"
+    tags = ('bullet', 'ul', 'indentation')
+    options_spec = [IntOption("indent", 2, "Spaces for each level of indentation")]
+
+    def validate(self, document):
+        violations = []
+        indent = self.options['indent'].value
+        for markdown_list in document.lists:
+            if markdown_list.nesting and not markdown_list.ordered and markdown_list.parents_unordered:
+                expected = markdown_list.nesting * indent
+                if markdown_list.indent != expected:
+                    violation = self.detail_violation(markdown_list.line_nr, expected, markdown_list.indent)
+                    violation.error_range = [1, markdown_list.indent + 1]
+                    violations.append(violation)
+        return violations
 
 
 class TrailingWhiteSpace(LineRule):
     """Rule: No line may have trailing whitespace."""
-    name = "trailing-whitespace"
+    name = "no-trailing-spaces"
     id = "MD009"
+    description = "Trailing spaces"
+    tags = ('whitespace',)
     error_str = "Line has trailing whitespace"
 
     def validate(self, line):
@@ -111,8 +221,10 @@ class TrailingWhiteSpace(LineRule):
 
 class HardTab(LineRule):
     """Rule: No line may contain tab (\\t) characters."""
-    name = "hard-tab"
+    name = "no-hard-tabs"
     id = "MD010"
+    description = "Hard tabs"
+    tags = ('whitespace', 'hard_tab')
     error_str = "Line contains hard tab characters (\\t)"
 
     def validate(self, line):
@@ -120,14 +232,330 @@ class HardTab(LineRule):
             return RuleViolation(self.id, self.error_str)
 
 
+class ReversedLink(FileRule):
+    """Rule: Links should be [text](url), not (text)[url]."""
+    name = "no-reversed-links"
+    id = "MD011"
+    description = "Reversed link syntax"
+    tags = ('links',)
+
+    def validate(self, document):
+        violations = []
+        for line_nr, line in document.inline_lines():
+            for match in REVERSED_LINK_RE.finditer(line):
+                violations.append(self.violation(line_nr, context=match.group(0),
+                                                 error_range=[match.start() + 1, len(match.group(0))]))
+        return violations
+
+
 class MaxLineLengthRule(LineRule):
     """Rule: No line may exceed 80 (default) characters in length."""
-    name = "max-line-length"
+    name = "line-length"
     id = "MD013"
-    options_spec = [IntOption('line-length', 80, "Max line length")]
+    description = "Line length"
+    tags = ('line_length',)
+    options_spec = [IntOption('line_length', 80, "Max line length")]
     error_str = "Line exceeds max length ({0}>{1})"
 
     def validate(self, line):
-        max_length = self.options['line-length'].value
+        max_length = self.options['line_length'].value
         if len(line) > max_length:
             return RuleViolation(self.id, self.error_str.format(len(line), max_length))
+
+
+class CommandsShowOutput(FileRule):
+    """Rule: Code blocks of just commands shouldn't start them with dollar signs."""
+    name = "commands-show-output"
+    id = "MD014"
+    description = "Dollar signs used before commands without showing output"
+    tags = ('code',)
+
+    def validate(self, document):
+        violations = []
+        for code_block in document.code_blocks:
+            lines = [line for line in code_block.lines if line.strip()]
+            if lines and all(DOLLAR_COMMAND_RE.match(line) for line in lines):
+                violations.append(self.violation(code_block.line_nr, context=lines[0].strip()))
+        return violations
+
+
+class NoMissingSpaceAtx(FileRule):
+    """Rule: There should be a space after the hashes of an atx style header."""
+    name = "no-missing-space-atx"
+    id = "MD018"
+    description = "No space after hash on atx style header"
+    tags = ('headers', 'atx', 'spaces')
+
+    def validate(self, document):
+        return [self.violation(line_nr, context=line)
+                for line_nr, line in enumerate(document.lines, start=1)
+                if document.kind(line_nr) == 'paragraph'
+                    and ATX_MISSING_SPACE_RE.match(line) and not line.rstrip().endswith('#')]
+
+
+class NoMultipleSpaceAtx(FileRule):
+    """Rule: There should only be one space after the hashes of an atx style header."""
+    name = "no-multiple-space-atx"
+    id = "MD019"
+    description = "Multiple spaces after hash on atx style header"
+    tags = ('headers', 'atx', 'spaces')
+
+    def validate(self, document):
+        violations = []
+        for heading in document.headings:
+            line = document.line(heading.line_nr).lstrip()
+            if heading.style == 'atx' and ATX_MULTIPLE_SPACES_RE.match(line):
+                violations.append(self.violation(heading.line_nr, context=line.strip()))
+        return violations
+
+
+class NoMissingSpaceClosedAtx(FileRule):
+    """Rule: There should be spaces inside the hashes of a closed atx style header."""
+    name = "no-missing-space-closed-atx"
+    id = "MD020"
+    description = "No space inside hashes on closed atx style header"
+    tags = ('headers', 'atx_closed', 'spaces')
+
+    def validate(self, document):
+        violations = []
+        for line_nr, line in enumerate(document.lines, start=1):
+            if document.kind(line_nr) in ('paragraph', 'heading'):
+                match = ATX_CLOSED_RE.match(line.strip())
+                if match and (not match.group(2) or not match.group(4)):
+                    violations.append(self.violation(line_nr, context=line.strip()))
+        return violations
+
+
+class NoMultipleSpaceClosedAtx(FileRule):
+    """Rule: There should only be one space inside the hashes of a closed atx style header."""
+    name = "no-multiple-space-closed-atx"
+    id = "MD021"
+    description = "Multiple spaces inside hashes on closed atx style header"
+    tags = ('headers', 'atx_closed', 'spaces')
+
+    def validate(self, document):
+        violations = []
+        for heading in document.headings:
+            if heading.style == 'atx_closed':
+                match = ATX_CLOSED_RE.match(document.line(heading.line_nr).strip())
+                if match and (len(match.group(2)) > 1 or len(match.group(4)) > 1):
+                    violations.append(self.violation(heading.line_nr, context=match.group(0)))
+        return violations
+
+
+class BlanksAroundHeaders(FileRule):
+    """Rule: Headers should have a blank line (or the start or end of the file) before and after them."""
+    name = "blanks-around-headers"
+    id = "MD022"
+    description = "Headers should be surrounded by blank lines"
+    tags = ('headers', 'blank_lines')
+
+    def validate(self, document):
+        return [self.violation(heading.line_nr, context=document.line(heading.line_nr).strip())
+                for heading in document.headings
+                if not document.is_blank(heading.line_nr - 1) or not document.is_blank(heading.end_line_nr + 1)]
+
+
+class HeaderStartLeft(FileRule):
+    """Rule: Headers shouldn't be indented."""
+    name = "header-start-left"
+    id = "MD023"
+    description = "Headers must start at the beginning of the line"
+    tags = ('headers', 'spaces')
+
+    def validate(self, document):
+        violations = []
+        for heading in document.headings:
+            line = document.line(heading.line_nr)
+            if line[:1] in (' ', '\t'):
+                violations.append(self.violation(heading.line_nr, context=line.strip(),
+                                                 error_range=[1, len(line) - len(line.lstrip())]))
+        return violations
+
+
+class OlPrefix(FileRule):
+    """Rule: Ordered lists should be numbered in order (or all with 1)."""
+    name = "ol-prefix"
+    id = "MD029"
+    description = "Ordered list item prefix"
+    tags = ('ol',)
+    options_spec = [StrOption("style", "one_or_ordered", "List style", ('one', 'ordered', 'one_or_ordered'))]
+
+    def validate(self, document):
+        violations = []
+        style = self.options['style'].value
+        for markdown_list in document.lists:
+            if not markdown_list.ordered:
+                continue
+            list_style = style
+            if list_style == 'one_or_ordered':
+                one = len(markdown_list.items) > 1 and markdown_list.items[1].number.lstrip('0') == '1'
+                list_style = 'one' if one else 'ordered'
+            number = 1
+            for item in markdown_list.items:
+                if int(item.number) != number:
+                    violations.append(self.detail_violation(item.line_nr, number, int(item.number)))
+                if list_style == 'ordered':
+                    number += 1
+        return violations
+
+
+class BlanksAroundFences(FileRule):
+    """Rule: Fenced code blocks should have a blank line (or the start or end of the file) before and after them."""
+    name = "blanks-around-fences"
+    id = "MD031"
+    description = "Fenced code blocks should be surrounded by blank lines"
+    tags = ('code', 'blank_lines')
+
+    def validate(self, document):
+        violations = []
+        for code_block in document.code_blocks:
+            if code_block.fenced:
+                if not document.is_blank(code_block.line_nr - 1):
+                    violations.append(self.violation(code_block.line_nr,
+                                                     context=document.line(code_block.line_nr).strip()))
+                if not document.is_blank(code_block.end_line_nr + 1):
+                    violations.append(self.violation(code_block.end_line_nr,
+                                                     context=document.line(code_block.end_line_nr).strip()))
+        return violations
+
+
+class BlanksAroundLists(FileRule):
+    """Rule: Lists should have a blank line (or the start or end of the file) before and after them."""
+    name = "blanks-around-lists"
+    id = "MD032"
+    description = "Lists should be surrounded by blank lines"
+    tags = ('bullet', 'ul', 'ol', 'blank_lines')
+
+    def validate(self, document):
+        violations = []
+        for markdown_list in document.top_level_lists:
+            if not document.is_blank(markdown_list.line_nr - 1):
+                violations.append(self.violation(markdown_list.line_nr,
+                                                 context=document.line(markdown_list.line_nr).strip()))
+            if not document.is_blank(markdown_list.end_line_nr + 1):
+                violations.append(self.violation(markdown_list.end_line_nr,
+                                                 context=document.line(markdown_list.end_line_nr).strip()))
+        return violations
+
+
+class HrStyle(FileRule):
+    """Rule: Horizontal rules should all be written the same way."""
+    name = "hr-style"
+    id = "MD035"
+    description = "Horizontal rule style"
+    tags = ('hr',)
+    options_spec = [StrOption("style", "consistent", "Horizontal rule style")]
+
+    def validate(self, document):
+        violations = []
+        style = self.options['style'].value
+        for line_nr, rule_text in document.horizontal_rules:
+            if style == 'consistent':
+                style = rule_text
+            if rule_text != style:
+                violations.append(self.detail_violation(line_nr, style, rule_text))
+        return violations
+
+
+class FencedCodeLanguage(FileRule):
+    """Rule: Fenced code blocks should say what language they're in."""
+    name = "fenced-code-language"
+    id = "MD040"
+    description = "Fenced code blocks should have a language specified"
+    tags = ('code', 'language')
+
+    def validate(self, document):
+        return [self.violation(code_block.line_nr, context=document.line(code_block.line_nr).strip())
+                for code_block in document.code_blocks if code_block.fenced and not code_block.info]
+
+
+class NoEmptyLinks(FileRule):
+    """Rule: Links should go somewhere."""
+    name = "no-empty-links"
+    id = "MD042"
+    description = "No empty links"
+    tags = ('links',)
+
+    def validate(self, document):
+        violations = []
+        for line_nr, line in document.inline_lines():
+            for match in EMPTY_LINK_RE.finditer(line):
+                violations.append(self.violation(line_nr, context=match.group(0),
+                                                 error_range=[match.start() + 1, len(match.group(0))]))
+        return violations
+
+
+class RequiredHeaders(FileRule):
+    """Rule: The headers should be those given (if any), where '*' allows any headers."""
+    name = "required-headers"
+    id = "MD043"
+    description = "Required header structure"
+    tags = ('headers',)
+    options_spec = [ListOption("headers", [], "Required headers, e.g., '# Title'")]
+
+    def validate(self, document):
+        required_headers = self.options['headers'].value
+        if not required_headers:
+            return []
+        index = 0
+        optional = False
+        for heading in document.headings:
+            actual = f"{'#' * heading.level} {heading.text}"
+            expected = required_headers[index] if index < len(required_headers) else '[None]'
+            index += 1
+            if expected == '*':
+                optional = True
+            elif expected.lower() == actual.lower():
+                optional = False
+            elif optional:
+                index -= 1
+            else:
+                return [self.detail_violation(heading.line_nr, expected, actual)]
+        if index < len(required_headers):
+            return [self.violation(len(document.lines), context=required_headers[index])]
+        return []
+
+
+class ProperNames(FileRule):
+    """Rule: The given names (if any) should always be written with the given capitalization."""
+    name = "proper-names"
+    id = "MD044"
+    description = "Proper names should have the correct capitalization"
+    tags = ('spelling',)
+    options_spec = [ListOption("names", [], "Names"),
+                    BoolOption("code_blocks", True, "Include code blocks")]
+
+    def validate(self, document):
+        names = self.options['names'].value
+        if not names:
+            return []
+        code_blocks = self.options['code_blocks'].value
+        name_regexes = [(name, re.compile(rf'(?<!\w){re.escape(name)}(?!\w)', re.IGNORECASE)) for name in names]
+        violations = []
+        for line_nr, line in enumerate(document.lines, start=1):
+            if not code_blocks and document.kind(line_nr) == 'code':
+                continue
+            for name, name_regex in name_regexes:
+                for match in name_regex.finditer(line):
+                    if match.group(0) != name:
+                        violation = self.detail_violation(line_nr, name, match.group(0))
+                        violation.error_range = [match.start() + 1, len(match.group(0))]
+                        violations.append(violation)
+        return violations
+
+
+class NoAltText(FileRule):
+    """Rule: Images should have alternate text."""
+    name = "no-alt-text"
+    id = "MD045"
+    description = "Images should have alternate text (alt text)"
+    tags = ('accessibility', 'images')
+
+    def validate(self, document):
+        violations = []
+        for line_nr, line in document.inline_lines():
+            for match in NO_ALT_TEXT_RE.finditer(line):
+                violations.append(self.violation(line_nr, context=match.group(0),
+                                                 error_range=[match.start() + 1, len(match.group(0))]))
+        return violations
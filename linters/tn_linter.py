@@ -1,17 +1,50 @@
-from typing import Optional
+from typing import Optional, List, Tuple
 import os
 import re
+import io
 
 from rq_settings import prefix, debug_mode_flag
 from app_settings.app_settings import AppSettings
 from door43_tools.bible_books import BOOK_NUMBERS
 from general_tools import file_utils
+from general_tools.path_index import PathIndex
+from general_tools.pool_utils import imap_in_workers
 from linters.markdown_linter import MarkdownLinter
 from linters.linter import Linter
 from linters.py_markdown_linter.lint import MarkdownLinter as PyMarkdownLinter
 from linters.py_markdown_linter.config import LintConfig
 
 
+def find_relative_links(contents:str, extension:str) -> List[str]:
+    """
+    Returns the targets of the '](link)' links in the text that point to other files of the extension,
+        i.e., leaving out web links.
+    """
+    links = []
+    for link_match in TnLinter.link_marker_re.finditer(contents):
+        link = link_match.group(1)
+        if link:
+            if link[:4] == 'http':
+                continue
+            if link.find(extension) < 0:
+                continue
+            links.append(link)
+    return links
+
+
+def read_relative_links(args:Tuple[str,str,bool]) -> Tuple[List[str],Optional[str]]:
+    """
+    Reads the file and returns its relative links to files of the extension,
+        along with its contents (if asked for) to keep for the later checks.
+
+    This runs in the worker processes of TnLinter.find_all_invalid_links() (if there are any).
+    """
+    file_path, extension, return_contents = args
+    contents = file_utils.read_file(file_path)
+    return find_relative_links(contents, extension), (contents if return_contents else None)
+
+
+
 class TnLinter(MarkdownLinter):
 
     # match links of form '](link)'
@@ -20,6 +53,7 @@ class TnLinter(MarkdownLinter):
     def __init__(self, single_file:Optional[str]=None, *args, **kwargs) -> None:
         super(TnLinter, self).__init__(*args, **kwargs)
 
+        self.path_index = None
         self.single_file = single_file
         AppSettings.logger.debug(f"Convert single '{self.single_file}'")
         self.single_dir = None
@@ -39,13 +73,7 @@ class TnLinter(MarkdownLinter):
         """
         self.source_dir = os.path.abspath(self.source_dir)
         source_dir = self.source_dir if not self.single_dir else os.path.join(self.source_dir, self.single_dir)
-        for root, _dirs, files in os.walk(source_dir):
-            for f in files:
-                file_path = os.path.join(root, f)
-                parts = os.path.splitext(f)
-                if parts[1] == '.md':
-                    contents = file_utils.read_file(file_path)
-                    self.find_invalid_links(root, f, contents)
+        self.find_all_invalid_links(source_dir) # Not cached, as linked files may have changed even if the notes haven't
 
         for dir in BOOK_NUMBERS:
             found_files = False
@@ -72,21 +100,45 @@ class TnLinter(MarkdownLinter):
         return results
 
 
+    def find_all_invalid_links(self, source_dir:str) -> None:
+        """
+        Checks the links in all the markdown files in the folder,
+            reading the files in worker processes if there are enough of them.
+        """
+        # List the repo once so that links can be checked without a filesystem call each
+        #   (folders outside it, e.g., of the tA and tW repos, get listed when first linked to)
+        self.path_index = PathIndex(self.source_dir)
+        md_files = []
+        for root, _dirs, files in os.walk(source_dir):
+            for f in files:
+                parts = os.path.splitext(f)
+                if parts[1] == '.md':
+                    md_files.append((root, f))
+
+        num_workers = min(self.num_workers, len(md_files))
+        if num_workers > 1:
+            AppSettings.logger.debug(f"Finding links in {len(md_files):,} markdown files with {num_workers} worker processes…")
+        file_contents_cache = file_utils.file_contents_cache
+        # Files read in this process are already in the contents cache
+        return_contents = file_contents_cache is not None and num_workers > 1
+        file_args = [(os.path.join(root, f), '.md', return_contents) for root, f in md_files]
+        for (root, f), (links, contents) \
+                in zip(md_files, imap_in_workers(read_relative_links, file_args, num_workers)):
+            if contents is not None: # so that the markdown checks don't read it again
+                file_contents_cache.add(os.path.join(root, f), contents)
+            self.report_invalid_links(root, f, links)
+
+
     def find_invalid_links(self, folder:str, f:str, contents:str) -> None:
-        for link_match in TnLinter.link_marker_re.finditer(contents):
-            link = link_match.group(1)
-            if link:
-                if link[:4] == 'http':
-                    continue
-                if link.find('.md') < 0:
-                    continue
-
-                file_path = os.path.join(folder, link)
-                file_path_abs = os.path.abspath(file_path)
-                exists = os.path.exists(file_path_abs)
-                if not exists:
-                    a = self.get_file_link(f, folder)
-                    self.log.warning(f"{a}: contains invalid link: ({link})")
+        self.report_invalid_links(folder, f, find_relative_links(contents, '.md'))
+
+    def report_invalid_links(self, folder:str, f:str, links:List[str]) -> None:
+        if self.path_index is None:
+            self.path_index = PathIndex(self.source_dir)
+        for link in links:
+            if not self.path_index.exists(link, relative_to=folder):
+                a = self.get_file_link(f, folder)
+                self.log.warning(f"{a}: contains invalid link: ({link})")
 
     def get_file_link(self, f:str, folder:str):
         parts = folder.split(self.source_dir)
@@ -109,8 +161,9 @@ class TnTsvLinter(Linter):
         # NOTE: The preprocessor removes unneeded columns while fixing links
 
 
-    # def __init__(self, *args, **kwargs) -> None:
-    #     super(TnTsvLinter, self).__init__(*args, **kwargs)
+    def __init__(self, *args, **kwargs) -> None:
+        super(TnTsvLinter, self).__init__(*args, **kwargs)
+        self.path_index = None
 
 
     def lint(self) -> bool:
@@ -128,6 +181,7 @@ class TnTsvLinter(Linter):
 
         self.source_dir = os.path.abspath(self.source_dir)
         source_dir = self.source_dir
+        self.path_index = PathIndex(self.source_dir)
         for root, _dirs, files in os.walk(source_dir):
             for f in files:
                 file_path = os.path.join(root, f)
@@ -147,71 +201,12 @@ class TnTsvLinter(Linter):
                     self.log.warning(f"Missing tN tsv book: '{dir}'")
 
         # Now check tabs and C:V numbers
-        MAX_ERROR_COUNT = 20
         for filename in sorted(file_list):
             if not filename.endswith('.tsv'): continue # Skip other files
-            error_count = 0
-            AppSettings.logger.info(f"Linting {filename}…")
-            tsv_filepath = os.path.join(source_dir, filename)
-            started = False
-            expectedB = filename[-7:-4]
-            lastC = lastV = C = V = '0'
-            with open(tsv_filepath, 'rt') as tsv_file:
-                for tsv_line in tsv_file:
-                    tsv_line = tsv_line.rstrip('\n')
-                    tab_count = tsv_line.count('\t')
-                    if not started:
-                        # AppSettings.logger.debug(f"TSV header line is '{tsv_line}'")
-                        if tsv_line != 'Book	Chapter	Verse	ID	SupportReference	OrigQuote	Occurrence	GLQuote	OccurrenceNote':
-                            self.log.warning(f"Unexpected TSV header line: '{tsv_line}' in {filename}")
-                            error_count += 1
-                        started = True
-                    elif tab_count != TnTsvLinter.EXPECTED_TAB_COUNT:
-                        self.log.warning(f"Bad {expectedB} line near {C}:{V} with {tab_count} tabs (expected {TnTsvLinter.EXPECTED_TAB_COUNT})")
-                        B = C = V = _OrigQuote = OccurrenceNote = None
-                        error_count += 1
-                    else:
-                        B, C, V, _OrigQuote, OccurrenceNote = tsv_line.split('\t')
-                        if B != expectedB:
-                            self.log.warning(f"Unexpected '{B}' in '{tsv_line}' in {filename}")
-                        if not C:
-                            self.log.warning(f"Missing chapter number after {lastC}:{lastV} in {filename}")
-                        elif not C.isdigit() and C not in ('front','back'):
-                            self.log.warning(f"Bad '{C}' chapter number near verse {V} in {filename}")
-                        elif C.isdigit() and lastC.isdigit():
-                            lastCint, Cint = int(lastC), int(C)
-                            if Cint < lastCint:
-                                self.log.warning(f"Decrementing '{C}' chapter number after {lastC} in {filename}")
-                            elif Cint > lastCint+1:
-                                self.log.warning(f"Missing chapter number {lastCint+1} after {lastC} in {filename}")
-                        if C == lastC: # still in the same chapter
-                            if not V.isdigit():
-                                self.log.warning(f"Bad '{V}' verse number in chapter {C} in {filename}")
-                            elif lastV.isdigit():
-                                lastVint, Vint = int(lastV), int(V)
-                                if Vint < lastVint:
-                                    self.log.warning(f"Decrementing '{V}' verse number after {lastV} in chapter {C} in {filename}")
-                                # NOTE: Disabled because missing verse notes are expected
-                                # elif Vint > lastVint+1:
-                                    # self.log.warning(f"Missing verse number {lastVint+1} after {lastV} in chapter {C} in {filename}")
-                        else: # just started a new chapter
-                            if not V.isdigit() and V != 'intro':
-                                self.log.warning(f"Bad '{V}' verse number in start of chapter {C} in {filename}")
-                        # if OrigQuote and need_to_check_quotes:
-                        #     try: self.check_original_language_quotes(B,C,V,OrigQuote)
-                        #     except Exception as e:
-                        #         self.log.warning(f"{B} {C}:{V} Unable to check original language quotes: {e}")
-                        if OccurrenceNote:
-                            left_count, right_count = OccurrenceNote.count('['), OccurrenceNote.count(']')
-                            if left_count != right_count:
-                                self.log.warning(f"Unmatched square brackets at {B} {C}:{V} in '{OccurrenceNote}'")
-                            self.check_markdown(py_markdown_linter, OccurrenceNote, f'{B} {C}:{V}')
-                        lastC, lastV = C, V
-                        if lastC == 'front': lastC = '0'
-                        elif lastC == 'back': lastC = '999'
-                    if error_count > MAX_ERROR_COUNT:
-                        AppSettings.logger.critical("TnTsvLinter: Too many TSV count errors—aborting!")
-                        break
+            with open(os.path.join(source_dir, filename), 'rt') as tsv_file:
+                tsv_text = tsv_file.read()
+            self.lint_cached(lambda: self.lint_tsv_file(py_markdown_linter, filename, tsv_text),
+                             'lint_tsv_file', filename, tsv_text)
 
         # if prefix and debug_mode_flag:
         #     AppSettings.logger.debug(f"Temp folder '{self.preload_dir}' has been left on disk for debugging!")
@@ -221,6 +216,74 @@ class TnTsvLinter(Linter):
     # end of TnTsvLinter.lint()
 
 
+    def lint_tsv_file(self, py_markdown_linter:PyMarkdownLinter, filename:str, tsv_text:str) -> None:
+        """
+        Checks the tabs and C:V numbers (and the markdown in the notes) of the TSV file
+        """
+        MAX_ERROR_COUNT = 20
+        error_count = 0
+        AppSettings.logger.info(f"Linting {filename}…")
+        started = False
+        expectedB = filename[-7:-4]
+        lastC = lastV = C = V = '0'
+        for tsv_line in io.StringIO(tsv_text):
+            tsv_line = tsv_line.rstrip('\n')
+            tab_count = tsv_line.count('\t')
+            if not started:
+                # AppSettings.logger.debug(f"TSV header line is '{tsv_line}'")
+                if tsv_line != 'Book	Chapter	Verse	ID	SupportReference	OrigQuote	Occurrence	GLQuote	OccurrenceNote':
+                    self.log.warning(f"Unexpected TSV header line: '{tsv_line}' in {filename}")
+                    error_count += 1
+                started = True
+            elif tab_count != TnTsvLinter.EXPECTED_TAB_COUNT:
+                self.log.warning(f"Bad {expectedB} line near {C}:{V} with {tab_count} tabs (expected {TnTsvLinter.EXPECTED_TAB_COUNT})")
+                B = C = V = _OrigQuote = OccurrenceNote = None
+                error_count += 1
+            else:
+                B, C, V, _OrigQuote, OccurrenceNote = tsv_line.split('\t')
+                if B != expectedB:
+                    self.log.warning(f"Unexpected '{B}' in '{tsv_line}' in {filename}")
+                if not C:
+                    self.log.warning(f"Missing chapter number after {lastC}:{lastV} in {filename}")
+                elif not C.isdigit() and C not in ('front','back'):
+                    self.log.warning(f"Bad '{C}' chapter number near verse {V} in {filename}")
+                elif C.isdigit() and lastC.isdigit():
+                    lastCint, Cint = int(lastC), int(C)
+                    if Cint < lastCint:
+                        self.log.warning(f"Decrementing '{C}' chapter number after {lastC} in {filename}")
+                    elif Cint > lastCint+1:
+                        self.log.warning(f"Missing chapter number {lastCint+1} after {lastC} in {filename}")
+                if C == lastC: # still in the same chapter
+                    if not V.isdigit():
+                        self.log.warning(f"Bad '{V}' verse number in chapter {C} in {filename}")
+                    elif lastV.isdigit():
+                        lastVint, Vint = int(lastV), int(V)
+                        if Vint < lastVint:
+                            self.log.warning(f"Decrementing '{V}' verse number after {lastV} in chapter {C} in {filename}")
+                        # NOTE: Disabled because missing verse notes are expected
+                        # elif Vint > lastVint+1:
+                            # self.log.warning(f"Missing verse number {lastVint+1} after {lastV} in chapter {C} in {filename}")
+                else: # just started a new chapter
+                    if not V.isdigit() and V != 'intro':
+                        self.log.warning(f"Bad '{V}' verse number in start of chapter {C} in {filename}")
+                # if OrigQuote and need_to_check_quotes:
+                #     try: self.check_original_language_quotes(B,C,V,OrigQuote)
+                #     except Exception as e:
+                #         self.log.warning(f"{B} {C}:{V} Unable to check original language quotes: {e}")
+                if OccurrenceNote:
+                    left_count, right_count = OccurrenceNote.count('['), OccurrenceNote.count(']')
+                    if left_count != right_count:
+                        self.log.warning(f"Unmatched square brackets at {B} {C}:{V} in '{OccurrenceNote}'")
+                    self.check_markdown(py_markdown_linter, OccurrenceNote, f'{B} {C}:{V}')
+                lastC, lastV = C, V
+                if lastC == 'front': lastC = '0'
+                elif lastC == 'back': lastC = '999'
+            if error_count > MAX_ERROR_COUNT:
+                AppSettings.logger.critical("TnTsvLinter: Too many TSV count errors—aborting!")
+                return
+    # end of TnTsvLinter.lint_tsv_file function
+
+
     def check_markdown(self, mdLinter:PyMarkdownLinter, markdown_string:str, reference:str) -> None:
         """
         Checks the header progressions in the markdown string
@@ -262,20 +325,12 @@ class TnTsvLinter(Linter):
 
     def find_invalid_links(self, folder:str, filename:str, contents:str) -> None:
         # AppSettings.logger.debug(f"TnTsvLinter.find_invalid_links( {folder}, {f}, {contents} ) …")
-        for link_match in TnLinter.link_marker_re.finditer(contents):
-            link = link_match.group(1)
-            if link:
-                if link[:4] == 'http':
-                    continue
-                if link.find('.tsv') < 0:
-                    continue
-
-                file_path = os.path.join(folder, link)
-                file_path_abs = os.path.abspath(file_path)
-                exists = os.path.exists(file_path_abs)
-                if not exists:
-                    a = self.get_file_link(filename, folder)
-                    self.log.warning(f"{a}: contains invalid link: ({link})")
+        if self.path_index is None:
+            self.path_index = PathIndex(self.source_dir)
+        for link in find_relative_links(contents, '.tsv'):
+            if not self.path_index.exists(link, relative_to=folder):
+                a = self.get_file_link(filename, folder)
+                self.log.warning(f"{a}: contains invalid link: ({link})")
     # end of TnTsvLinter.find_invalid_links function
 
     def get_file_link(self, filename:str, folder:str) -> str:
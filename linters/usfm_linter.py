@@ -1,7 +1,9 @@
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional, Any
 import os
 import traceback
+from rq_settings import usfm_workers
 from linters.linter import Linter
+from general_tools.pool_utils import imap_in_workers
 from door43_tools.page_metrics import PageMetrics
 from tx_usfm_tools import verifyUSFM, books
 from app_settings.app_settings import AppSettings
@@ -21,11 +23,51 @@ SHOULD_ALWAYS_HAVE_TEXT_MARKERS = ( # Put longest markers ahead of shorter ones
 
 
 
+def read_usfm_file(file_path:str) -> Dict[str,Any]:
+    """
+    Returns the (left-stripped) text of the USFM book file,
+        or the exception message if it couldn't be read.
+    """
+    try:
+        with open(file_path, 'rt') as f:
+            return {'book_text': f.read().lstrip()}
+    except Exception as e:
+        return {'open_exception': str(e)}
+
+
+def verify_usfm_text(book_text:str, book_full_name:str, book_code:str, lang_code:str) -> Dict[str,Any]:
+    """
+    Returns the errors and book code found by verifyUSFM,
+        or the exception message and traceback if it failed.
+    """
+    try:
+        errors, book_code = verifyUSFM.verify_contents_quiet(book_text, book_full_name, book_code, lang_code)
+        return {'errors': errors, 'book_code': book_code}
+    except Exception as e: # for debugging
+        return {'exception': str(e), 'traceback': traceback.format_exc()}
+
+
+def verify_usfm_file(args) -> Dict[str,Any]:
+    """
+    Reads and verifies one USFM book file.
+
+    This runs in the worker processes of UsfmLinter.lint(), so rather than logging,
+        it returns the results for UsfmLinter.report_file() to log in the parent process.
+    """
+    file_path, book_full_name, book_code, lang_code = args
+    result = read_usfm_file(file_path)
+    if result.get('book_text'):
+        result['verified'] = verify_usfm_text(result['book_text'], book_full_name, book_code, lang_code)
+    return result
+
+
+
 class UsfmLinter(Linter):
 
 
-    def __init__(self, single_file:Optional[str]=None, *args, **kwargs) -> None:
+    def __init__(self, single_file:Optional[str]=None, *args, num_workers:int=usfm_workers, **kwargs) -> None:
         self.single_file = single_file
+        self.num_workers = num_workers
         self.found_books = []
         super(UsfmLinter, self).__init__(*args, **kwargs)
 
@@ -44,6 +86,7 @@ class UsfmLinter(Linter):
         if not valid_lang_code:
             self.log.warning(f"Invalid language code: {lang_code}")
 
+        usfm_files = []
         for root, _dirs, files in os.walk(self.source_dir):
             for filename in sorted(files):
                 if os.path.splitext(filename)[1].lower() != '.usfm':  # only usfm files
@@ -52,9 +95,41 @@ class UsfmLinter(Linter):
                 if self.single_file and (filename != self.single_file):
                     continue
 
-                AppSettings.logger.debug(f"Linting {filename} …")
                 file_path = os.path.join(root, filename)
                 sub_path = '.' + file_path[len(self.source_dir):]
+                usfm_files.append((file_path, sub_path, filename))
+
+        num_workers = min(self.num_workers, len(usfm_files))
+        if num_workers > 1:
+            book_ids = [self.get_book_ids(filename) for _file_path, _sub_path, filename in usfm_files]
+            cached_results = {}
+            if self.lint_cache: # Only verify the books that have changed since they were last linted
+                for (file_path, _sub_path, _filename), (book_code, book_full_name) in zip(usfm_files, book_ids):
+                    result = read_usfm_file(file_path)
+                    if result.get('book_text'):
+                        result['verified'] = self.get_cached_verification(result['book_text'], book_full_name, book_code, lang_code)
+                        if result['verified'] is not None:
+                            cached_results[file_path] = result
+            book_args = [(file_path, book_full_name, book_code, lang_code)
+                            for (file_path, _sub_path, _filename), (book_code, book_full_name)
+                                in zip(usfm_files, book_ids)
+                                if file_path not in cached_results]
+            AppSettings.logger.debug(f"Linting {len(book_args)} books with {num_workers} worker processes…")
+            # The books take a while each, so send them to the workers one at a time
+            verified_results = imap_in_workers(verify_usfm_file, book_args, num_workers, chunk_size=1)
+            for (file_path, sub_path, filename), (book_code, book_full_name) in zip(usfm_files, book_ids):
+                if file_path in cached_results:
+                    result = cached_results[file_path]
+                else:
+                    result = next(verified_results)
+                    if result.get('verified'):
+                        self.save_verification(result['book_text'], book_full_name, book_code, lang_code,
+                                               result['verified'])
+                AppSettings.logger.debug(f"Linting {filename} …")
+                self.report_file(sub_path, filename, book_full_name, book_code, result)
+        else:
+            for file_path, sub_path, filename in usfm_files:
+                AppSettings.logger.debug(f"Linting {filename} …")
                 self.parse_file(file_path, sub_path, filename)
 
         if not self.found_books:
@@ -66,19 +141,46 @@ class UsfmLinter(Linter):
     def parse_file(self, file_path:str, sub_path:str, file_name:str) -> None:
 
         book_code, book_full_name = self.get_book_ids(file_name)
-
-        try:
-            f = open(file_path, 'rt')
-            book_text = f.read().lstrip()
-            if book_text:
-                self.parse_usfm_text(sub_path, file_name, book_text, book_full_name, book_code)
-            else:
-                self.log.warning(f"USFM book '{file_name}' seems empty")
-        except Exception as e:
-            self.log.warning(f"Failed to open USFM book '{file_name}', exception: {e}")
+        self.report_file(sub_path, file_name, book_full_name, book_code, read_usfm_file(file_path))
     # end of parse_file function
 
 
+    def report_file(self, sub_path:str, file_name:str, book_full_name:str, book_code:str,
+                                result:Dict[str,Any]) -> None:
+        """
+        Logs the warnings for a USFM book file read by read_usfm_file() or verify_usfm_file().
+        """
+        if 'open_exception' in result:
+            self.log.warning(f"Failed to open USFM book '{file_name}', exception: {result['open_exception']}")
+        elif result['book_text']:
+            self.parse_usfm_text(sub_path, file_name, result['book_text'], book_full_name, book_code,
+                                    verified=result.get('verified'))
+        else:
+            self.log.warning(f"USFM book '{file_name}' seems empty")
+    # end of report_file function
+
+
+    def get_cached_verification(self, book_text:str, book_full_name:str, book_code:str, lang_code:str) \
+                                                                                    -> Optional[Dict[str,Any]]:
+        """
+        Returns the verify_usfm_text() results saved in the lint cache for the same book text (and ids),
+            or None if there aren't any.
+        """
+        if not self.lint_cache:
+            return None
+        return self.lint_cache.get(self.lint_cache.get_hash('verify_usfm_text',
+                                                            book_text, book_full_name, book_code, lang_code))
+    # end of get_cached_verification function
+
+
+    def save_verification(self, book_text:str, book_full_name:str, book_code:str, lang_code:str,
+                                verified:Dict[str,Any]) -> None:
+        if self.lint_cache and 'exception' not in verified: # Failures get tried again next time
+            self.lint_cache.put(self.lint_cache.get_hash('verify_usfm_text',
+                                                         book_text, book_full_name, book_code, lang_code), verified)
+    # end of save_verification function
+
+
     @staticmethod
     def get_book_ids(usfm_filename:str) -> Tuple[str,str]:
         """
@@ -126,16 +228,32 @@ class UsfmLinter(Linter):
 
 
     def parse_usfm_text(self, sub_path:str, file_name:str,
-                                book_text:str, book_full_name:str, book_code:str) -> None:
+                                book_text:str, book_full_name:str, book_code:str,
+                                verified:Optional[Dict[str,Any]]=None) -> None:
         """
+        If the book has already been verified (by verify_usfm_file() in a worker process),
+            the verify_usfm_text() results are passed in as verified.
         """
         if not book_text:
             self.log.warning(f"{book_code} - No USFM text found")
             return
 
-        try:
-            lang_code = self.rc.resource.language.identifier
-            errors, book_code = verifyUSFM.verify_contents_quiet(book_text, book_full_name, book_code, lang_code)
+        if verified is None:
+            try:
+                lang_code = self.rc.resource.language.identifier
+            except Exception as e: # for debugging
+                verified = {'exception': str(e), 'traceback': traceback.format_exc()}
+            else:
+                verified = self.get_cached_verification(book_text, book_full_name, book_code, lang_code)
+                if verified is None:
+                    verified = verify_usfm_text(book_text, book_full_name, book_code, lang_code)
+                    self.save_verification(book_text, book_full_name, book_code, lang_code, verified)
+
+        if 'exception' in verified:
+            self.log.warning(f"Failed to verify book '{file_name}', exception: {verified['exception']}")
+            print(f"Failed to verify USFM book '{file_name}', exception: {verified['exception']}: {verified['traceback']}")
+        else:
+            errors, book_code = verified['errors'], verified['book_code']
 
             # if found_book_code:
             #     book_code = found_book_code
@@ -149,10 +267,6 @@ class UsfmLinter(Linter):
                 for error in errors:
                     self.log.warning(error)
 
-        except Exception as e: # for debugging
-            self.log.warning(f"Failed to verify book '{file_name}', exception: {e}")
-            print(f"Failed to verify USFM book '{file_name}', exception: {e}: {traceback.format_exc()}")
-
         # RJH added checks for USFM lines without content (Dec 2019)
         # TODO: Ideally this should go in
         C = V = '0'
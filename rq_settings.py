@@ -28,3 +28,9 @@ WORKER_NAME = getenv('WORKER_NAME', 'worker-1')
 
 # Our stuff
 debug_mode_flag = getenv('DEBUG_MODE', 'True').lower() not in ['false', 'f', '', 0]
+pdf_workers = int(getenv('PDF_WORKERS', '1')) # Number of processes used to render the books of a PDF job
+usfm_workers = int(getenv('USFM_WORKERS', '4')) # Number of processes used to lint the books of a USFM job and convert them to HTML
+markdown_workers = int(getenv('MARKDOWN_WORKERS', '4')) # Number of processes used to lint the files of a markdown job
+concurrent_stages_flag = getenv('CONCURRENT_STAGES', 'False').lower() not in ['false', 'f', '', 0] # Lint (in another process) while converting
+lint_timeout = int(getenv('LINT_TIMEOUT', '300')) # Seconds that linting can take (if concurrent) before it's stopped
+convert_timeout = int(getenv('CONVERT_TIMEOUT', '3600')) # Seconds that converting can take (if concurrent) before it's stopped
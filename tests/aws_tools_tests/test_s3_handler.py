@@ -104,3 +104,49 @@ from aws_tools.s3_handler import S3Handler
 #     #     handler.put_contents(key, contents)
 #     #     file_contents = handler.get_file_contents(key)
 #     #     self.assertEqual(file_contents.decode(), contents)
+
+
+@mock_s3
+class S3HandlerUploadTests(TestCase):
+    MOCK_BUCKET_NAME = 'test-bucket'
+
+    resources_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'resources')
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp(prefix='tX_test_s3Handler_')
+        self.handler = S3Handler(bucket_name=self.MOCK_BUCKET_NAME)
+        self.handler.resource.create_bucket(Bucket=self.MOCK_BUCKET_NAME, CreateBucketConfiguration={'LocationConstraint': 'us-west-2'})
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_upload_file(self):
+        self.handler.upload_file(os.path.join(self.resources_dir, 'test_file.zip'), 'test/me/out.zip')
+        self.assert_uploaded(os.path.join(self.resources_dir, 'test_file.zip'), 'test/me/out.zip', 'application/zip', 600)
+
+    def test_upload_file_in_parts(self):
+        big_file = os.path.join(self.temp_dir, 'big.zip')
+        with open(big_file, 'wb') as f:
+            for i in range(11):
+                f.write(bytes([i]) * 1024 * 1024)
+        self.handler.upload_file_in_parts(big_file, 'test/me/big.zip', cache_time=0, part_size_mb=5, num_threads=3)
+        self.assert_uploaded(big_file, 'test/me/big.zip', 'application/zip', 0)
+        e_tag = self.handler.resource.Object(self.MOCK_BUCKET_NAME, 'test/me/big.zip').e_tag
+        self.assertTrue(e_tag.endswith('-3"'), e_tag) # Sent as three parts
+
+        # Files no bigger than a part are sent all at once
+        small_file = os.path.join(self.resources_dir, 'test_file.zip')
+        self.handler.upload_file_in_parts(small_file, 'test/me/small.zip', content_type='text/plain', num_threads=1)
+        self.assert_uploaded(small_file, 'test/me/small.zip', 'text/plain', 600)
+        e_tag = self.handler.resource.Object(self.MOCK_BUCKET_NAME, 'test/me/small.zip').e_tag
+        self.assertNotIn('-', e_tag)
+
+    def assert_uploaded(self, path, key, content_type, cache_time):
+        downloaded_file = os.path.join(self.temp_dir, 'downloaded')
+        self.handler.download_file(key, downloaded_file)
+        with open(path, 'rb') as f, open(downloaded_file, 'rb') as downloaded_f:
+            self.assertEqual(f.read(), downloaded_f.read())
+        s3_object = self.handler.resource.Object(self.MOCK_BUCKET_NAME, key)
+        self.assertEqual(s3_object.content_type, content_type)
+        self.assertEqual(s3_object.cache_control, f'max-age={cache_time}')
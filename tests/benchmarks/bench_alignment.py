@@ -0,0 +1,128 @@
+"""
+Benchmark of finding the ULT alignments of all the TN quotes of a book, as TsvPdfConverter.get_aligned_text does,
+    comparing the old way (trying every quote combination at every milestone)
+    with the per-verse milestone index.
+
+By default a synthetic book the size of Genesis is used, but real data can be given, e.g.,
+    python3 -m tests.benchmarks.bench_alignment <ult chapter JSON folder, e.g., .../bibles/ult/v40/gen> <en_tn_01-GEN.tsv>
+
+Run with: python3 -m tests.benchmarks.bench_alignment
+"""
+import os
+import re
+import sys
+import csv
+import random
+from time import perf_counter
+
+from general_tools import alignment_tools
+from general_tools.file_utils import load_json_object
+
+NUM_CHAPTERS = 50
+NUM_VERSES = 30
+NUM_MILESTONES = 18 # Top-level milestones per verse
+NOTES_PER_VERSE = 4
+
+
+def make_word(rand):
+    letters = 'αβγδεζηθικλμνξοπρστυφχψω'
+    return ''.join(rand.choice(letters) for _ in range(rand.randint(2, 8)))
+
+
+def make_book():
+    """
+    Returns {chapter: {verse: verse objects}} and a list of (chapter, verse, quote, occurrence) notes.
+    """
+    rand = random.Random(1)
+    vocabulary = [make_word(rand) for _ in range(400)]
+    book = {}
+    notes = []
+    for chapter in range(1, NUM_CHAPTERS+1):
+        book[str(chapter)] = {}
+        for verse in range(1, NUM_VERSES+1):
+            verse_objects = []
+            source_words = []
+            occurrences = {}
+            for _ in range(NUM_MILESTONES):
+                words = [rand.choice(vocabulary) for _ in range(rand.choice([1, 1, 1, 2, 3]))]
+                content = ' '.join(words)
+                occurrences[content] = occurrences.get(content, 0) + 1
+                children = [{'tag': 'w', 'type': 'word', 'text': 'gloss', 'occurrence': 1, 'occurrences': 1}]
+                if rand.random() < 0.2: # Nested milestone
+                    nested_word = rand.choice(vocabulary)
+                    children = [{'tag': 'zaln', 'type': 'milestone', 'content': nested_word, 'occurrence': 1,
+                                 'occurrences': 1, 'children': children}]
+                    source_words.append(nested_word)
+                verse_objects.append({'tag': 'zaln', 'type': 'milestone', 'content': content,
+                                      'occurrence': occurrences[content], 'occurrences': 1, 'children': children})
+                verse_objects.append({'type': 'text', 'text': ' '})
+                source_words += words
+            book[str(chapter)][str(verse)] = verse_objects
+            for _ in range(NOTES_PER_VERSE):
+                start = rand.randrange(len(source_words))
+                quote = ' '.join(source_words[start:start + rand.randint(1, 6)])
+                if rand.random() < 0.2:
+                    later = rand.randrange(start, len(source_words))
+                    quote += '…' + source_words[later]
+                notes.append((str(chapter), str(verse), quote, 1))
+    return book, notes
+
+
+def load_book(chapters_dir, tn_filepath):
+    book = {}
+    for filename in os.listdir(chapters_dir):
+        if re.match(r'^\d+\.json$', filename):
+            chapter_data = load_json_object(os.path.join(chapters_dir, filename))
+            book[filename[:-5]] = {verse: data['verseObjects'] for verse, data in chapter_data.items()}
+    notes = []
+    with open(tn_filepath, encoding='utf-8') as tn_file:
+        for row in csv.DictReader(tn_file, dialect='excel-tab', quoting=csv.QUOTE_NONE):
+            chapter, _, verse = row['Reference'].partition(':')
+            if row['Quote'] and chapter in book and verse in book[chapter]:
+                notes.append((chapter, verse, row['Quote'], int(row['Occurrence'] or 1)))
+    return book, notes
+
+
+def get_alignment_by_combinations(verse_objects, quote, occurrence=1):
+    # What get_alignment() used to do
+    quote = alignment_tools.split_string_into_quote(quote, occurrence)
+    alignment = []
+    for group in quote:
+        quote_combinations = alignment_tools.get_quote_combinations(group)
+        alignment += alignment_tools.get_alignment_by_combinations(verse_objects, group, quote_combinations)
+    for phrase in quote:
+        for word in phrase:
+            if 'found' not in word and re.sub(rf'[{alignment_tools.punctuation}]', '', word['word']):
+                return None
+    return alignment
+
+
+def main():
+    if len(sys.argv) == 3:
+        book, notes = load_book(sys.argv[1], sys.argv[2])
+    else:
+        book, notes = make_book()
+
+    start = perf_counter()
+    old_alignments = [get_alignment_by_combinations(book[chapter][verse], quote, occurrence)
+                      for chapter, verse, quote, occurrence in notes]
+    combinations_time = perf_counter() - start
+
+    start = perf_counter()
+    indexes = {}
+    new_alignments = []
+    for chapter, verse, quote, occurrence in notes:
+        if (chapter, verse) not in indexes:
+            indexes[(chapter, verse)] = alignment_tools.get_verse_alignment_index(book[chapter][verse])
+        new_alignments.append(alignment_tools.get_alignment(book[chapter][verse], quote, occurrence,
+                                                            indexes[(chapter, verse)]))
+    indexed_time = perf_counter() - start
+
+    assert new_alignments == old_alignments
+    num_found = sum(1 for alignment in new_alignments if alignment)
+    print(f'{len(notes):,} quotes ({num_found:,} aligned): '
+          f'by combinations {combinations_time:.2f}s, indexed {indexed_time:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
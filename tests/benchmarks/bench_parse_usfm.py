@@ -0,0 +1,70 @@
+"""
+Benchmark of tokenizing USFM with the hand-written scanner in tx_usfm_tools.parseUsfm
+    compared with the pyparsing grammar, on Psalms (from the en_ulb linter test data)
+    and on a synthetic aligned book like the first chapters of the UGNT's Matthew
+    (pyparsing takes minutes on a whole aligned book).
+
+Real books can be given instead, e.g.,
+    python3 -m tests.benchmarks.bench_parse_usfm <.../el-x-koine_ugnt/41-MAT.usfm> …
+
+Run with: python3 -m tests.benchmarks.bench_parse_usfm
+"""
+import os
+import sys
+import random
+import zipfile
+from time import perf_counter
+
+from tx_usfm_tools import parseUsfm
+
+EN_ULB_ZIP = os.path.join(os.path.dirname(__file__), '..', 'linter_tests', 'resources', 'en_ulb.zip')
+NUM_CHAPTERS = 4
+NUM_VERSES = 40
+WORDS_PER_VERSE = 20
+
+
+def load_psalms():
+    with zipfile.ZipFile(EN_ULB_ZIP) as zip_file:
+        name = [name for name in zip_file.namelist() if name.endswith('19-PSA.usfm')][0]
+        return name, zip_file.read(name).decode('utf-8')
+
+
+def make_aligned_book():
+    rand = random.Random(1)
+    letters = 'αβγδεζηθικλμνξοπρστυφχψω'
+    lines = ['\\id MAT EL-X-KOINE_UGNT', '\\usfm 3.0', '\\h Matthew', '\\mt Matthew']
+    for chapter in range(1, NUM_CHAPTERS + 1):
+        lines += [f'\\c {chapter}', '\\p']
+        for verse in range(1, NUM_VERSES + 1):
+            lines.append(f'\\v {verse}')
+            for _ in range(WORDS_PER_VERSE):
+                word = ''.join(rand.choice(letters) for _ in range(rand.randint(2, 8)))
+                lines.append(f'\\w {word}|lemma="{word}" strong="G{rand.randint(1, 5000):04}0" '
+                             f'x-morph="Gr,N,,,,,NMS,"\\w*{rand.choice(["", ",", "."])}')
+    return 'synthetic aligned MAT', '\n'.join(lines) + '\n'
+
+
+def time_parse(usfm, use_pyparsing):
+    start = perf_counter()
+    tokens = parseUsfm.parseString(usfm, usePyparsing=use_pyparsing)
+    return perf_counter() - start, tokens
+
+
+def main():
+    if len(sys.argv) > 1:
+        books = [(path, open(path, encoding='utf-8').read()) for path in sys.argv[1:]]
+    else:
+        books = [load_psalms(), make_aligned_book()]
+
+    for name, usfm in books:
+        pyparsing_time, pyparsing_tokens = time_parse(usfm, True)
+        scanner_time, scanner_tokens = time_parse(usfm, False)
+        same = [(token.type, token.value) for token in pyparsing_tokens] == \
+               [(token.type, token.value) for token in scanner_tokens]
+        print(f'{name} ({len(usfm):,} chars, {len(scanner_tokens):,} tokens): '
+              f'pyparsing {pyparsing_time:.2f}s, scanner {scanner_time:.3f}s'
+              f'{"" if same else " -- TOKENS DIFFER!"}')
+
+
+if __name__ == '__main__':
+    main()
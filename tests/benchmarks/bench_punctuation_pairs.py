@@ -0,0 +1,160 @@
+"""
+Benchmark of the punctuation pair checks with the single-pass scanner of find_punctuation_pair_warnings()
+    compared with the counting and character-by-character walk that it replaced,
+    on 10 MB of synthetic translationNotes, both as one text and note by note (as the linters check them).
+
+The markdown files of a real TN repo can be given instead, e.g.,
+    python3 -m tests.benchmarks.bench_punctuation_pairs <.../en_tn>
+
+Run with: python3 -m tests.benchmarks.bench_punctuation_pairs
+"""
+import os
+import re
+import sys
+import random
+from time import perf_counter
+from typing import List
+
+from linters.linter import find_punctuation_pair_warnings
+
+TOTAL_CHARS = 10_000_000
+
+
+def find_punctuation_pair_warnings_by_walking(some_text:str, ref:str, allow_close_parenthesis_points=False) -> List[str]:
+    """
+    What find_punctuation_pair_warnings() gives, worked out as check_punctuation_pairs() used to:
+        counting each pair separately and then walking the text character by character.
+
+    Kept here for checking and benchmarking the scanner against (see also tests/linter_tests/test_linter.py).
+    """
+    warnings = []
+    punctuation_pairs_to_check = (('(',')'), ('[',']'), ('{','}'), ('**_','_**'))
+
+    found_any_paired_chars = False
+    # found_mismatch = False
+    for pairStart,pairEnd in punctuation_pairs_to_check:
+        pairStartCount = some_text.count(pairStart)
+        pairEndCount   = some_text.count(pairEnd)
+        if pairStartCount or pairEndCount:
+            found_any_paired_chars = True
+        if pairStartCount > pairEndCount:
+            warnings.append(f"{ref}: Possible missing closing '{pairEnd}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
+            # found_mismatch = True
+        elif pairEndCount > pairStartCount:
+            if allow_close_parenthesis_points:
+                # possible_points_list = re.findall(r'\s\d\) ', some_text)
+                # if possible_points_list: print("possible_points_list", possible_points_list)
+                possible_point_count = len(re.findall(r'\s\d\) ', some_text))
+                pairEndCount -= possible_point_count
+            if pairEndCount > pairStartCount: # still
+                warnings.append(f"{ref}: Possible missing opening '{pairStart}' — found {pairStartCount} '{pairStart}' but {pairEndCount} '{pairEnd}'")
+            # found_mismatch = True
+    if found_any_paired_chars: # and not found_mismatch:
+        # Double-check the nesting
+        lines = some_text.split('\n')
+        nestingString = ''
+        line_number = 1
+        for ix, char in enumerate(some_text):
+            if char in '({[':
+                nestingString += char
+            elif char in ')}]':
+                if char == ')': wanted_start_char = '('
+                elif char == '}': wanted_start_char = '{'
+                elif char == ']': wanted_start_char = '['
+                if nestingString and nestingString[-1] == wanted_start_char:
+                    nestingString = nestingString[:-1] # Close off successful match
+                else: # not the closing that we expected
+                    if char==')' \
+                    and ix>0 and some_text[ix-1].isdigit() \
+                    and ix<len(some_text)-1 and some_text[ix+1] in ' \t':
+                        # This could be part of a list like 1) ... 2) ...
+                        pass # Just ignore this—at least they'll still get the above mismatched count message
+                    else:
+                        locateString = f" after recent '{nestingString[-1]}'" if nestingString else ''
+                        warnings.append(f"{ref} line {line_number:,}: Possible nesting error—found unexpected '{char}'{locateString} near {lines[line_number-1]}")
+            elif char == '\n':
+                line_number += 1
+        if nestingString: # handle left-overs
+            reformatted_nesting_string = "'" + "', '".join(nestingString) + "'"
+            warnings.append(f"{ref}: Seem to have the following unclosed field(s): {reformatted_nesting_string}")
+    # NOTE: Notifying all those is probably overkill,
+    #  but never mind (it might help detect multiple errors)
+
+    # These are markdown specific checks, but hopefully shouldn't hurt to be done for all strings
+    # They don't seem to be picked up by the markdown linter libraries for some reason.
+    for field,regex in ( # Put longest ones first
+                    # Seems that the fancy ones (commented out) don't find occurrences at the start (or end?) of the text
+                    ('___', r'___'),
+                    # ('___', r'[^_]___[^_]'), # three underlines
+                    ('***', r'\*\*\*'),
+                    # ('***', r'[^\*]\*\*\*[^\*]'), # three asterisks
+                    ('__', r'__'),
+                    # ('__', r'[^_]__[^_]'), # two underlines
+                    ('**', r'\*\*'),
+                    # ('**', r'[^\*]\*\*[^\*]'), # two asterisks
+                ):
+        count = len(re.findall(regex, some_text)) # Finds all NON-OVERLAPPING matches
+        if count:
+            # print(f"check_punctuation_pairs found {count} of '{field}' at {ref} in '{some_text}'")
+            if (count % 2) != 0:
+                # print(f"{ref}: Seem to have have mismatched '{field}' pairs in '{some_text}'")
+                content_snippet = some_text if len(some_text) < 85 \
+                                    else f"{some_text[:40]} …… {some_text[-40:]}"
+                warnings.append(f"{ref}: Seem to have have mismatched '{field}' pairs in '{content_snippet}'")
+                break # Only want one warning per text
+    return warnings
+# end of find_punctuation_pair_warnings_by_walking function
+
+
+def make_notes():
+    # About as many brackets as in the real notes (one every 50 or so characters)
+    rand = random.Random(1)
+    words = ['the', 'man', 'said', 'to', 'them', 'God', 'is', 'good', 'and', 'they', 'went', 'out', 'of', 'that',
+             'this', 'here', 'means', 'could', 'be', 'translated', 'as', '“What', 'is', 'this?”', '**Paul**']
+    phrases = ['(See: [[rc://en/ta/man/translate/figs-idiom]])', '[Acts 9:3](../09/03.md)', '(1:4)', '{implied}']
+    notes, total_chars = [], 0
+    while total_chars < TOTAL_CHARS:
+        lines = ['# ' + ' '.join(rand.choice(words) for _ in range(rand.randint(2, 6))), '']
+        for _ in range(rand.randint(1, 4)):
+            lines.append(' '.join(rand.choice(phrases) if rand.random() < 0.03 else rand.choice(words)
+                                  for _ in range(rand.randint(20, 80))))
+            lines.append('')
+        if rand.random() < 0.05:
+            lines.append('Either: 1) this or 2) that') # Some notes list points
+        if rand.random() < 0.05:
+            lines.append('A broken (link](../10/01.md) here') # and some have mistakes
+        note = '\n'.join(lines)
+        notes.append(note)
+        total_chars += len(note)
+    return notes
+
+
+def read_notes(folder):
+    notes = []
+    for root, _dirs, files in os.walk(folder):
+        for filename in sorted(files):
+            if filename.endswith('.md'):
+                with open(os.path.join(root, filename), 'rt') as md_file:
+                    notes.append(md_file.read())
+    return notes
+
+
+def measure(function, notes):
+    start = perf_counter()
+    warnings = [function(note, 'ref', True) for note in notes]
+    return warnings, perf_counter() - start
+
+
+def main():
+    notes = read_notes(sys.argv[1]) if len(sys.argv) > 1 else make_notes()
+    text = '\n'.join(notes)
+    for name, texts in ((f'{len(notes):,} notes', notes), (f'one {len(text):,} character text', [text])):
+        walking_warnings, walking_time = measure(find_punctuation_pair_warnings_by_walking, texts)
+        scanning_warnings, scanning_time = measure(find_punctuation_pair_warnings, texts)
+        print(f'{name}: walking {walking_time:.3f}s, scanning {scanning_time:.3f}s '
+              f'({walking_time/scanning_time:.0f}x faster)'
+              f'{"" if scanning_warnings == walking_warnings else " -- WARNINGS DIFFER!"}')
+
+
+if __name__ == '__main__':
+    main()
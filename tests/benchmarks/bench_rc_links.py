@@ -0,0 +1,59 @@
+"""
+Benchmark of looking up RCs by article id, as get_toc_html_from_soup does for every section header,
+    on a synthetic book of 50,000 TN RCs.
+
+Run with: python3 -m tests.benchmarks.bench_rc_links
+"""
+from time import perf_counter
+
+from converters.pdf.rc_link import ResourceContainerLink, ResourceContainerLinks
+
+NUM_RCS = 50_000
+NUM_LINEAR_LOOKUPS = 500 # The linear scan is far too slow to do them all
+
+
+def make_rcs():
+    rcs = ResourceContainerLinks()
+    chapter = verse = 1
+    for n in range(NUM_RCS):
+        rc = ResourceContainerLink(f'rc://en/tn/help/psa/{chapter:03}/{verse:03}/n{n:05}')
+        rcs[rc.rc_link] = rc
+        verse += 1
+        if verse > 30:
+            chapter, verse = chapter + 1, 1
+    return rcs
+
+
+def linear_lookup(rcs, article_id):
+    # What PdfConverter.get_rc_by_article_id used to do
+    for rc_link, rc in rcs.items():
+        if rc.article_id == article_id:
+            return rc
+
+
+def main():
+    rcs = make_rcs()
+    article_ids = [rc.article_id for rc in rcs.values()]
+
+    start = perf_counter()
+    for article_id in article_ids[-NUM_LINEAR_LOOKUPS:]:
+        assert linear_lookup(rcs, article_id)
+    linear_time = (perf_counter() - start) / NUM_LINEAR_LOOKUPS * NUM_RCS
+
+    start = perf_counter()
+    for article_id in article_ids:
+        assert rcs.get_by_article_id(article_id)
+    indexed_time = perf_counter() - start
+
+    print(f'{NUM_RCS:,} lookups: linear scan ~{linear_time:.1f}s (extrapolated), indexed {indexed_time:.3f}s')
+
+    source_rc = ResourceContainerLink('rc://en/ta/man/translate/figs-metaphor')
+    start = perf_counter()
+    for rc in rcs.values():
+        source_rc.add_reference(rc)
+        source_rc.add_reference(rc)
+    print(f'{2*NUM_RCS:,} add_reference calls: {perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
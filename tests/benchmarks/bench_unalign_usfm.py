@@ -0,0 +1,81 @@
+"""
+Benchmark of unaligning USFM with the single-pass unalign_usfm() compared with the regex passes it replaced,
+    on a synthetic aligned book the size of the ULT's Matthew.
+
+Real books can be given instead, e.g.,
+    python3 -m tests.benchmarks.bench_unalign_usfm <.../en_ult/41-MAT.usfm> …
+
+Run with: python3 -m tests.benchmarks.bench_unalign_usfm
+"""
+import sys
+import random
+import tracemalloc
+from time import perf_counter
+
+from general_tools.usfm_utils import unalign_usfm, iter_unaligned_usfm, _unalign_usfm_by_regex
+
+NUM_CHAPTERS = 28
+NUM_VERSES = 38
+WORDS_PER_VERSE = 25
+
+
+def make_aligned_book():
+    rand = random.Random(1)
+    letters = 'αβγδεζηθικλμνξοπρστυφχψω'
+    english = ['the', 'man', 'said', 'to', 'them', 'God', 'is', 'good', 'and', 'they', 'went', 'out', 'of']
+    punctuation = ['', '', ',', '.', '"']
+    lines = ['\\id MAT EN_ULT en_English_ltr unfoldingWord Literal Text', '\\usfm 3.0', '\\h Matthew', '\\mt Matthew']
+    for chapter in range(1, NUM_CHAPTERS + 1):
+        lines += ['', '\\s5', f'\\c {chapter}', '\\p']
+        for verse in range(1, NUM_VERSES + 1):
+            lines.append(f'\\v {verse}')
+            for _ in range(WORDS_PER_VERSE):
+                word = ''.join(rand.choice(letters) for _ in range(rand.randint(2, 8)))
+                lines.append(f'\\zaln-s |x-strong="G{rand.randint(1, 5000):04}0" x-lemma="{word}" x-morph="Gr,N,,,,,NMS," '
+                             f'x-occurrence="1" x-occurrences="1" x-content="{word}"\\*'
+                             f'\\w {rand.choice(english)}|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*'
+                             f'{rand.choice(punctuation)}')
+            if rand.random() < 0.1:
+                lines.append('\\ts\\*')
+    return 'synthetic aligned MAT', '\n'.join(lines) + '\n'
+
+
+def unalign_by_regex(aligned_usfm):
+    return _unalign_usfm_by_regex(aligned_usfm).strip()
+
+
+def stream_unaligned(aligned_usfm):
+    # As a caller writing out each chapter would use it
+    return sum(len(usfm) for usfm in iter_unaligned_usfm(aligned_usfm))
+
+
+def measure(function, usfm):
+    start = perf_counter()
+    result = function(usfm)
+    seconds = perf_counter() - start
+    tracemalloc.start()
+    function(usfm)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    if len(sys.argv) > 1:
+        books = [(path, open(path, encoding='utf-8').read()) for path in sys.argv[1:]]
+    else:
+        books = [make_aligned_book()]
+
+    for name, usfm in books:
+        regex_usfm, regex_time, regex_peak = measure(unalign_by_regex, usfm)
+        single_pass_usfm, single_pass_time, single_pass_peak = measure(unalign_usfm, usfm)
+        _length, stream_time, stream_peak = measure(stream_unaligned, usfm)
+        print(f'{name} ({len(usfm):,} chars): '
+              f'regex passes {regex_time:.3f}s (peak {regex_peak/1e6:.1f} MB), '
+              f'single pass {single_pass_time:.3f}s (peak {single_pass_peak/1e6:.1f} MB), '
+              f'streamed {stream_time:.3f}s (peak {stream_peak/1e6:.1f} MB)'
+              f'{"" if single_pass_usfm == regex_usfm else " -- OUTPUT DIFFERS!"}')
+
+
+if __name__ == '__main__':
+    main()
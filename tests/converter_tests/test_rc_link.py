@@ -0,0 +1,97 @@
+import pickle
+import unittest
+from mock import mock
+
+from converters.pdf.rc_link import ResourceContainerLink, ResourceContainerLinks
+
+
+class TestResourceContainerLink(unittest.TestCase):
+
+    def test_parse(self):
+        rc = ResourceContainerLink('rc://en/ta/translate/figs-metaphor')
+        self.assertEqual(rc.type, 'man')
+        self.assertEqual(rc.rc_link, 'rc://en/ta/man/translate/figs-metaphor')
+        self.assertEqual(rc.article_id, 'en-ta-man-translate-figs-metaphor')
+
+    def test_add_reference_keeps_order_without_duplicates(self):
+        rc = ResourceContainerLink('rc://en/tw/dict/bible/kt/god')
+        for rc_link in ['rc://en/tn/help/gen/01/01', 'rc://en/tn/help/gen/01/03', 'rc://en/tn/help/gen/01/01']:
+            rc.add_reference(ResourceContainerLink(rc_link))
+        self.assertEqual(list(rc.references), ['rc://en/tn/help/gen/01/01', 'rc://en/tn/help/gen/01/03'])
+
+
+class TestResourceContainerLinks(unittest.TestCase):
+
+    def test_get_by_article_id(self):
+        rcs = ResourceContainerLinks()
+        for verse in range(1, 4):
+            rc = ResourceContainerLink(f'rc://en/tn/help/gen/01/{verse:03}')
+            rcs[rc.rc_link] = rc
+        self.assertEqual(rcs.get_by_article_id('en-tn-help-gen-01-002').verse, '002')
+        self.assertIsNone(rcs.get_by_article_id('en-tn-help-gen-01-004'))
+
+        # The index follows changes to the dict
+        rc = ResourceContainerLink('rc://en/tn/help/gen/01/004')
+        rcs[rc.rc_link] = rc
+        self.assertIs(rcs.get_by_article_id('en-tn-help-gen-01-004'), rc)
+        del rcs[rc.rc_link]
+        self.assertIsNone(rcs.get_by_article_id('en-tn-help-gen-01-004'))
+
+    def test_get_by_changed_article_id(self):
+        rc = ResourceContainerLink('rc://en/ta/man/translate/figs-metaphor')
+        rcs = ResourceContainerLinks({rc.rc_link: rc})
+        self.assertIs(rcs.get_by_article_id('en-ta-man-translate-figs-metaphor'), rc)
+        rc.set_article_id('metaphor')
+        self.assertIs(rcs.get_by_article_id('metaphor'), rc)
+
+    def test_first_match_wins(self):
+        first = ResourceContainerLink('rc://en/tn/help/gen/01/001', article_id='same')
+        second = ResourceContainerLink('rc://en/tn/help/gen/01/002', article_id='same')
+        rcs = ResourceContainerLinks({first.rc_link: first, second.rc_link: second})
+        self.assertIs(rcs.get_by_article_id('same'), first)
+
+    def test_inherited_dict_methods_update_index(self):
+        first = ResourceContainerLink('rc://en/tn/help/gen/01/001')
+        second = ResourceContainerLink('rc://en/tn/help/gen/01/002')
+        third = ResourceContainerLink('rc://en/tn/help/gen/01/003')
+        rcs = ResourceContainerLinks()
+        self.assertIs(rcs.setdefault(first.rc_link, first), first)
+        self.assertIs(rcs.get_by_article_id(first.article_id), first)
+        rcs |= {second.rc_link: second}
+        self.assertIs(rcs.get_by_article_id(second.article_id), second)
+        self.assertEqual(rcs.popitem(), (first.rc_link, first))
+        self.assertIsNone(rcs.get_by_article_id(first.article_id))
+        rcs.update({third.rc_link: third})
+        self.assertEqual(list(rcs), [second.rc_link, third.rc_link])
+        rcs.clear()
+        self.assertIsNone(rcs.get_by_article_id(second.article_id))
+
+    def test_only_own_changes_rebuild_index(self):
+        rc = ResourceContainerLink('rc://en/ta/man/translate/figs-metaphor')
+        other_rc = ResourceContainerLink('rc://en/ta/man/translate/figs-simile')
+        rcs = ResourceContainerLinks({rc.rc_link: rc})
+        other_rcs = ResourceContainerLinks({rc.rc_link: rc, other_rc.rc_link: other_rc})
+        rcs.get_by_article_id('metaphor')
+        other_rcs.get_by_article_id('simile')
+        with mock.patch.object(ResourceContainerLinks, 'reindex', autospec=True,
+                               side_effect=ResourceContainerLinks.reindex) as mock_reindex:
+            other_rc.set_article_id('simile')
+            self.assertIsNone(rcs.get_by_article_id('simile'))
+            self.assertIs(other_rcs.get_by_article_id('simile'), other_rc)
+            self.assertEqual(mock_reindex.call_count, 1) # Only other_rcs had to rebuild its index
+            rc.set_article_id('metaphor')
+            self.assertIs(rcs.get_by_article_id('metaphor'), rc)
+            self.assertIs(other_rcs.get_by_article_id('metaphor'), rc)
+            self.assertEqual(mock_reindex.call_count, 3)
+
+    def test_pickle_link_in_collection(self):
+        rc = ResourceContainerLink('rc://en/ta/man/translate/figs-metaphor', article='<h1>Metaphor</h1>')
+        rcs = ResourceContainerLinks({rc.rc_link: rc})
+        self.assertIs(rcs.get_by_article_id(rc.article_id), rc)
+        errors = pickle.loads(pickle.dumps({'source_rc': rc}))
+        unpickled_rc = errors['source_rc']
+        self.assertEqual((unpickled_rc.rc_link, unpickled_rc.article), (rc.rc_link, rc.article))
+        unpickled_rc.set_article_id('metaphor') # Doesn't touch the original's collection
+        self.assertIs(rcs.get_by_article_id(rc.article_id), rc)
+        other_rcs = ResourceContainerLinks({unpickled_rc.rc_link: unpickled_rc})
+        self.assertIs(other_rcs.get_by_article_id('metaphor'), unpickled_rc)
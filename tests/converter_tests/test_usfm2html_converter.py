@@ -4,7 +4,7 @@ import unittest
 import shutil
 from contextlib import closing
 
-from converters.usfm2html_converter import Usfm2HtmlConverter
+from converters.usfm2html_converter import Usfm2HtmlConverter, convert_usfm_book
 from general_tools.file_utils import remove_tree, unzip, remove_file
 from app_settings.app_settings import AppSettings
 
@@ -211,6 +211,21 @@ class TestUsfmHtmlConverter(unittest.TestCase):
         print("results6", results)
         self.assertTrue(results['success'])
 
+    def test_convert_usfm_book(self):
+        """Converts a single book in memory, as each worker process does."""
+        zip_file = os.path.join(self.resources_dir, '51-PHP.zip')
+        self.in_dir = tempfile.mkdtemp(prefix='udb_in_', dir=self.temp_dir)
+        unzip(zip_file, self.in_dir)
+        usfm_file = [os.path.join(root, name) for root, dirs, names in os.walk(self.in_dir)
+                     for name in names if name.endswith('.usfm')][0]
+        template_html = '<html><head><title></title></head><body><div id="content"></div></body></html>'
+        result = convert_usfm_book((usfm_file, template_html, 'Bible'))
+        self.assertTrue(result['success'])
+        self.assertEqual(result['html_filename'], '51-PHP.html')
+        self.assertEqual(result['warnings'], [])
+        self.assertIn('<title>Bible</title>', result['html'])
+        self.assertIn('id="content"><h1>', result['html'].replace('\n', ''))
+
     def test_bad_source(self):
         """This tests giving a bad source to the converter"""
         with closing(Usfm2HtmlConverter('bad_subject', 'bad_resource')) as tx:
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+import unittest
+from mock import mock
+from dcs_api_client.rest import ApiException
+
+from door43_tools.catalog_client import CatalogClient, is_fixed_ref
+
+
+class CatalogClientTest(unittest.TestCase):
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_catalog_client_')
+        self.catalog_api = mock.MagicMock()
+        self.repo_api = mock.MagicMock()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_memoizes_calls(self):
+        self.catalog_api.catalog_search.return_value = 'results'
+        client = CatalogClient(self.catalog_api, self.repo_api, cache_dir='')
+        for _ in range(3):
+            self.assertEqual(client.catalog_search(subject='Bible', owner=['unfoldingWord', 'PCET']), 'results')
+        self.assertEqual(self.catalog_api.catalog_search.call_count, 1)
+        client.catalog_search(subject='Bible', owner=['unfoldingWord'])
+        self.assertEqual(self.catalog_api.catalog_search.call_count, 2)
+        self.assertEqual((client.hits, client.misses), (2, 2))
+
+    def test_caches_not_found(self):
+        self.catalog_api.catalog_get_entry.side_effect = ApiException(status=404, reason='Not Found')
+        client = CatalogClient(self.catalog_api, self.repo_api, cache_dir='')
+        for _ in range(2):
+            with self.assertRaises(ApiException) as context:
+                client.catalog_get_entry('unfoldingWord', 'en_xyz', 'master')
+            self.assertEqual(context.exception.status, 404)
+        self.assertEqual(self.catalog_api.catalog_get_entry.call_count, 1)
+
+    def test_does_not_cache_server_errors(self):
+        self.catalog_api.catalog_get_entry.side_effect = ApiException(status=500, reason='Oops')
+        client = CatalogClient(self.catalog_api, self.repo_api, cache_dir='')
+        for _ in range(2):
+            self.assertRaises(ApiException, client.catalog_get_entry, 'unfoldingWord', 'en_ult', 'master')
+        self.assertEqual(self.catalog_api.catalog_get_entry.call_count, 2)
+
+    def test_ttl_expiry(self):
+        self.repo_api.repo_get.return_value = 'repo'
+        client = CatalogClient(self.catalog_api, self.repo_api, ttl=-1, cache_dir='')
+        client.repo_get('unfoldingWord', 'en_ult')
+        client.repo_get('unfoldingWord', 'en_ult')
+        self.assertEqual(self.repo_api.repo_get.call_count, 2)
+
+    def test_disk_cache_shared_between_clients(self):
+        self.repo_api.repo_get_all_commits.return_value = ['commit']
+        first_client = CatalogClient(self.catalog_api, self.repo_api, cache_dir=self.tmp_dir)
+        first_client.repo_get_all_commits('unfoldingWord', 'en_ult', sha='0123456789abcdef0123456789abcdef01234567', limit=1)
+        second_client = CatalogClient(self.catalog_api, self.repo_api, cache_dir=self.tmp_dir)
+        self.assertEqual(second_client.repo_get_all_commits('unfoldingWord', 'en_ult', sha='0123456789abcdef0123456789abcdef01234567', limit=1),
+                         ['commit'])
+        self.assertEqual(self.repo_api.repo_get_all_commits.call_count, 1)
+
+    def test_branches_not_cached(self):
+        self.repo_api.repo_get_all_commits.return_value = ['commit']
+        self.repo_api.repo_get_contents.return_value = 'manifest'
+        client = CatalogClient(self.catalog_api, self.repo_api, cache_dir=self.tmp_dir)
+        for _ in range(2):
+            client.repo_get_all_commits('unfoldingWord', 'en_ult', sha='master', limit=1)
+            client.repo_get_contents('unfoldingWord', 'en_ult', 'manifest.yaml', ref='master')
+            client.repo_get_contents('unfoldingWord', 'en_ult', 'manifest.yaml')
+            client.repo_get_contents('unfoldingWord', 'en_ult', 'manifest.yaml', ref='0123456789abcdef0123456789abcdef01234567')
+        self.assertEqual(self.repo_api.repo_get_all_commits.call_count, 2)
+        self.assertEqual(self.repo_api.repo_get_contents.call_count, 5)
+
+    def test_is_fixed_ref(self):
+        self.assertTrue(is_fixed_ref('0123456789abcdef0123456789abcdef01234567'))
+        for ref in (None, '', 'master', 'main', 'develop', 'fix-links', 'v12', 'v2-draft', '2024', 'deadbeef'):
+            self.assertFalse(is_fixed_ref(ref), ref)
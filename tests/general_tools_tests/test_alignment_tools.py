@@ -0,0 +1,85 @@
+import re
+import unittest
+
+from general_tools import alignment_tools
+
+
+def milestone(content, children, occurrence=1):
+    return {'tag': 'zaln', 'type': 'milestone', 'content': content, 'occurrence': occurrence, 'occurrences': 1,
+            'children': children, 'endTag': 'zaln-e\\*'}
+
+
+def word(text, occurrence=1):
+    return {'tag': 'w', 'type': 'word', 'text': text, 'occurrence': occurrence, 'occurrences': 1}
+
+
+def text(text):
+    return {'type': 'text', 'text': text}
+
+
+# TIT 1:1 (shortened) as aligned in the ULT
+VERSE_OBJECTS = [
+    milestone('Παῦλος', [word('Paul')]),
+    text(', '),
+    milestone('δοῦλος', [word('a'), text(' '), word('servant')]),
+    text(' '),
+    milestone('Θεοῦ', [word('of'), text(' '), word('God')]),
+    text(' '),
+    milestone('δὲ', [word('and')]),
+    text(' '),
+    milestone('ἀπόστολος', [word('an'), text(' '), word('apostle')]),
+    text(' '),
+    milestone('Ἰησοῦ', [milestone('Χριστοῦ', [word('of'), text(' '), word('Jesus'), text(' '), word('Christ')])]),
+    text(', '),
+    milestone('κατὰ πίστιν', [word('for'), text(' '), word('the'), text(' '), word('faith')]),
+    text(' '),
+    milestone('ἐκλεκτῶν', [word('of'), text(' '), word('the'), text(' '), word('chosen')]),
+    text(' '),
+    milestone('Θεοῦ', [word('of', 2), text(' '), word('God', 2)], occurrence=2),
+]
+
+
+class AlignmentToolsTests(unittest.TestCase):
+
+    def get_alignment_by_combinations(self, verse_objects, quote, occurrence=1):
+        # How get_alignment() used to find the alignment, by trying every quote combination at each milestone
+        quote = alignment_tools.split_string_into_quote(quote, occurrence)
+        alignment = []
+        for group in quote:
+            quote_combinations = alignment_tools.get_quote_combinations(group)
+            alignment += alignment_tools.get_alignment_by_combinations(verse_objects, group, quote_combinations)
+        for phrase in quote:
+            for word in phrase:
+                if 'found' not in word and re.sub(rf'[{alignment_tools.punctuation}]', '', word['word']):
+                    return None
+        return alignment
+
+    def test_get_verse_alignment_index(self):
+        index = alignment_tools.get_verse_alignment_index(VERSE_OBJECTS)
+        self.assertEqual(index[('Θεοῦ', 1)], [(4,)])
+        self.assertEqual(index[('Θεοῦ', 2)], [(16,)])
+        self.assertEqual(index[('Χριστοῦ', 1)], [(10, 0)])
+        self.assertNotIn(('Θεοῦ', 3), index)
+
+    def test_get_alignment(self):
+        self.assertEqual(alignment_tools.flatten_alignment(alignment_tools.get_alignment(VERSE_OBJECTS, 'Παῦλος')),
+                         'Paul')
+        self.assertEqual(alignment_tools.flatten_alignment(alignment_tools.get_alignment(VERSE_OBJECTS, 'Θεοῦ', 2)),
+                         'of God')
+        self.assertEqual(alignment_tools.flatten_alignment(alignment_tools.get_alignment(VERSE_OBJECTS, 'κατὰ πίστιν')),
+                         'for the faith')
+        self.assertEqual(alignment_tools.flatten_alignment(
+            alignment_tools.get_alignment(VERSE_OBJECTS, 'δοῦλος Θεοῦ δὲ')), 'a servant of God and')
+        self.assertEqual(alignment_tools.flatten_alignment(
+            alignment_tools.get_alignment(VERSE_OBJECTS, 'Παῦλος…ἀπόστολος')), 'Paul…an apostle')
+        self.assertIsNone(alignment_tools.get_alignment(VERSE_OBJECTS, 'Τίτῳ'))
+        self.assertIsNone(alignment_tools.get_alignment(VERSE_OBJECTS, 'Θεοῦ', 3))
+
+    def test_get_alignment_same_as_by_combinations(self):
+        index = alignment_tools.get_verse_alignment_index(VERSE_OBJECTS)
+        for quote, occurrence in [('Παῦλος', 1), ('Θεοῦ', 1), ('Θεοῦ', 2), ('Ἰησοῦ Χριστοῦ', 1), ('κατὰ', 1),
+                                  ('πίστιν ἐκλεκτῶν Θεοῦ', 1), ('δὲ…κατὰ πίστιν', 1), ('Παῦλος, δοῦλος', 1),
+                                  ('Ἰησοῦ', 1), ('Τίτῳ', 1)]:
+            with self.subTest(quote=quote, occurrence=occurrence):
+                self.assertEqual(alignment_tools.get_alignment(VERSE_OBJECTS, quote, occurrence, index),
+                                 self.get_alignment_by_combinations(VERSE_OBJECTS, quote, occurrence))
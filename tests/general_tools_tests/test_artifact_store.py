@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from moto import mock_s3
+
+from aws_tools.s3_handler import S3Handler
+from general_tools.artifact_store import LocalArtifactStore, S3ArtifactStore, get_artifact_store, put_build_manifest
+from general_tools.file_utils import write_file, read_file
+
+
+class LocalArtifactStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_artifact_store_')
+        self.store = LocalArtifactStore(os.path.join(self.tmp_dir, 'store'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_put_and_get_file(self):
+        source_file = os.path.join(self.tmp_dir, 'en_tn_01-GEN_v86.pdf')
+        write_file(source_file, 'PDF')
+        self.store.put_file(source_file, 'TsvPdfConverter/unfoldingWord/en_tn/en_tn_01-GEN/pdf')
+        restored_file = os.path.join(self.tmp_dir, 'en_tn_01-GEN_v87.pdf')
+        self.assertTrue(self.store.get_file('TsvPdfConverter/unfoldingWord/en_tn/en_tn_01-GEN/pdf', restored_file))
+        self.assertEqual(read_file(restored_file), 'PDF')
+        self.assertFalse(self.store.get_file('TsvPdfConverter/unfoldingWord/en_tn/en_tn_02-EXO/pdf', restored_file))
+
+    def test_put_and_get_json(self):
+        self.assertIsNone(self.store.get_json('en_tn_01-GEN/manifest.json'))
+        self.store.put_json('en_tn_01-GEN/manifest.json', {'inputs': {'tn:tn_GEN.tsv': 'abc'}})
+        self.assertEqual(self.store.get_json('en_tn_01-GEN/manifest.json'), {'inputs': {'tn:tn_GEN.tsv': 'abc'}})
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir, 'store', 'en_tn_01-GEN')), ['manifest.json'])
+
+    def test_put_build_manifest_deletes_previous_build(self):
+        source_file = os.path.join(self.tmp_dir, 'en_tn_01-GEN.pdf')
+        write_file(source_file, 'PDF')
+        key_prefix = 'TsvPdfConverter/unfoldingWord/en_tn/en_tn_01-GEN'
+        # A manifest from before builds had their own keys
+        self.store.put_file(source_file, f'{key_prefix}/pdf')
+        self.store.put_json(f'{key_prefix}/manifest.json', {'artifacts': ['pdf']})
+        for build in ('first', 'first', 'second'):
+            self.store.put_file(source_file, f'{key_prefix}/{build}/pdf')
+            put_build_manifest(self.store, key_prefix, {'build': build, 'artifacts': ['pdf']})
+            self.assertEqual(sorted(os.listdir(os.path.join(self.tmp_dir, 'store', *key_prefix.split('/')))),
+                             sorted([build, 'manifest.json']))
+        self.assertEqual(self.store.get_json(f'{key_prefix}/manifest.json')['build'], 'second')
+
+    def test_get_artifact_store(self):
+        self.assertIsNone(get_artifact_store(''))
+        store = get_artifact_store(os.path.join(self.tmp_dir, 'other'))
+        self.assertIsInstance(store, LocalArtifactStore)
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp_dir, 'other')))
+
+
+@mock_s3
+class S3ArtifactStoreTests(unittest.TestCase):
+    MOCK_BUCKET_NAME = 'test-artifacts'
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_artifact_store_')
+        s3_handler = S3Handler(bucket_name=self.MOCK_BUCKET_NAME)
+        s3_handler.resource.create_bucket(Bucket=self.MOCK_BUCKET_NAME, CreateBucketConfiguration={'LocationConstraint': 'us-west-2'})
+        self.store = S3ArtifactStore(s3_handler, 'pdf')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_delete(self):
+        source_file = os.path.join(self.tmp_dir, 'en_tn_01-GEN.pdf')
+        write_file(source_file, 'PDF')
+        for key in ('en_tn_01-GEN/first/pdf', 'en_tn_01-GEN/first/html', 'en_tn_01-GEN/first2/pdf', 'en_tn_01-GEN/pdf'):
+            self.store.put_file(source_file, key)
+        self.store.delete_prefix('en_tn_01-GEN/first')
+        self.store.delete('en_tn_01-GEN/pdf')
+        self.store.delete('en_tn_01-GEN/not_there')
+        keys = [s3_object.key for s3_object in self.store.s3_handler.bucket.objects.all()]
+        self.assertEqual(keys, ['pdf/en_tn_01-GEN/first2/pdf'])
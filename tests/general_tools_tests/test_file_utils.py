@@ -99,6 +99,34 @@ class FileUtilsTests(unittest.TestCase):
             tmpf.write("hello world")
         self.assertEqual(file_utils.read_file(self.tmp_file), "hello world")
 
+    def test_read_file_with_contents_cache(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_file_utils_')
+        file_path = os.path.join(self.tmp_dir, '01.md')
+        file_utils.write_file(file_path, '# One')
+        with file_utils.use_file_contents_cache() as file_contents_cache:
+            with file_utils.use_file_contents_cache() as nested_file_contents_cache:
+                self.assertIs(nested_file_contents_cache, file_contents_cache)
+            self.assertIs(file_utils.file_contents_cache, file_contents_cache)
+            self.assertEqual(file_utils.read_file(file_path), '# One')
+            self.assertEqual(file_utils.read_file(file_path), '# One')
+            self.assertEqual((file_contents_cache.miss_count, file_contents_cache.hit_count), (1, 1))
+            file_utils.write_file(file_path, '# Changed')
+            os.utime(file_path, ns=(0, 0)) # In case it was written within the same clock tick
+            self.assertEqual(file_utils.read_file(file_path), '# Changed')
+            self.assertEqual(file_contents_cache.miss_count, 2)
+        self.assertIsNone(file_utils.file_contents_cache)
+
+    def test_file_contents_cache_size(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_file_utils_')
+        file_contents_cache = file_utils.FileContentsCache(max_chars=25, max_file_chars=10)
+        for n, text in enumerate(('a' * 10, 'b' * 10, 'c' * 11, 'd' * 10)):
+            file_path = os.path.join(self.tmp_dir, f'{n}.txt')
+            file_utils.write_file(file_path, text)
+            self.assertEqual(file_contents_cache.read_file(file_path), text)
+        # The first file has been dropped to make room for the last one, and the too long one was never kept
+        self.assertEqual([os.path.basename(file_path) for file_path in file_contents_cache.texts], ['1.txt', '3.txt'])
+        self.assertEqual(file_contents_cache.total_chars, 20)
+
     def test_write_file(self):
         _, self.tmp_file = tempfile.mkstemp(prefix='tX_test_')
         file_utils.write_file(self.tmp_file, "hello world")
@@ -171,6 +199,26 @@ class FileUtilsTests(unittest.TestCase):
         self.assertTrue(any(self.paths_equal('subdir', d) for d in subdirs))
         self.assertTrue(any(self.paths_equal('subdir/subdir/', d) for d in subdirs))
 
+    def test_get_file_hash(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_file_utils_')
+        tmp_file = os.path.join(self.tmp_dir, 'tn_GEN.tsv')
+        file_utils.write_file(tmp_file, 'Reference\tID')
+        self.assertEqual(file_utils.get_file_hash(tmp_file),
+                         'cfa32f38f934e7cc6972847d1506fa1987e9b3b3396e29d6552a1e32f0ed4c3e')
+        self.assertIsNone(file_utils.get_file_hash(os.path.join(self.tmp_dir, 'missing.tsv')))
+        self.assertIsNone(file_utils.get_file_hash(self.tmp_dir))
+
+    def test_get_dir_hash(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_file_utils_')
+        file_utils.write_file(os.path.join(self.tmp_dir, 'gen', '01', '01.md'), 'In the beginning')
+        file_utils.write_file(os.path.join(self.tmp_dir, 'gen', '01', '02.md'), 'The earth')
+        dir_hash = file_utils.get_dir_hash(os.path.join(self.tmp_dir, 'gen'))
+        self.assertEqual(dir_hash, file_utils.get_dir_hash(os.path.join(self.tmp_dir, 'gen')))
+        # Renaming a file changes the hash even though the contents are the same
+        os.rename(os.path.join(self.tmp_dir, 'gen', '01', '02.md'), os.path.join(self.tmp_dir, 'gen', '01', '03.md'))
+        self.assertNotEqual(dir_hash, file_utils.get_dir_hash(os.path.join(self.tmp_dir, 'gen')))
+        self.assertIsNone(file_utils.get_dir_hash(os.path.join(self.tmp_dir, 'exo')))
+
     @staticmethod
     def paths_equal(path1, path2):
         return os.path.normpath(path1) == os.path.normpath(path2)
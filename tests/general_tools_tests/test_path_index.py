@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from general_tools.path_index import PathIndex
+
+
+class PathIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_path_index_')
+        self.repo_dir = os.path.join(self.tmp_dir, 'en_tn')
+        self.other_repo_dir = os.path.join(self.tmp_dir, 'en_ta')
+        for folder in (os.path.join(self.repo_dir, 'gen', '01'), os.path.join(self.other_repo_dir, 'translate')):
+            os.makedirs(folder)
+        for file_path in (os.path.join(self.repo_dir, 'gen', '01', '01.md'),
+                          os.path.join(self.other_repo_dir, 'translate', 'figs-idiom.md')):
+            with open(file_path, 'wt') as f:
+                f.write('text')
+        os.symlink(os.path.join(self.tmp_dir, 'nowhere'), os.path.join(self.repo_dir, 'broken.md'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_exists_like_os_path(self):
+        path_index = PathIndex(self.repo_dir)
+        folder = os.path.join(self.repo_dir, 'gen', '01')
+        for link in ('01.md', '02.md', '../01', '../01/01.md', './../../gen/01/01.md', '../../broken.md',
+                     '01.md/../01.md', '../../../en_ta/translate/figs-idiom.md', '../../../en_ta/checking/x.md',
+                     '../../../en_ta/translate/figs-idiom.md/x.md', '../../../../../../../..'):
+            self.assertEqual(path_index.exists(link, relative_to=folder),
+                             os.path.exists(os.path.abspath(os.path.join(folder, link))), link)
+
+    def test_lists_each_folder_once(self):
+        path_index = PathIndex(self.repo_dir)
+        self.assertEqual(sorted(path_index.listings),
+                         [self.repo_dir, os.path.join(self.repo_dir, 'gen'), os.path.join(self.repo_dir, 'gen', '01')])
+        other_folder = os.path.join(self.other_repo_dir, 'translate')
+        self.assertTrue(path_index.exists(os.path.join(other_folder, 'figs-idiom.md')))
+        self.assertIn(other_folder, path_index.listings)
+        # Later changes aren't seen once the folder is listed
+        os.remove(os.path.join(other_folder, 'figs-idiom.md'))
+        self.assertTrue(path_index.exists(os.path.join(other_folder, 'figs-idiom.md')))
@@ -0,0 +1,21 @@
+import os
+import unittest
+
+from general_tools.pool_utils import imap_in_workers
+
+
+def square_with_pid(n):
+    return n * n, os.getpid()
+
+
+class PoolUtilsTests(unittest.TestCase):
+
+    def test_imap_in_workers(self):
+        results = list(imap_in_workers(square_with_pid, range(50), 3))
+        self.assertEqual([square for square, _pid in results], [n * n for n in range(50)])
+        self.assertNotIn(os.getpid(), {pid for _square, pid in results})
+
+    def test_imap_in_this_process(self):
+        for num_workers, args_list in ((1, range(5)), (4, [7]), (4, [])):
+            results = list(imap_in_workers(square_with_pid, args_list, num_workers))
+            self.assertEqual(results, [(n * n, os.getpid()) for n in args_list])
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from mock import mock
+
+from general_tools.repo_cache import RepoCache, ENTRY_INFO_FILENAME
+
+
+class RepoCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_repo_cache_')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.download_dir = os.path.join(self.tmp_dir, 'download')
+        os.mkdir(self.download_dir)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_zip(self, repo_name, contents):
+        zip_filepath = os.path.join(self.tmp_dir, f'{repo_name}.zip')
+        with zipfile.ZipFile(zip_filepath, 'w') as zf:
+            zf.writestr(f'{repo_name}/manifest.yaml', contents)
+        return zip_filepath
+
+    def test_put_and_get(self):
+        cache = RepoCache(cache_dir=self.cache_dir, max_bytes=1024*1024)
+        self.assertIsNone(cache.get('unfoldingWord', 'en_ult', 'master', 'abcdef1234567890'))
+        entry_dir = cache.put_zip('unfoldingWord', 'en_ult', 'master', 'abcdef1234567890',
+                                  self.make_zip('en_ult', 'hello'))
+        self.assertEqual(cache.get('unfoldingWord', 'en_ult', 'master', 'abcdef1234'), entry_dir)
+        self.assertTrue(os.path.isfile(os.path.join(entry_dir, 'en_ult', 'manifest.yaml')))
+        # A different commit on the same branch is a different entry
+        self.assertIsNone(cache.get('unfoldingWord', 'en_ult', 'master', '0123456789'))
+
+    def test_checkout(self):
+        cache = RepoCache(cache_dir=self.cache_dir, max_bytes=1024*1024)
+        zip_filepath = self.make_zip('en_tw', 'words')
+        with mock.patch('general_tools.repo_cache.download_file',
+                        side_effect=lambda url, outfile: shutil.copy(zip_filepath, outfile)) as mock_download:
+            for _ in range(2):
+                self.assertTrue(cache.checkout('unfoldingWord', 'en_tw', 'v20', '1111111111',
+                                               'https://example.com/en_tw.zip', self.download_dir))
+            self.assertEqual(mock_download.call_count, 1)
+        with open(os.path.join(self.download_dir, 'en_tw', 'manifest.yaml')) as f:
+            self.assertEqual(f.read(), 'words')
+        self.assertFalse(os.path.exists(os.path.join(self.download_dir, ENTRY_INFO_FILENAME)))
+
+    def test_checkout_failed_download(self):
+        cache = RepoCache(cache_dir=self.cache_dir, max_bytes=1024*1024)
+        with mock.patch('general_tools.repo_cache.download_file', side_effect=IOError('404')):
+            self.assertFalse(cache.checkout('unfoldingWord', 'en_tw', 'v20', '1111111111',
+                                            'https://example.com/en_tw.zip', self.download_dir))
+        self.assertEqual(cache.get_entries(), [])
+
+    def test_lru_eviction(self):
+        cache = RepoCache(cache_dir=self.cache_dir, max_bytes=2500)
+        first = cache.put_zip('unfoldingWord', 'en_ta', 'master', '1111111111', self.make_zip('en_ta', 'a'*1000))
+        second = cache.put_zip('unfoldingWord', 'en_tw', 'master', '2222222222', self.make_zip('en_tw', 'b'*1000))
+        cache.get('unfoldingWord', 'en_ta', 'master', '1111111111') # en_ta is now the most recently used
+        third = cache.put_zip('unfoldingWord', 'en_ult', 'master', '3333333333', self.make_zip('en_ult', 'c'*1000))
+        entry_dirs = [entry['entry_dir'] for entry in cache.get_entries()]
+        self.assertIn(first, entry_dirs)
+        self.assertNotIn(second, entry_dirs)
+        self.assertIn(third, entry_dirs)
+        self.assertFalse(os.path.exists(second))
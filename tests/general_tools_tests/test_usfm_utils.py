@@ -0,0 +1,51 @@
+import unittest
+
+from general_tools.usfm_utils import unalign_usfm, iter_unaligned_usfm, _unalign_usfm_by_regex
+from tests.general_tools_tests.test_verse_objects import TIT_USFM
+
+
+class UsfmUtilsTests(unittest.TestCase):
+
+    def assertSameAsRegex(self, aligned_usfm):
+        self.assertEqual(unalign_usfm(aligned_usfm), _unalign_usfm_by_regex(aligned_usfm).strip())
+
+    def test_unalign_usfm(self):
+        self.assertEqual(unalign_usfm(TIT_USFM), '''\\id TIT EN_ULT en_English_ltr unfoldingWord Literal Text
+\\usfm 3.0
+\\h Titus
+\\mt Titus
+
+\\c 1
+\\p
+\\v 1 Paul, a servant of God \\f + \\ft Or \\fqa a slave\\fqa*.\\f*
+\\v 2-3 in hope \\add for\\add*.
+\\q1 test
+\\c 2
+\\s The heading
+\\p
+\\v 1 But''')
+
+    def test_iter_unaligned_usfm(self):
+        chunks = list(iter_unaligned_usfm(TIT_USFM))
+        self.assertEqual(len(chunks), 3) # The headers and the two chapters
+        self.assertTrue(chunks[2].startswith('\n\\c 2\n'))
+        self.assertEqual(''.join(chunks), unalign_usfm(TIT_USFM))
+
+    def test_same_as_regex(self):
+        for aligned_usfm in [
+                '',
+                '\n\n  \n',
+                TIT_USFM.replace('\\ts\\*\n\\c 2', '\\ts\\*\n\\c 2 \' s'), # \c loses its space to the apostrophe fix
+                TIT_USFM.replace('\\q1 ', '\\q1\\ts\\*\n'), # \ts\* eats the newline before \c 2
+                TIT_USFM.replace('\\fqa*', ''), # \fqa left open across chapters
+                TIT_USFM + '"quote\n\\c 3\n\\v 1 "end quote"\n', # quotes paired by chapter
+                TIT_USFM.replace('|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*,', ''), # broken alignment
+                TIT_USFM.replace('\\w God|', '\\w God\\zaln-e\\*|'), # markup inside a word
+                TIT_USFM + '\\w plain\\w*\n',
+                ]:
+            with self.subTest(aligned_usfm[-40:]):
+                self.assertSameAsRegex(aligned_usfm)
+
+
+if __name__ == '__main__':
+    unittest.main()
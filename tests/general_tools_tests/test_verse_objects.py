@@ -0,0 +1,79 @@
+import unittest
+
+from general_tools.alignment_tools import get_alignment, flatten_alignment
+from general_tools.verse_objects import usfm_to_verse_objects
+
+
+TIT_USFM = '''\\id TIT EN_ULT en_English_ltr unfoldingWord Literal Text
+\\usfm 3.0
+\\h Titus
+\\mt Titus
+
+\\s5
+\\c 1
+\\p
+\\v 1 \\zaln-s |x-strong="G39720" x-lemma="Παῦλος" x-morph="Gr,N,,,,,NMS," x-occurrence="1" x-occurrences="1" x-content="Παῦλος"\\*\\w Paul|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*,
+\\zaln-s |x-strong="G14010" x-lemma="δοῦλος" x-morph="Gr,N,,,,,NMS," x-occurrence="1" x-occurrences="1" x-content="δοῦλος"\\*\\w a|x-occurrence="1" x-occurrences="1"\\w*
+\\w servant|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*
+\\zaln-s |x-strong="G23160" x-lemma="θεός" x-morph="Gr,N,,,,,GMS," x-occurrence="1" x-occurrences="1" x-content="Θεοῦ"\\*\\w of|x-occurrence="1" x-occurrences="2"\\w*
+\\w God|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\* \\f + \\ft Or \\fqa a slave\\fqa*.\\f*
+\\v 2-3 \\zaln-s |x-strong="G16790" x-lemma="ἐλπίς" x-morph="Gr,N,,,,,DFS," x-occurrence="1" x-occurrences="1" x-content="ἐπ’"\\*\\zaln-s |x-strong="G16800" x-lemma="ἐλπίς" x-morph="Gr,N,,,,,DFS," x-occurrence="1" x-occurrences="1" x-content="ἐλπίδι"\\*\\w in|x-occurrence="1" x-occurrences="1"\\w*
+\\w hope|x-occurrence="1" x-occurrences="1"\\w*\\zaln-e\\*\\zaln-e\\* \\add for\\add*.
+\\q1 \\k-s | x-tw="rc://*/tw/dict/bible/kt/god"\\*\\w test|x-occurrence="1" x-occurrences="1"\\w*\\k-e\\*
+\\ts\\*
+\\c 2
+\\s The heading
+\\p
+\\v 1 But
+'''
+
+
+class VerseObjectsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.book = usfm_to_verse_objects(TIT_USFM)
+
+    def test_chapters_and_verses(self):
+        self.assertEqual(list(self.book.keys()), ['1', '2'])
+        self.assertEqual(list(self.book['1'].keys()), ['front', '1', '2-3', '2', '3'])
+        # Everything before the first chapter is skipped
+        self.assertEqual(self.book['1']['front']['verseObjects'], [{'tag': 'p', 'type': 'paragraph'}])
+        self.assertEqual(self.book['2']['front']['verseObjects'][0], {'tag': 's', 'type': 'section'})
+
+    def test_milestone(self):
+        milestone = self.book['1']['1']['verseObjects'][0]
+        self.assertEqual(milestone, {
+            'tag': 'zaln', 'type': 'milestone', 'strong': 'G39720', 'lemma': 'Παῦλος', 'morph': 'Gr,N,,,,,NMS,',
+            'occurrence': 1, 'occurrences': 1, 'content': 'Παῦλος',
+            'children': [{'text': 'Paul', 'tag': 'w', 'type': 'word', 'occurrence': 1, 'occurrences': 1}],
+            'endTag': 'zaln-e\\*'})
+        self.assertEqual(self.book['1']['1']['verseObjects'][1], {'type': 'text', 'text': ',\n'})
+
+    def test_footnote(self):
+        footnote = self.book['1']['1']['verseObjects'][-2]
+        self.assertEqual(footnote, {'tag': 'f', 'type': 'footnote', 'content': '+ \\ft Or \\fqa a slave\\fqa*.'})
+
+    def test_nested_milestones_and_bridge(self):
+        verse_objects = self.book['1']['2-3']['verseObjects']
+        self.assertIs(self.book['1']['2']['verseObjects'], verse_objects)
+        self.assertIs(self.book['1']['3']['verseObjects'], verse_objects)
+        outer = verse_objects[0]
+        self.assertEqual(outer['content'], 'ἐπ’')
+        inner = outer['children'][0]
+        self.assertEqual(inner['content'], 'ἐλπίδι')
+        self.assertEqual([child.get('text') for child in inner['children']], ['in', '\n', 'hope'])
+        self.assertEqual(verse_objects[1], {'type': 'text', 'text': ' for.\n'})
+        self.assertEqual(verse_objects[2], {'tag': 'q1', 'type': 'quote'})
+        # \k-s/\k-e milestones are dropped, but not their words
+        self.assertEqual(verse_objects[3]['text'], 'test')
+
+    def test_get_alignment(self):
+        alignment = get_alignment(self.book['1']['1']['verseObjects'], 'δοῦλος Θεοῦ')
+        self.assertEqual(flatten_alignment(alignment), 'a\nservant\nof\nGod')
+
+    def test_no_chapters(self):
+        self.assertEqual(usfm_to_verse_objects('\\id TIT\n\\h Titus\n'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from general_tools.artifact_store import LocalArtifactStore
+from linters import markdown_linter
+from linters.lint_cache import LintCache, get_lint_cache
+from linters.markdown_linter import MarkdownLinter
+
+
+class LintCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        """Runs before each test."""
+        self.tmp_dir = tempfile.mkdtemp(prefix='tX_test_lint_cache_')
+        self.store = LocalArtifactStore(os.path.join(self.tmp_dir, 'store'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_get_put_and_save(self):
+        lint_cache = LintCache(self.store, 'TnLinter/unfoldingWord/en_tn')
+        old_hash, new_hash = lint_cache.get_hash('01.md', 'old text'), lint_cache.get_hash('01.md', 'new text')
+        self.assertNotEqual(old_hash, new_hash)
+        self.assertIsNone(lint_cache.get(old_hash))
+        lint_cache.put(old_hash, ['a warning'])
+        lint_cache.save()
+
+        lint_cache = LintCache(self.store, 'TnLinter/unfoldingWord/en_tn')
+        self.assertEqual(lint_cache.get(old_hash), ['a warning'])
+        self.assertIsNone(LintCache(self.store, 'TnLinter/unfoldingWord/fr_tn').get(old_hash))
+
+        # Only the results used in the latest run are kept
+        lint_cache = LintCache(self.store, 'TnLinter/unfoldingWord/en_tn')
+        self.assertIsNone(lint_cache.get(new_hash))
+        lint_cache.put(new_hash, [])
+        lint_cache.save()
+        self.assertEqual(LintCache(self.store, 'TnLinter/unfoldingWord/en_tn').used_results, {})
+        self.assertEqual(self.store.get_json(lint_cache.key), {new_hash: []})
+
+    def test_linter_changes_drop_results(self):
+        lint_cache = LintCache(self.store, 'TnLinter/unfoldingWord/en_tn')
+        key_hash = lint_cache.get_hash('01.md', 'text')
+        self.assertEqual(lint_cache.get_hash('01.md', 'text'), key_hash)
+        with patch('linters.lint_cache.get_lint_code_hash', return_value='changed linter code'):
+            self.assertNotEqual(lint_cache.get_hash('01.md', 'text'), key_hash)
+
+    def test_get_lint_cache(self):
+        self.assertIsNone(get_lint_cache('TnLinter/unfoldingWord/en_tn', ''))
+        self.assertIsInstance(get_lint_cache('TnLinter/unfoldingWord/en_tn', self.tmp_dir), LintCache)
+
+    def test_markdown_linter_only_lints_changed_files(self):
+        source_dir = os.path.join(self.tmp_dir, 'en_ta')
+        os.makedirs(os.path.join(source_dir, 'intro'))
+        for filename, text in (('01.md', '# Intro\n\n### Too deep (\n'), ('02.md', '# Fine\n\nText\n')):
+            with open(os.path.join(source_dir, 'intro', filename), 'wt') as md_file:
+                md_file.write(text)
+
+        def lint(expected_linted_count):
+            with patch('linters.markdown_linter.lint_markdown_string',
+                       side_effect=markdown_linter.lint_markdown_string) as mock_lint_markdown_string:
+                linter = MarkdownLinter(repo_subject='Translation_Academy', source_dir=source_dir, num_workers=1)
+                linter.lint_cache = get_lint_cache('MarkdownLinter/unfoldingWord/en_ta', self.tmp_dir)
+                results = linter.run()
+                linter.close()
+            self.assertTrue(results['success'])
+            self.assertEqual(mock_lint_markdown_string.call_count, expected_linted_count)
+            return results['warnings']
+
+        warnings = lint(2)
+        self.assertEqual(len(warnings), 3) # Unclosed parenthesis (twice) and header level
+        self.assertEqual(lint(0), warnings)
+        with open(os.path.join(source_dir, 'intro', '02.md'), 'at') as md_file:
+            md_file.write('[Broken link](\n')
+        new_warnings = lint(1)
+        self.assertGreater(len(new_warnings), len(warnings))
+        for warning in warnings:
+            self.assertIn(warning, new_warnings)
@@ -4,7 +4,8 @@ from mock import mock
 from requests import Response
 
 from tests.linter_tests.linter_unittest import LinterTestCase
-from linters.linter import Linter
+from linters.linter import Linter, scan_punctuation_pairs, find_punctuation_pair_warnings
+from tests.benchmarks.bench_punctuation_pairs import find_punctuation_pair_warnings_by_walking
 
 
 class MyLinter(Linter):
@@ -35,6 +36,28 @@ class TestLinter(LinterTestCase):
     def test_instantiate_abstract_class(self):
         self.assertRaises(TypeError, Linter, None)
 
+    def test_scan_punctuation_pairs(self):
+        counts, unexpected_closings, unclosed_brackets = scan_punctuation_pairs('A (fine [one]).\nPoints: 1) a 2) b\n(bad] {open [x)')
+        self.assertEqual(counts, {'(': 2, ')': 4, '[': 2, ']': 2, '{': 1, '}': 0})
+        self.assertEqual(unexpected_closings, [(']', 3, 5, '('), (')', 3, 15, '[')])
+        self.assertEqual(unclosed_brackets, [('(', 3, 1), ('{', 3, 7), ('[', 3, 13)])
+        self.assertEqual(scan_punctuation_pairs('[x](y) {(z)}'), ({'(': 2, ')': 2, '[': 1, ']': 1, '{': 1, '}': 1}, [], []))
+
+    def test_find_punctuation_pair_warnings(self):
+        self.assertEqual(find_punctuation_pair_warnings('See (this] **_here_** and __that', 'GEN 1:1'), [
+            "GEN 1:1: Possible missing closing ')' — found 1 '(' but 0 ')'",
+            "GEN 1:1: Possible missing opening '[' — found 0 '[' but 1 ']'",
+            "GEN 1:1 line 1: Possible nesting error—found unexpected ']' after recent '(' near See (this] **_here_** and __that",
+            "GEN 1:1: Seem to have the following unclosed field(s): '('",
+            "GEN 1:1: Seem to have have mismatched '__' pairs in 'See (this] **_here_** and __that'",
+            ])
+        for text in ('', 'No pairs', '1) one\n2) two', '((([[[{{{', ')]}', '(a [b) c]\n\n{d}}', '***_x_***',
+                     '(' * 50 + ')' * 50 + ']', 'x 9)\ty (z 8) ', '**_a**_ __b___'):
+            for allow_close_parenthesis_points in (False, True):
+                self.assertEqual(find_punctuation_pair_warnings(text, 'ref', allow_close_parenthesis_points),
+                                 find_punctuation_pair_warnings_by_walking(text, 'ref', allow_close_parenthesis_points),
+                                 text)
+
     # Removed coz of extra parameters Nov 2019 RJH
     # def test_run(self):
     #     linter = MyLinter(repo_subject='Unknown', source_file=os.path.join(self.resources_dir, 'linter', 'files.zip'))
@@ -89,3 +89,33 @@ class TestMarkdownLinter(LinterTestCase):
         ml = MarkdownLinter(repo_subject='Unknown', source_dir=None)
         text = ml.strip_tags('<a href="test"><u>remove my tags')
         self.assertEqual(text, 'remove my tags')
+
+    def test_invoke_markdown_linter(self):
+        strings = {
+            'intro/01.md': '# Introduction\n\n### Too deep\n\nSome text\n',
+            'intro/02.md': '# Lists\n\n* one\n    * two\n',
+            'intro/03.md': '# Fine\n\nNothing wrong here.\t\n',
+        }
+        ml = MarkdownLinter(repo_subject='Translation_Academy', source_dir=None, num_workers=1)
+        results = ml.invoke_markdown_linter(ml.get_invoke_payload(strings))
+        self.assertEqual(list(results.keys()), list(strings.keys()))
+        self.assertEqual(results['intro/01.md'], [{
+            'lineNumber': 3,
+            'ruleName': 'MD001',
+            'ruleAlias': 'header-increment',
+            'ruleDescription': 'Header levels should only increment by one level at a time',
+            'errorDetail': 'Expected: h2; Actual: h3',
+            'errorContext': None,
+            'errorRange': None,
+            }])
+        self.assertEqual([(item['lineNumber'], item['ruleName'], item['errorDetail']) for item in results['intro/02.md']],
+                         [(4, 'MD007', 'Expected: 2; Actual: 4')])
+        self.assertEqual(results['intro/03.md'], []) # Hard tabs and trailing spaces are turned off
+
+    def test_invoke_markdown_linter_workers(self):
+        strings = {f'{n:02}.md': f'# Chapter {n}\n{"#" * (n % 4 + 1)}Heading\n* item\n' for n in range(1, 30)}
+        ml = MarkdownLinter(repo_subject='Translation_Academy', source_dir=None, num_workers=1)
+        single_results = ml.invoke_markdown_linter(ml.get_invoke_payload(strings))
+        ml = MarkdownLinter(repo_subject='Translation_Academy', source_dir=None, num_workers=3)
+        self.assertEqual(ml.invoke_markdown_linter(ml.get_invoke_payload(strings)), single_results)
+        self.assertIn('MD018', [item['ruleName'] for item in single_results['01.md']])
@@ -0,0 +1,74 @@
+import unittest
+from linters.py_markdown_linter.config import LintConfig, LintConfigError
+from linters.py_markdown_linter.document import MarkdownDocument
+from linters.py_markdown_linter.lint import MarkdownLinter
+
+
+class TestMarkdownDocument(unittest.TestCase):
+
+    def test_blocks(self):
+        document = MarkdownDocument('# Title\n\nSetext\n======\n\n* one\n* two\n  - nested\nlazy\n\n---\n\n'
+                                    '```python\n# not a heading\n```\n\n    # code\n')
+        self.assertEqual([(heading.line_nr, heading.level, heading.style, heading.text)
+                          for heading in document.headings],
+                         [(1, 1, 'atx', 'Title'), (3, 1, 'setext', 'Setext')])
+        self.assertEqual([(markdown_list.line_nr, markdown_list.end_line_nr, markdown_list.nesting)
+                          for markdown_list in document.lists], [(6, 9, 0), (8, 9, 1)])
+        self.assertEqual(document.horizontal_rules, [(11, '---')])
+        self.assertEqual([(code_block.line_nr, code_block.end_line_nr, code_block.info)
+                          for code_block in document.code_blocks], [(13, 15, 'python'), (17, 17, '')])
+        self.assertEqual(document.kind(9), 'list_continuation')
+
+    def test_list_item_needs_indent(self):
+        # Indented too far to start another list, but not far enough to be inside the first item, so it's just text
+        document = MarkdownDocument('  1. First\n    * Not an item\n2. Second\n')
+        self.assertEqual(len(document.lists), 1)
+        self.assertEqual([item.line_nr for item in document.lists[0].items], [1, 3])
+
+    def test_disabled_lines(self):
+        document = MarkdownDocument('one\n<!-- markdownlint-disable -->\ntwo\n<!-- markdownlint-enable -->\nthree')
+        self.assertEqual([line_nr for line_nr in range(1, 6) if not document.is_enabled(line_nr)], [2, 3, 4])
+
+
+class TestPyMarkdownLinter(unittest.TestCase):
+
+    def lint(self, markdown_string, config=None):
+        linter = MarkdownLinter(LintConfig.from_markdownlint_config(config or {'default': True}))
+        return [(violation.rule_id, violation.line_nr) for violation in linter.lint(markdown_string)]
+
+    def test_headers(self):
+        self.assertEqual(self.lint('# One\n\n### Three\n\n#Missing\n\n##  Two\n\n## Closed ##\n\n  # Indented\n'),
+                         [('MD001', 3), ('MD003', 9), ('MD018', 5), ('MD019', 7), ('MD023', 11)])
+        self.assertEqual(self.lint('# One\nText\n'), [('MD022', 1)])
+
+    def test_lists(self):
+        self.assertEqual(self.lint('Text\n* one\n+ two\n\n  - three\n\n1. a\n3. b\n'),
+                         [('MD004', 3), ('MD004', 5), ('MD029', 8), ('MD032', 2), ('MD032', 2), ('MD032', 3)])
+        self.assertEqual(self.lint('Text\n\n  * one\n'), [('MD006', 3)])
+        self.assertEqual(self.lint('* one\n    * two\n'), [('MD007', 2)])
+        self.assertEqual(self.lint('* one\n    * two\n', {'default': True, 'MD007': {'indent': 4}}), [])
+        self.assertEqual(self.lint('1. a\n1. b\n1. c\n'), [])
+
+    def test_code_and_links(self):
+        self.assertEqual(self.lint('Text\n```\n$ ls\n```\n\n(reversed)[link] [empty]() ![](image.png) `(code)[span]`\n'),
+                         [('MD011', 6), ('MD014', 2), ('MD031', 2), ('MD040', 2), ('MD042', 6), ('MD045', 6)])
+
+    def test_options(self):
+        config = {'default': False, 'required-headers': {'headers': ['# Title', '*', '## End']},
+                  'proper-names': {'names': ['GitHub']}}
+        self.assertEqual(self.lint('# Title\n\n## Middle\n\n## End\n\nOn github\n', config), [('MD044', 7)])
+        self.assertEqual(self.lint('# Title\n\n## Middle\n', config), [('MD043', 4)])
+
+    def test_config(self):
+        config = LintConfig.from_markdownlint_config({'default': True, 'headers': False, 'MD001': True,
+                                                      'no-hard-tabs': False, 'whitespace': False, 'line-length': False})
+        rule_ids = [rule.id for rule in config.rules]
+        self.assertIn('MD001', rule_ids)
+        for rule_id in ('MD003', 'MD009', 'MD010', 'MD013', 'MD022'):
+            self.assertNotIn(rule_id, rule_ids)
+        with self.assertRaises(LintConfigError):
+            LintConfig.from_markdownlint_config({'ul-style': {'style': 'hyphen'}})
+
+    def test_default_config(self):
+        # Just the line rules, as before
+        self.assertEqual([rule.id for rule in LintConfig().rules], ['MD013', 'MD009', 'MD010'])
@@ -30,6 +30,45 @@ class TestTnLinter(LinterTestCase):
         """Runs after each test."""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
+    def make_linked_notes(self):
+        source_dir = os.path.join(self.temp_dir, 'en_tn')
+        ta_dir = os.path.join(self.temp_dir, 'en_ta', 'translate', 'figs-idiom')
+        os.makedirs(ta_dir)
+        write_file(os.path.join(ta_dir, '01.md'), '# Idiom\n')
+        for chapter in range(1, 4):
+            for verse in range(1, 11):
+                write_file(os.path.join(source_dir, 'gen', f'{chapter:02}', f'{verse:02}.md'),
+                           f'# Note\n\nSee [next](./{verse+1:02}.md), [chapter](../{chapter+1:02}/01.md), '
+                           f'[idiom](../../../en_ta/translate/figs-idiom/01.md), '
+                           f'[missing](../../../en_ta/translate/figs-missing/01.md) and [web](https://door43.org/x.md)\n')
+        return source_dir
+
+    def test_find_all_invalid_links(self):
+        source_dir = self.make_linked_notes()
+        linter = TnLinter(repo_subject='Translation_Notes', source_dir=source_dir, num_workers=1)
+        linter.find_all_invalid_links(source_dir)
+        warnings = linter.log.warnings
+        self.assertEqual(sum('contains invalid link: (../../../en_ta/translate/figs-missing/01.md)' in warning
+                             for warning in warnings), 30)
+        self.assertEqual(sum('contains invalid link: (./11.md)' in warning for warning in warnings), 3)
+        self.assertEqual(sum('contains invalid link: (../04/01.md)' in warning for warning in warnings), 10)
+        self.assertEqual(len(warnings), 30 + 3 + 10)
+        self.assertIn('<a href="https://git.door43.org///src/master/gen/03/10.md">gen/03/10.md</a>: '
+                      'contains invalid link: (./11.md)', warnings)
+
+    def test_find_all_invalid_links_workers(self):
+        source_dir = self.make_linked_notes()
+        linter = TnLinter(repo_subject='Translation_Notes', source_dir=source_dir, num_workers=1)
+        linter.find_all_invalid_links(source_dir)
+        worker_linter = TnLinter(repo_subject='Translation_Notes', source_dir=source_dir, num_workers=3)
+        with file_utils.use_file_contents_cache() as file_contents_cache:
+            worker_linter.find_all_invalid_links(source_dir)
+            # The notes read by the workers are kept for the markdown checks
+            self.assertEqual(len(file_contents_cache.texts), 30)
+            self.assertIn('[idiom]', read_file(os.path.join(source_dir, 'gen', '02', '05.md')))
+            self.assertEqual(file_contents_cache.hit_count, 1)
+        self.assertEqual(worker_linter.log.warnings, linter.log.warnings)
+
     # Removed coz of extra parameters Nov 2019 RJH
     # @mock.patch('linters.markdown_linter.MarkdownLinter.invoke_markdown_linter')
     # def test_lint(self, mock_invoke_markdown_linter):
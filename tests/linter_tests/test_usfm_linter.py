@@ -529,6 +529,20 @@ class TestUsfmLinter(LinterTestCase):
         AppSettings.logger.debug("Checking time was " + str(elapsed_seconds) + " seconds")
         self.verify_results_counts(expected_warnings, linter)
 
+    def test_EnUlbSubsetParallelSameAsSerial(self):
+        check_files = ['19-PSA.usfm','22-SNG.usfm','24-JER.usfm','25-LAM.usfm','35-HAB.usfm']
+        out_dir = self.unzip_resource_only('en_ulb.zip', check_files)
+        self.replace_chapter(out_dir, '22-SNG.usfm', start_ch=3, end_ch=5, replace='')  # remove c3-4
+        self.replace_tag(out_dir, '35-HAB.usfm', 'toc2', '')
+        write_file(os.path.join(out_dir, '36-ZEP.usfm'), '')
+        serial_linter = UsfmLinter(repo_subject='Bible', source_dir=out_dir, num_workers=1)
+        serial_linter.run()
+        parallel_linter = UsfmLinter(repo_subject='Bible', source_dir=out_dir, num_workers=3)
+        parallel_linter.run()
+        self.assertTrue(serial_linter.log.warnings)
+        self.assertEqual(parallel_linter.log.warnings, serial_linter.log.warnings)
+        self.assertEqual(parallel_linter.found_books, serial_linter.found_books)
+
     #
     # helpers
     #
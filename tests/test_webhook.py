@@ -1,9 +1,10 @@
 from unittest import TestCase, skip
 from unittest.mock import Mock, patch
+from time import sleep, time
 import json
 
 from rq_settings import prefix, webhook_queue_name
-from webhook import job, AppSettings
+from webhook import job, do_linting_and_converting, AppSettings
 
 from rq import get_current_job
 
@@ -37,3 +38,73 @@ class TestWebhook(TestCase):
         job(payload_json)
         # After job has run, should update https://dev.door43.org/u/tx-manager-test-data/en-obs-rc-0.2/93829a566c/
 
+
+class FakeLinter:
+    lint_seconds = 0
+
+    def __init__(self, repo_subject, source_dir, cache_name=None):
+        self.source_dir = source_dir
+
+    def run(self):
+        sleep(self.lint_seconds)
+        return {'success': True, 'warnings': [f'Checked {self.source_dir}']}
+
+    def close(self):
+        pass
+
+
+class SlowLinter(FakeLinter):
+    lint_seconds = 60
+
+
+class FakeConverter:
+
+    def __init__(self, resource_type, **kwargs):
+        self.cdn_file_key = kwargs['cdn_file_key']
+
+    def run(self):
+        return {'success': True, 'info': [f'Converted to {self.cdn_file_key}'], 'warnings': [], 'errors': []}
+
+    def close(self):
+        pass
+
+
+class BrokenConverter(FakeConverter):
+
+    def run(self):
+        raise ValueError('bad source')
+
+
+class TestConcurrentStages(TestCase):
+
+    def get_build_log(self):
+        return {'resource_type': 'Bible', 'output': 'https://cdn.door43.org/u/owner/repo/ref.zip',
+                'source': 'https://git.door43.org/owner/repo/archive/ref.zip', 'identifier': 'owner--repo--ref',
+                'repo_owner': 'owner', 'repo_name': 'repo', 'repo_ref': 'ref', 'repo_ref_type': 'branch',
+                'repo_data_url': '', 'dcs_domain': 'https://git.door43.org', 'status': 'converting'}
+
+    def test_results_merged(self):
+        build_log = self.get_build_log()
+        do_linting_and_converting(build_log, '/tmp/source', 'usfm', FakeLinter, 'usfm2html', FakeConverter)
+        self.assertEqual(build_log['linter_success'], True)
+        self.assertEqual(build_log['linter_warnings'], ['Checked /tmp/source'])
+        self.assertEqual(build_log['converter_success'], True)
+        self.assertEqual(build_log['converter_info'], ['Converted to u/owner/repo/ref.zip'])
+        self.assertEqual(build_log['status'], 'converted')
+
+    @patch('webhook.lint_timeout', 2)
+    def test_lint_timeout(self):
+        build_log = self.get_build_log()
+        start_time = time()
+        do_linting_and_converting(build_log, '/tmp/source', 'usfm', SlowLinter, 'usfm2html', FakeConverter)
+        self.assertLess(time() - start_time, 30)
+        self.assertEqual(build_log['linter_success'], False)
+        self.assertEqual(build_log['linter_warnings'], ['usfm was stopped after 2 seconds'])
+        self.assertEqual(build_log['converter_success'], True)
+
+    def test_converter_exception(self):
+        build_log = self.get_build_log()
+        do_linting_and_converting(build_log, '/tmp/source', 'usfm', FakeLinter, 'usfm2html', BrokenConverter)
+        self.assertEqual(build_log['linter_success'], True)
+        self.assertEqual(build_log['converter_success'], False)
+        self.assertEqual(build_log['converter_errors'], ['usfm2html failed: bad source'])
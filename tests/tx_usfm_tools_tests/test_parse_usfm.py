@@ -0,0 +1,99 @@
+import os
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+from pyparsing import ParseException
+
+from tx_usfm_tools import parseUsfm
+
+
+class ParseUsfmTests(unittest.TestCase):
+    """
+    Checks that the hand-written scanner gives the same tokens as the pyparsing grammar.
+    """
+
+    tests_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+    def assertSameTokens(self, usfm):
+        pyparsing_tokens = [list(t) for t in parseUsfm.usfm.parseString(parseUsfm.clean(usfm), parseAll=True)]
+        self.assertEqual(parseUsfm.scanUsfm(parseUsfm.clean(usfm)), pyparsing_tokens)
+        tokens = parseUsfm.parseString(usfm)
+        old_tokens = parseUsfm.parseString(usfm, usePyparsing=True)
+        self.assertEqual([(type(t), t.type, t.value) for t in tokens], [(type(t), t.type, t.value) for t in old_tokens])
+
+    def test_fixture_books(self):
+        for zip_name in ['51-PHP.zip', 'kpb_mat_text_udb.zip']:
+            with zipfile.ZipFile(os.path.join(self.tests_dir, 'converter_tests', 'resources', zip_name)) as zip_file:
+                for name in zip_file.namelist():
+                    if name.endswith('.usfm'):
+                        with self.subTest(name):
+                            self.assertSameTokens(zip_file.read(name).decode('utf-8'))
+        with open(os.path.join(self.tests_dir, 'linter_tests', 'resources', 'es_php_text_ulb', '51-PHP.usfm'),
+                  encoding='utf-8') as usfm_file:
+            self.assertSameTokens(usfm_file.read())
+
+    def test_all_markers(self):
+        markers = sorted(parseUsfm.plainMarkers | parseUsfm.valueMarkers | parseUsfm.plusMarkers
+                         | parseUsfm.numberMarkers | parseUsfm.endMarkers | {'ipi', 'w', '+w', 'zaln-s'})
+        for follower in [' text\n', '\ttext', '*', ' 12-13 ', ' 1a ', ' + \\ft', '\n\n\\p', '', '\\w*']:
+            with self.subTest(follower=follower):
+                self.assertSameTokens('\\id GEN\n' + ''.join(f'\\{marker}{follower}' for marker in markers
+                                                             if marker != 'toc')) # \toc has no token class
+
+    def test_edge_cases(self):
+        for usfm in ['\\id GEN test\\', 'text \\\\ more\\\n\\ \\', '\\v 1', '\\c 1\r\n\\v 1\xa0In\r\n',
+                     '  leading\t\ttabs\\f + \\fq a\\fq*\\f*', '\\zaln-s |x-occurrence="1"\\*\\w In|x-occurrence="1"\\w*\\zaln-e\\*']:
+            with self.subTest(usfm):
+                self.assertSameTokens(usfm)
+
+    def test_create_token(self):
+        token = parseUsfm.createToken(['v', '12'])
+        self.assertIsInstance(token, parseUsfm.VToken)
+        self.assertEqual((token.type, token.value), ('v', '12'))
+        token = parseUsfm.createToken(['p'])
+        self.assertEqual((token.type, token.value), ('p', ''))
+        with self.assertRaises(Exception):
+            parseUsfm.createToken(['toc', 'Genesis'])
+        for token_class in parseUsfm.tokenClasses.values():
+            self.assertFalse(hasattr(token_class(), '__dict__'), token_class.__name__)
+
+    def test_empty(self):
+        with self.assertRaises(ParseException):
+            parseUsfm.parseString('')
+        with self.assertRaises(ParseException):
+            parseUsfm.parseString(' \n')
+
+
+class ParseCacheTests(unittest.TestCase):
+
+    usfm = '\\id PHP\n\\c 1\n\\p\n\\v 1 Paul and Timothy\n\\v 2 Grace to you\n'
+
+    def tokens_of(self, tokens):
+        return [(type(t), t.type, t.value) for t in tokens]
+
+    def test_parsed_once(self):
+        expected_tokens = self.tokens_of(parseUsfm.parseString(self.usfm))
+        with mock.patch.object(parseUsfm, 'scanUsfm', wraps=parseUsfm.scanUsfm) as scan_usfm:
+            with parseUsfm.useParseCache():
+                self.assertEqual(self.tokens_of(parseUsfm.parseString(self.usfm)), expected_tokens)
+                self.assertEqual(self.tokens_of(parseUsfm.parseString(self.usfm)), expected_tokens)
+                parseUsfm.parseString(self.usfm + '\\v 3 I thank my God\n')
+            self.assertEqual(scan_usfm.call_count, 2)
+            self.assertIsNone(parseUsfm.parseCache)
+            parseUsfm.parseString(self.usfm)
+            self.assertEqual(scan_usfm.call_count, 3)
+
+    def test_shared_through_folder(self):
+        expected_tokens = self.tokens_of(parseUsfm.parseString(self.usfm))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parseUsfm.ParseCache(cache_dir).parse(self.usfm)
+            # e.g., in another process of the job
+            with mock.patch.object(parseUsfm, 'scanUsfm', wraps=parseUsfm.scanUsfm) as scan_usfm:
+                self.assertEqual(self.tokens_of(parseUsfm.ParseCache(cache_dir).parse(self.usfm)), expected_tokens)
+                self.assertEqual(scan_usfm.call_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import unittest
+
+from bs4 import BeautifulSoup
+
+from tx_usfm_tools.singleFilelessHtmlRenderer import SingleFilelessHtmlRenderer, cleanVerseHtml
+
+
+PHP_USFM = '''\\id PHP
+\\h Philippians
+\\toc2 Philippians
+\\mt Philippians
+\\c 1
+\\p
+\\v 1 Paul and Timothy, servants of Christ~Jesus,
+\\v 2 Grace to you\\f + \\ft Or \\fqa peace\\fqa*.\\f* and peace.
+\\q1 \\v 3 I thank my God
+\\q2 every time I remember you.
+\\c 2
+\\s1 Heading
+\\p
+\\v 1 So if there is any comfort
+'''
+
+
+class WriteCounter:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, s):
+        self.writes.append(s)
+
+
+class SingleFilelessHtmlRendererTests(unittest.TestCase):
+
+    def test_render(self):
+        html, _warnings = SingleFilelessHtmlRenderer({'PHP': PHP_USFM}).render()
+        self.assertIn('<title>Philippians</title>', html)
+        self.assertIn('<span id="ref-fn-050-001-002-1">', html)
+        self.assertIn('Christ&nbsp;Jesus', html)
+        self.assertTrue(html.endswith('\n    </body>\n</html>\n'))
+
+    def test_render_to_output_file(self):
+        html, warnings = SingleFilelessHtmlRenderer({'PHP': PHP_USFM}).render()
+        output_file = io.StringIO()
+        streamed_html, streamed_warnings = SingleFilelessHtmlRenderer({'PHP': PHP_USFM}, output_file=output_file).render()
+        self.assertIsNone(streamed_html)
+        self.assertEqual(streamed_warnings, warnings)
+        self.assertEqual(output_file.getvalue(), html)
+
+        output_file = WriteCounter()
+        renderer = SingleFilelessHtmlRenderer({'PHP': PHP_USFM}, output_file=output_file)
+        renderer.OUTPUT_CHUNK_SIZE = 5
+        renderer.render()
+        self.assertGreater(len(output_file.writes), 1) # Written out as it was rendered
+        self.assertEqual(''.join(output_file.writes), html)
+
+    def test_render_verses(self):
+        verses, _warnings = SingleFilelessHtmlRenderer({'PHP': PHP_USFM}).renderVerses()
+        self.assertEqual(list(verses), ['1', '2'])
+        self.assertEqual(list(verses['1']), ['1', '2', '3'])
+        self.assertEqual(verses['1']['2']['usfm'], '\\v 2 Grace to you\\f + \\ft Or \\fqa peace\\fqa*.\\f* and peace.\n\\q1 ')
+        self.assertEqual(verses['2']['1']['usfm'], '\\v 1 So if there is any comfort\n')
+        self.assertTrue(verses['1']['1']['html'].startswith(
+            '<span class="v-num" id="050-ch-001-v-001"><sup><b>1</b></sup></span> Paul and Timothy'))
+        self.assertIn('Christ\xa0Jesus', verses['1']['1']['html'])
+        self.assertNotIn('</p>', verses['1']['1']['html'])
+        # The chapter's footnotes come with its last verse, but not the next chapter's heading
+        self.assertNotIn('footnotes', verses['1']['2']['html'])
+        self.assertIn('<div class="footnotes">', verses['1']['3']['html'])
+        self.assertNotIn('Heading', verses['1']['3']['html'])
+
+    def test_render_verses_bridge(self):
+        usfm = '\\id PHP\n\\h Philippians\n\\c 1\n\\p\n\\v 1-3 Paul and Timothy\n\\v 4 I thank my God\n'
+        verses, _warnings = SingleFilelessHtmlRenderer({'PHP': usfm}).renderVerses()
+        self.assertEqual(list(verses['1']), ['1', '3', '4'])
+        self.assertIs(verses['1']['1'], verses['1']['3'])
+        self.assertEqual(verses['1']['3']['usfm'], '\\v 1-3 Paul and Timothy\n')
+
+    def test_clean_verse_html(self):
+        for verse_html in (' <span id="v" class="v-num">1</span> Grace </p>\n\n\n<p> ',
+                           '<span class="v-num">2</span> <i class="emphasis">to <b>you</i> all\n<span class="chunk-break"></span>\n',
+                           '<span>3</span>~&nbsp;A & B <p class="indent-0">&nbsp;</p><br></br></p>\n<div class="footnotes">'
+                           '<hr class="footnotes-hr"/><div id="fn" class="footnote"><span class="text">Or <i>peace</span></div>'
+                           '</div>\n    </body>\n</html>\n'):
+            soup = BeautifulSoup(verse_html, 'html.parser')
+            for tag in soup.find_all():
+                if (not tag.contents or len(tag.get_text(strip=True)) <= 0) and tag.name not in ['br', 'img']:
+                    tag.decompose()
+            self.assertEqual(cleanVerseHtml(verse_html), str(soup))
+
+
+if __name__ == '__main__':
+    unittest.main()
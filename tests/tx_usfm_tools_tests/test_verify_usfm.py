@@ -0,0 +1,48 @@
+import unittest
+
+from tx_usfm_tools import verifyUSFM
+
+
+GOOD_BOOK = '''\\id JUD
+\\ide UTF-8
+\\h Jude
+\\toc1 The Letter of Jude
+\\toc2 Jude
+\\toc3 Jud
+\\mt Jude
+\\c 1
+\\p
+''' + ''.join(f'\\v {v} Verse {v}.\n' for v in range(1, 26))
+
+
+class VerifyUsfmTests(unittest.TestCase):
+    """
+    Checks that each USFM verifier keeps its own state.
+    """
+
+    def test_good_book(self):
+        errors, book_id = verifyUSFM.verify_contents_quiet(GOOD_BOOK, '65-JUD', 'JUD', 'en')
+        self.assertEqual(errors, [])
+        self.assertEqual(book_id, 'JUD')
+
+    def test_verifiers_are_independent(self):
+        bad_book = GOOD_BOOK.replace('\\v 3 Verse 3.\n', '').replace('\\h Jude\n', '')
+        verifier1 = verifyUSFM.UsfmVerifier()
+        verifier2 = verifyUSFM.UsfmVerifier()
+        self.assertIsNot(verifier1.state, verifier2.state)
+        bad_errors, _book_id = verifier1.verify_contents_quiet(bad_book, '65-JUD', 'JUD', 'en')
+        self.assertIn('JUD - Missing \\h tag', bad_errors)
+        self.assertIn('JUD 1:2 - Missing verse between this and: JUD 1:4', bad_errors)
+        good_errors, book_id = verifier2.verify_contents_quiet(GOOD_BOOK, '65-JUD', 'JUD', 'en')
+        self.assertEqual(good_errors, [])
+        self.assertEqual(book_id, 'JUD')
+
+    def test_verifier_is_reusable(self):
+        verifier = verifyUSFM.UsfmVerifier()
+        bad_book = GOOD_BOOK.replace('\\c 1\n', '\\c 1\n\\v 1 Extra.\n')
+        self.assertTrue(verifier.verify_contents_quiet(bad_book, '65-JUD', 'JUD', 'en')[0])
+        self.assertEqual(verifier.verify_contents_quiet(GOOD_BOOK, '65-JUD', 'JUD', 'en')[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -365,6 +365,18 @@ def bookID(usfm):
 #     return bookNames[index]
 
 
+# noinspection PyPep8Naming
+def loadBookString(usfm):
+    """
+    Returns {bookID: usfm} for the USFM text of a book (as loadBooks does for each file),
+        or an empty dict if it doesn't start with a known \\id.
+    """
+    usfm = usfm.lstrip()
+    if usfm[:4] == r'\id ' and usfm[4:7] in silNames:
+        return {bookID(usfm): usfm}
+    return {}
+
+
 # noinspection PyPep8Naming
 def loadBooks(path):
     loaded_books = {}
@@ -382,10 +394,10 @@ def loadBooks(path):
         # noinspection PyBroadException
         try:
             f = open(full_file_name, 'rt')
-            usfm = f.read().lstrip()
-            if usfm[:4] == r'\id ' and usfm[4:7] in silNames:
+            book = loadBookString(f.read())
+            if book:
                 # print('     Loaded ' + fname + ' as ' + usfm[4:7])
-                loaded_books[bookID(usfm)] = usfm
+                loaded_books.update(book)
                 f.close()
             else:
                 __logger.info('Ignored ' + fname)
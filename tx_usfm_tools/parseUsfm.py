@@ -2,8 +2,13 @@
 This version of parseUsfm.py appears to be used by verifyUSFM.py
     i.e., used by the USFM linter.
 """
+import os
+import re
 import sys
+import pickle
+import hashlib
 import logging
+from contextlib import contextmanager
 
 from pyparsing import Word, OneOrMore, nums, Literal, White, Group, \
         Suppress, NoMatch, Optional, CharsNotIn, MatchFirst
@@ -355,15 +360,190 @@ usfm    = OneOrMore(element)
 #         sys.exit()
 #     return [createToken(t) for t in tokens]
 
-def parseString(unicodeString):
+# Markers of the above grammar by how they're followed, for the hand-written scanner below
+#   (which gives the same results as the pyparsing grammar, but in linear time)
+valueMarkers = {'id', 'ide', 'usfm', 'h', 'toc', 'toc1', 'toc2', 'toc3', 'mt', 'mt1', 'mt2', 'mt3',
+                'ms', 'ms1', 'ms2', 'mr', 'd', 's', 's1', 's2', 's3', 's4', 's5', 'periph', 'sr', 'sts', 'r',
+                'cl', 'fr', 'fk', 'ft', 'fq', 'fqa', 'fv', 'fdc', 'xo', 'xt', '+xt', 'sp',
+                'is', 'is1', 'imt', 'imt1', 'imt2', 'imt3', 'rem'}
+plusMarkers = {'f', 'fe', 'x'}
+numberMarkers = {'c', 'v'}
+plainMarkers = {'p', 'pc', 'pm', 'pi', 'pi1', 'pi2', 'mi', 'b', 'ca', 'va',
+                'q', 'q1', 'q2', 'q3', 'q4', 'qa', 'qac', 'qc', 'qm', 'qm1', 'qm2', 'qm3', 'qr', 'qs', 'qt',
+                'nb', 'm', 'fp', 'xdc', 'it', 'em', 'k', 'tl', 'wj', 'nd', 'bd', 'bdit',
+                'li', 'li1', 'li2', 'li3', 'li4', 'add', 'is2', 'is3', 'ip', 'im', 'imi', 'iot', 'io1', 'io', 'io2',
+                'ior', 'ili', 'ie', 'bk', 'sc', 'tr',
+                'th1', 'th2', 'th3', 'th4', 'th5', 'th6', 'thr1', 'thr2', 'thr3', 'thr4', 'thr5', 'thr6',
+                'tc1', 'tc2', 'tc3', 'tc4', 'tc5', 'tc6', 'tcr1', 'tcr2', 'tcr3', 'tcr4', 'tcr5', 'tcr6'}
+endMarkers = {'ca', 'va', 'qs', 'qt', 'fr', 'fk', 'ft', 'fq', 'fqa', 'f', 'fe', 'fv', 'fdc', 'xdc', 'xt', '+xt', 'x',
+              'it', 'em', 'k', 'tl', 'wj', 'nd', 'bd', 'bdit', 'add', 'ior', 'bk', 'sc'}
+
+whitespaceRegex = re.compile(r'[ \t\r\n]*')
+phraseRegex = re.compile(r'[^\n\\]+')
+markerRegex = re.compile(r'[^ \t\r\n\\*]*')
+numberRegex = re.compile(r'([-()0-9]+)[ \t\r\n]+')
+unknownRegex = re.compile(r'[^ \n\t\\]+')
+
+
+class ScanError(Exception):
+    pass
+
+
+def scanUsfm(cleaned):
+    """
+    Splits cleaned USFM into the same token lists (e.g., ['v', '1'], ['p'], ['text', 'In the beginning'])
+        that the pyparsing grammar gives, but with one pass over the string.
+    :param cleaned: USFM from clean()
+    :return: list of token lists, for createToken()
+    """
+    s = cleaned.expandtabs() # As pyparsing does
+    tokens = []
+    pos = whitespaceRegex.match(s).end()
+    length = len(s)
+    while pos < length:
+        if s[pos] != '\\':
+            end = phraseRegex.match(s, pos).end()
+            tokens.append(['text', s[pos:end]])
+        elif s.startswith('\\\\', pos):
+            end = pos + 2
+            tokens.append(['\\\\'])
+        else:
+            end = markerRegex.match(s, pos + 1).end()
+            marker = s[pos + 1:end]
+            nextChar = s[end:end + 1]
+            if nextChar == '*' and marker in endMarkers:
+                end += 1
+                tokens.append([marker + '*'])
+            elif nextChar and nextChar in ' \t\r\n' and (marker in plainMarkers or marker in valueMarkers
+                                                            or marker in plusMarkers or marker in numberMarkers):
+                valuePos = whitespaceRegex.match(s, end).end()
+                if marker in valueMarkers:
+                    match = phraseRegex.match(s, valuePos)
+                    if match:
+                        end = match.end()
+                        tokens.append([marker, match.group()])
+                    else:
+                        end = valuePos
+                        tokens.append([marker])
+                elif marker in plusMarkers:
+                    if s.startswith('+', valuePos):
+                        end = valuePos + 1
+                        tokens.append([marker, '+'])
+                    else:
+                        end = valuePos
+                        tokens.append([marker])
+                elif marker in numberMarkers and numberRegex.match(s, valuePos):
+                    match = numberRegex.match(s, valuePos)
+                    end = match.end()
+                    tokens.append([marker, match.group(1)])
+                elif marker in plainMarkers:
+                    end = valuePos
+                    tokens.append([marker])
+                else:
+                    end = None
+            else:
+                end = None
+            if end is None: # Not a known marker (or a \c or \v without a number)
+                match = unknownRegex.match(s, pos + 1)
+                if not match:
+                    raise ScanError(f"Unable to scan USFM at {s[pos:pos + 20]!r}")
+                end = match.end()
+                tokens.append(['unknown', match.group()])
+        pos = whitespaceRegex.match(s, end).end()
+    if not tokens:
+        raise ScanError("No USFM to scan")
+    return tokens
+
+
+def parseString(unicodeString, usePyparsing=False):
     """
     version of parseString for use in libraries
     :param unicodeString:
+    :param usePyparsing: parse with the (much slower) pyparsing grammar rather than scanUsfm()
     :return:
     """
+    if parseCache is not None:
+        return parseCache.parse(unicodeString, usePyparsing)
+    return [createToken(t) for t in parseTokenLists(unicodeString, usePyparsing)]
+
+
+def parseTokenLists(unicodeString, usePyparsing=False):
+    """
+    Returns the token lists of the USFM string (see scanUsfm()) that parseString() makes the tokens from.
+    """
     cleaned = clean(unicodeString)
-    tokens = usfm.parseString(cleaned, parseAll=True)
-    return [createToken(t) for t in tokens]
+    if not usePyparsing:
+        try:
+            return scanUsfm(cleaned)
+        except ScanError:
+            pass # so that pyparsing raises the usual exception
+    return [list(t) for t in usfm.parseString(cleaned, parseAll=True)]
+
+
+class ParseCache:
+    """
+    Tokens of the USFM parsed during a job, keyed by a hash of the USFM,
+        so that linting and converting the same book only parses it once.
+
+    If given a folder, the token lists are also pickled there,
+        so that the other processes of the job (e.g., the workers linting or converting books) can load them.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.tokens = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def parse(self, unicodeString, usePyparsing=False):
+        key = hashlib.sha256(unicodeString.encode('utf-8')).hexdigest()
+        if key not in self.tokens:
+            tokenLists = self.load(key)
+            if tokenLists is None:
+                tokenLists = parseTokenLists(unicodeString, usePyparsing)
+                self.save(key, tokenLists)
+            self.tokens[key] = [createToken(t) for t in tokenLists]
+        return list(self.tokens[key])
+
+    def load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f'{key}.pickle'), 'rb') as pickle_file:
+                return pickle.load(pickle_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def save(self, key, tokenLists):
+        if not self.cache_dir:
+            return
+        # Written to a temporary file first, so other processes never load half a file
+        filepath = os.path.join(self.cache_dir, f'{key}.pickle')
+        temp_filepath = f'{filepath}.{os.getpid()}.tmp'
+        try:
+            with open(temp_filepath, 'wb') as pickle_file:
+                pickle.dump(tokenLists, pickle_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filepath, filepath)
+        except OSError as e:
+            logging.warning(f"Unable to save parsed USFM to {filepath}: {e}")
+
+
+parseCache = None # ParseCache used by parseString() while a job is being processed (see useParseCache())
+
+
+@contextmanager
+def useParseCache(cache_dir=None):
+    """
+    Makes parseString() (and so the verifier and the renderers) reuse the tokens of any USFM parsed before,
+        including by other processes using the same cache folder, until the end of the with block.
+    """
+    global parseCache
+    previousParseCache = parseCache
+    parseCache = ParseCache(cache_dir)
+    try:
+        yield parseCache
+    finally:
+        parseCache = previousParseCache
 
 
 def clean(unicodeString):
@@ -388,184 +568,29 @@ def clean(unicodeString):
 
 
 def createToken(t):
-    options = {
-        'id':   IDToken,
-        'ide':  IDEToken,
-        'usfm': USFMVersionToken,
-        'h':    HToken,
-
-        'mt':   MTToken,
-        'mt1':  MT1Token,
-        'mt2':  MT2Token,
-        'mt3':  MT3Token,
-
-        'ms':   MSToken,
-        'ms1':  MS1Token,
-        'ms2':  MS2Token,
-
-        'mr':   MRToken,
-        'p':    PToken,
-        'pc':   PCToken,
-        'pm':   PMToken,
-
-        'pi':   PIToken,
-        'pi1':  PI1Token,
-        'pi2':  PI2Token,
-
-        'b':    BToken,
-
-        's':    SToken,
-        's1':   S1Token,
-        's2':   S2Token,
-        's3':   S3Token,
-        's4':   S4Token,
-
-        's5':   S5Token,
-
-        'periph': PeriphToken,
-
-        'sr':   SRToken,
-        'sts':  STSToken,
-        'mi':   MIToken,
-        'r':    RToken,
-        'c':    CToken,
-        'ca':   CAStartToken, 'ca*':  CAEndToken,
-        'cl':   CLToken,
-        'v':    VToken,
-        'va':   VAStartToken, 'va*':  VAEndToken,
-
-        'q':    QToken,
-        'q1':   Q1Token,
-        'q2':   Q2Token,
-        'q3':   Q3Token,
-        'q4':   Q4Token,
-
-        'qa':   QAToken,
-        'qac':  QACToken,
-        'qc':   QCToken,
-        'qm':   QMToken,
-        'qm1':  QM1Token,
-        'qm2':  QM2Token,
-        'qm3':  QM3Token,
-        'qr':   QRToken,
-        'qs':   QSStartToken,
-        'qs*':  QSEndToken,
-        'qt':   QTStartToken,
-        'qt*':  QTEndToken,
-        'nb':   NBToken,
-        'f':    FStartToken,
-        'fe':   FEStartToken,  # Footnote intended as an end note
-        'fr':   FRToken, 'fr*':  FREndToken,
-        'fk':   FKToken, 'fk*':  FKEndToken,
-        'ft':   FTToken, 'ft*':  FTEndToken,
-        'fq':   FQToken, 'fq*':  FQEndToken,
-        'fqa':  FQAToken, 'fqa*': FQAEndToken,
-        # 'fqb':  FQAEndToken,
-        'f*':   FEndToken,
-        'fe*':  FEEndToken,
-        'fv':   FVStartToken, 'fv*':  FVEndToken,
-        'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
-        'fp':   FPToken,
-        'x':    XStartToken,
-        'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
-        'xo':   XOToken,
-        'xt':   XTToken, 'xt*': XTEndToken,
-        '+xt':  plusXTToken, '+xt*': plusXTEndToken,
-        'x*':   XEndToken,
-        'it':   ITStartToken, 'it*':  ITEndToken,
-        'em':   EMStartToken, 'em*':  EMEndToken,
-        'bd':   BDStartToken, 'bd*':  BDEndToken,
-        'bdit': BDITStartToken, 'bdit*': BDITEndToken,
-
-        'li':   LIToken,
-        'li1':  LI1Token,
-        'li2':  LI2Token,
-        'li3':  LI3Token,
-        'li4':  LI4Token,
-
-        'd':    DToken,
-        'sp':   SPToken,
-        # 'i*':   IEndToken,
-        'add':  ADDStartToken, 'add*': ADDEndToken,
-        'nd':   NDStartToken, 'nd*':  NDEndToken,
-        'sc':   SCStartToken, 'sc*':  SCEndToken,
-        'k':    KStartToken, 'k*':  KEndToken,
-        'tl':   TLStartToken, 'tl*':  TLEndToken,
-        'wj':   WJStartToken, 'wj*':  WJEndToken,
-        'm':    MToken,
-        '\\\\': EscapedToken,
-        'rem':  REMToken,
-
-        'tr':   TRToken,
-        'th1':  TH1Token,
-        'th2':  TH2Token,
-        'th3':  TH3Token,
-        'th4':  TH4Token,
-        'th5':  TH5Token,
-        'th6':  TH6Token,
-        'thr1': THR1Token,
-        'thr2': THR2Token,
-        'thr3': THR3Token,
-        'thr4': THR4Token,
-        'thr5': THR5Token,
-        'thr6': THR6Token,
-        'tc1':  TC1Token,
-        'tc2':  TC2Token,
-        'tc3':  TC3Token,
-        'tc4':  TC4Token,
-        'tc5':  TC5Token,
-        'tc6':  TC6Token,
-        'tcr1': TCR1Token,
-        'tcr2': TCR2Token,
-        'tcr3': TCR3Token,
-        'tcr4': TCR4Token,
-        'tcr5': TCR5Token,
-        'tcr6': TCR6Token,
-
-        'toc1': TOC1Token,
-        'toc2': TOC2Token,
-        'toc3': TOC3Token,
-
-        'is':   ISToken,
-        'is1':  IS1Token,
-        'is2':  IS2Token,
-        'is3':  IS3Token,
-
-        'ili':  ILIToken,
-
-        'imt':  IMTToken,
-        'imt1': IMT1Token,
-        'imt2': IMT2Token,
-        'imt3': IMT3Token,
-
-        'ie':   IEToken,
-        'ip':   IPToken,
-        'ipi':  IPIToken,
-        'im':   IMToken,
-        'imi':  IMIToken,
-        'iot':  IOTToken,
-        'io':   IOToken,
-        'io1':  IO1Token,
-        'io2':  IO2Token,
-        'ior':  IORStartToken, 'ior*': IOREndToken,
-        'bk':   BKStartToken, 'bk*':  BKEndToken,
-        'text': TEXTToken,
-        'unknown': UnknownToken
-    }
-    for k, v in options.items():
-        if t[0] == k:
-            if len(t) == 1:
-                token = v()
-            else:
-                token = v(t[1])
-            token.type = k
-            return token
-    raise Exception(t[0])
+    tokenClass = tokenClasses.get(t[0])
+    if tokenClass is None:
+        raise Exception(t[0])
+    token = tokenClass() if len(t) == 1 else tokenClass(t[1])
+    token.type = t[0]
+    return token
 
 
 
+class UsfmTokenType(type):
+    """
+    Gives every token class empty __slots__ (on top of UsfmToken's),
+        so that tokens don't each carry a __dict__.
+    """
+    def __new__(mcs, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        return super().__new__(mcs, name, bases, namespace)
+
+
 # noinspection PyMethodMayBeStatic
-class UsfmToken:
+class UsfmToken(metaclass=UsfmTokenType):
+    __slots__ = ('value', 'type')
+
     def __init__(self, value=''):
         self.value = value
         self.type = None
@@ -1392,3 +1417,170 @@ class BKStartToken(UsfmToken):
 class BKEndToken(UsfmToken):
     def renderOn(self, printer):  return printer.render_bk_e(self)
     def is_bk_e(self):            return True
+
+
+# Token class for each marker (as given by the grammar or scanUsfm())
+tokenClasses = {
+    'id':   IDToken,
+    'ide':  IDEToken,
+    'usfm': USFMVersionToken,
+    'h':    HToken,
+
+    'mt':   MTToken,
+    'mt1':  MT1Token,
+    'mt2':  MT2Token,
+    'mt3':  MT3Token,
+
+    'ms':   MSToken,
+    'ms1':  MS1Token,
+    'ms2':  MS2Token,
+
+    'mr':   MRToken,
+    'p':    PToken,
+    'pc':   PCToken,
+    'pm':   PMToken,
+
+    'pi':   PIToken,
+    'pi1':  PI1Token,
+    'pi2':  PI2Token,
+
+    'b':    BToken,
+
+    's':    SToken,
+    's1':   S1Token,
+    's2':   S2Token,
+    's3':   S3Token,
+    's4':   S4Token,
+
+    's5':   S5Token,
+
+    'periph': PeriphToken,
+
+    'sr':   SRToken,
+    'sts':  STSToken,
+    'mi':   MIToken,
+    'r':    RToken,
+    'c':    CToken,
+    'ca':   CAStartToken, 'ca*':  CAEndToken,
+    'cl':   CLToken,
+    'v':    VToken,
+    'va':   VAStartToken, 'va*':  VAEndToken,
+
+    'q':    QToken,
+    'q1':   Q1Token,
+    'q2':   Q2Token,
+    'q3':   Q3Token,
+    'q4':   Q4Token,
+
+    'qa':   QAToken,
+    'qac':  QACToken,
+    'qc':   QCToken,
+    'qm':   QMToken,
+    'qm1':  QM1Token,
+    'qm2':  QM2Token,
+    'qm3':  QM3Token,
+    'qr':   QRToken,
+    'qs':   QSStartToken,
+    'qs*':  QSEndToken,
+    'qt':   QTStartToken,
+    'qt*':  QTEndToken,
+    'nb':   NBToken,
+    'f':    FStartToken,
+    'fe':   FEStartToken,  # Footnote intended as an end note
+    'fr':   FRToken, 'fr*':  FREndToken,
+    'fk':   FKToken, 'fk*':  FKEndToken,
+    'ft':   FTToken, 'ft*':  FTEndToken,
+    'fq':   FQToken, 'fq*':  FQEndToken,
+    'fqa':  FQAToken, 'fqa*': FQAEndToken,
+    # 'fqb':  FQAEndToken,
+    'f*':   FEndToken,
+    'fe*':  FEEndToken,
+    'fv':   FVStartToken, 'fv*':  FVEndToken,
+    'fdc':  FDCStartToken, 'fdc*': FDCEndToken,
+    'fp':   FPToken,
+    'x':    XStartToken,
+    'xdc':  XDCStartToken, 'xdc*': XDCEndToken,
+    'xo':   XOToken,
+    'xt':   XTToken, 'xt*': XTEndToken,
+    '+xt':  plusXTToken, '+xt*': plusXTEndToken,
+    'x*':   XEndToken,
+    'it':   ITStartToken, 'it*':  ITEndToken,
+    'em':   EMStartToken, 'em*':  EMEndToken,
+    'bd':   BDStartToken, 'bd*':  BDEndToken,
+    'bdit': BDITStartToken, 'bdit*': BDITEndToken,
+
+    'li':   LIToken,
+    'li1':  LI1Token,
+    'li2':  LI2Token,
+    'li3':  LI3Token,
+    'li4':  LI4Token,
+
+    'd':    DToken,
+    'sp':   SPToken,
+    # 'i*':   IEndToken,
+    'add':  ADDStartToken, 'add*': ADDEndToken,
+    'nd':   NDStartToken, 'nd*':  NDEndToken,
+    'sc':   SCStartToken, 'sc*':  SCEndToken,
+    'k':    KStartToken, 'k*':  KEndToken,
+    'tl':   TLStartToken, 'tl*':  TLEndToken,
+    'wj':   WJStartToken, 'wj*':  WJEndToken,
+    'm':    MToken,
+    '\\\\': EscapedToken,
+    'rem':  REMToken,
+
+    'tr':   TRToken,
+    'th1':  TH1Token,
+    'th2':  TH2Token,
+    'th3':  TH3Token,
+    'th4':  TH4Token,
+    'th5':  TH5Token,
+    'th6':  TH6Token,
+    'thr1': THR1Token,
+    'thr2': THR2Token,
+    'thr3': THR3Token,
+    'thr4': THR4Token,
+    'thr5': THR5Token,
+    'thr6': THR6Token,
+    'tc1':  TC1Token,
+    'tc2':  TC2Token,
+    'tc3':  TC3Token,
+    'tc4':  TC4Token,
+    'tc5':  TC5Token,
+    'tc6':  TC6Token,
+    'tcr1': TCR1Token,
+    'tcr2': TCR2Token,
+    'tcr3': TCR3Token,
+    'tcr4': TCR4Token,
+    'tcr5': TCR5Token,
+    'tcr6': TCR6Token,
+
+    'toc1': TOC1Token,
+    'toc2': TOC2Token,
+    'toc3': TOC3Token,
+
+    'is':   ISToken,
+    'is1':  IS1Token,
+    'is2':  IS2Token,
+    'is3':  IS3Token,
+
+    'ili':  ILIToken,
+
+    'imt':  IMTToken,
+    'imt1': IMT1Token,
+    'imt2': IMT2Token,
+    'imt3': IMT3Token,
+
+    'ie':   IEToken,
+    'ip':   IPToken,
+    'ipi':  IPIToken,
+    'im':   IMToken,
+    'imi':  IMIToken,
+    'iot':  IOTToken,
+    'io':   IOToken,
+    'io1':  IO1Token,
+    'io2':  IO2Token,
+    'ior':  IORStartToken, 'ior*': IOREndToken,
+    'bk':   BKStartToken, 'bk*':  BKEndToken,
+    'text': TEXTToken,
+    'unknown': UnknownToken
+}
@@ -1,5 +1,7 @@
+import html
 import logging
 import re
+from collections import OrderedDict
 
 from tx_usfm_tools.abstractRenderer import AbstractRenderer
 from tx_usfm_tools.books import bookKeys, bookNames, silNames, readerNames, bookKeyForIdValue
@@ -8,13 +10,98 @@ from tx_usfm_tools.parseUsfm import UsfmToken
 #
 #   Simplest renderer that doesn't use files (just gets USFM string and returns HTML string). Ignores everything except ascii text.
 #
+#   The HTML can instead be streamed out to an output file (or anything else with a write() method) as it is rendered,
+#       or the HTML of each verse collected along with its USFM (see renderVerses()).
+#
+
+CHAPTER_SPLIT_RE = re.compile(r'\\c ')
+VERSE_SPLIT_RE = re.compile(r'\\v ')
+HTML_TAG_RE = re.compile(r'<(/?)([a-zA-Z][^\s/>]*)([^>]*)>')
+HTML_ATTRIBUTE_RE = re.compile(r'''([^\s=/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]*)))?''')
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+TEXTLESS_TAGS = {'br', 'img'}  # Kept in a verse's HTML even though they have no text
+ASCII_SPACES = ' \t\n\f\r'
+
+
+def cleanVerseHtml(verse_html):
+    """
+    Returns the HTML of a verse cut out of the book's HTML as BeautifulSoup would give it,
+        i.e., with the end tags of elements started before the verse dropped, the elements left open closed
+        and the elements without any text (other than line breaks and images) removed,
+        but without the cost of building a soup for each verse.
+    """
+    root = []
+    open_elements = [('', root)]
+    position = 0
+    for match in HTML_TAG_RE.finditer(verse_html):
+        if match.start() > position:
+            _addText(open_elements[-1][1], verse_html[position:match.start()])
+        position = match.end()
+        is_end_tag, name, attributes = match.group(1), match.group(2).lower(), match.group(3)
+        if is_end_tag:
+            for i in range(len(open_elements) - 1, 0, -1):
+                if open_elements[i][0] == name:
+                    del open_elements[i:]
+                    break
+            continue
+        attributes = ''.join(f' {attribute}="{html.escape(html.unescape(value or single or bare), quote=False)}"'
+                             for attribute, value, single, bare in sorted(HTML_ATTRIBUTE_RE.findall(attributes.rstrip('/'))))
+        if name in VOID_TAGS:
+            open_elements[-1][1].append((name, attributes, None))
+        else:
+            contents = []
+            open_elements[-1][1].append((name, attributes, contents))
+            if not match.group(3).endswith('/'):
+                open_elements.append((name, contents))
+    if position < len(verse_html):
+        _addText(open_elements[-1][1], verse_html[position:])
+    return _getElementsHtml(root)[0]
+
+
+def _addText(contents, text):
+    # As BeautifulSoup does, white space between tags is shortened to a newline or space
+    if not text.strip(ASCII_SPACES):
+        text = '\n' if '\n' in text else ' '
+    contents.append(html.unescape(text))
+
+
+def _getElementsHtml(contents):
+    """
+    Returns the HTML of the text and (name, attributes, contents) elements and whether there is any text in them.
+    """
+    pieces = []
+    has_text = False
+    for content in contents:
+        if isinstance(content, str):
+            pieces.append(html.escape(content, quote=False))
+            has_text = has_text or bool(content.strip())
+            continue
+        name, attributes, element_contents = content
+        if element_contents is None:
+            if name in TEXTLESS_TAGS:
+                pieces.append(f'<{name}{attributes}/>')
+            continue
+        element_html, element_has_text = _getElementsHtml(element_contents)
+        if element_has_text:
+            pieces.append(f'<{name}{attributes}>{element_html}</{name}>')
+            has_text = True
+    return ''.join(pieces), has_text
 
 
 class SingleFilelessHtmlRenderer(AbstractRenderer):
-    def __init__(self, books_usfm):
+    # Number of HTML pieces collected before they are written out to an output file
+    OUTPUT_CHUNK_SIZE = 1000
+
+    def __init__(self, books_usfm, output_file=None):
         # logging.debug(f"SingleHTMLRenderer.__init__( {inputDir}, {outputFilename} ) …")
         self.booksUsfm = books_usfm
-        self.html = ''
+        self.output_file = output_file
+        self.html_chunks = []  # Pieces of the HTML, joined up (or written out) at the end
+        self.verses = None  # Chapter -> verse -> USFM and HTML, if collected by renderVerses()
+        self.verse = None  # Verse whose HTML is being collected
+        self.chaptersUsfm = []  # USFM of each chapter (after the \\c), if collecting the verses
+        self.chapterVersesUsfm = []  # USFM of the current chapter split up at each \\v
+        self.chapterVerseIndex = 0
         # Position
         self.cb = ''    # Current Book
         self.cc = '001'    # Current Chapter
@@ -42,13 +129,76 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         self.crossReference_text = ''
 
     def render(self):
+        """
+        Returns the HTML (or None if it was written to the output file) and the list of warnings.
+        """
         # logging.debug("SingleHTMLRenderer.render() …")
         #print(f"About to render USFM ({len(self.booksUsfm)} books): {str(self.booksUsfm)[:300]} …")
         warning_list = self.run()
         self.writeFootnotes()
         self.writeCrossReferences()
-        self.html += '\n    </body>\n</html>\n'
-        return [self.html, warning_list]
+        self.writeHtml('\n    </body>\n</html>\n')
+        if self.output_file is not None:
+            self.flushHtml()
+            return [None, warning_list]
+        html = ''.join(self.html_chunks)
+        self.html_chunks = []
+        return [html, warning_list]
+
+    def renderVerses(self):
+        """
+        Renders a single book and returns a dict of chapter -> verse -> {'usfm': …, 'html': …} and the list of warnings.
+
+        The chapters and verses are numbered without leading zeroes, and a verse bridge (e.g., 1-3) is found under
+            its first and last verse numbers.
+        The HTML of the last verse of a chapter also has the chapter's footnotes.
+        """
+        assert len(self.booksUsfm) == 1
+        self.verses = OrderedDict()
+        self.chaptersUsfm = CHAPTER_SPLIT_RE.split(list(self.booksUsfm.values())[0])[:0:-1]  # Reversed to pop()
+        warning_list = self.run()
+        self.writeFootnotes()
+        self.writeCrossReferences()
+        self.writeHtml('\n    </body>\n</html>\n')
+        self.endVerse()
+        self.html_chunks = []
+        return [self.verses, warning_list]
+
+    def startVerse(self, verse):
+        """
+        If collecting the verses, ends the last verse and starts collecting the HTML of the given one.
+        """
+        if self.verses is None:
+            return
+        self.endVerse()
+        self.html_chunks = []
+        self.verse = verse
+        self.chapterVerseIndex += 1
+
+    def endVerse(self):
+        if self.verses is None or self.verse is None:
+            return
+        chapter = self.cc.lstrip('0')
+        verse_data = {
+            'usfm': f'\\v {self.chapterVersesUsfm[self.chapterVerseIndex]}'
+                    if self.chapterVerseIndex < len(self.chapterVersesUsfm) else '',
+            'html': cleanVerseHtml(''.join(self.html_chunks))
+        }
+        for verse in re.findall(r'\d+', self.verse):
+            self.verses.setdefault(chapter, OrderedDict())[verse.lstrip('0')] = verse_data
+        self.verse = None
+
+    def writeHtml(self, html):
+        """
+        Adds HTML as is (see write() for adding text).
+        """
+        self.html_chunks.append(html)
+        if self.output_file is not None and len(self.html_chunks) >= self.OUTPUT_CHUNK_SIZE:
+            self.flushHtml()
+
+    def flushHtml(self):
+        self.output_file.write(''.join(self.html_chunks))
+        self.html_chunks = []
 
     def writeHeader(self):
         h = """
@@ -102,7 +252,7 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
 <body>
 <h1>""" + self.bookName + """</h1>
 """
-        self.html += h
+        self.writeHtml(h)
 
     def startLI(self, level=1):
         # if 'NUM' in self.bookName and '00' in self.cc: logging.debug(f"@{self.cc}:{self.cv} startLI({level})…")
@@ -111,13 +261,13 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         assert self.listItemLevel == 0
         # self.listItemLevel = 0 # Should be superfluous I think
         while self.listItemLevel < level:
-            self.html += '<ul>'
+            self.writeHtml('<ul>')
             self.listItemLevel += 1
 
     def stopLI(self):
         # if 'NUM' in self.bookName and '00' in self.cc and self.listItemLevel: logging.debug(f"@{self.cc}:{self.cv} stopLI() from level {self.listItemLevel}…")
         while self.listItemLevel > 0:
-            self.html += '</ul>'
+            self.writeHtml('</ul>')
             self.listItemLevel -= 1
         assert self.listItemLevel == 0
 
@@ -125,7 +275,7 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         return s.replace('~', '&nbsp;')
 
     def write(self, unicodeString):
-        self.html += unicodeString.replace('~', '&nbsp;')
+        self.writeHtml(unicodeString.replace('~', '&nbsp;'))
 
     def writeIndent(self, level):
         assert level > 0
@@ -140,10 +290,10 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         # if 'NUM' in self.bookName and '00' in self.cc and self.indentFlag: logging.debug(f"@{self.cc}:{self.cv} closeParagraph() from {self.indentFlag}…")
         if self.inParagraph:
             self.inParagraph = False
-            self.html += '</p>\n'
+            self.writeHtml('</p>\n')
         if self.indentFlag:
             self.indentFlag = False
-            self.html += '</p>\n'
+            self.writeHtml('</p>\n')
 
     def renderID(self, token):
         self.writeFootnotes()
@@ -275,8 +425,14 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         self.writeFootnotes()
         self.writeCrossReferences()
         self.footnote_num = 1
+        self.write('\n\n')
+        self.endVerse()
+        if self.verses is not None:
+            chapter_usfm = self.chaptersUsfm.pop() if self.chaptersUsfm else ''
+            self.chapterVersesUsfm = VERSE_SPLIT_RE.split(f'\\c {chapter_usfm}')
+            self.chapterVerseIndex = 0
         self.cc = token.value.zfill(3)
-        self.write('\n\n<h2 id="{0}-ch-{1}" class="c-num">{2} {3}</h2>'
+        self.write('<h2 id="{0}-ch-{1}" class="c-num">{2} {3}</h2>'
                    .format(self.cb, self.cc, self.chapterLabel, token.value))
 
     def renderCA_S(self, token):
@@ -294,7 +450,9 @@ class SingleFilelessHtmlRenderer(AbstractRenderer):
         for verse in re.findall(r'\d+', token.value):
             verses.append(verse.zfill(3))
         self.cv = '-'.join(verses)
-        self.write(' <span id="{0}-ch-{1}-v-{2}" class="v-num"><sup><b>{3}</b></sup></span>'.
+        self.write(' ')
+        self.startVerse(self.cv)
+        self.write('<span id="{0}-ch-{1}-v-{2}" class="v-num"><sup><b>{3}</b></sup></span>'.
                    format(self.cb, self.cc, self.cv, token.value))
 
     def renderVA_S(self, token):
@@ -1,3 +1,4 @@
+import io
 import logging
 import re
 
@@ -62,6 +63,23 @@ class SingleHTMLRenderer(AbstractRenderer):
         return warning_list
 
 
+    def renderString(self, booksUsfm):
+        """
+        Renders the given {bookID: usfm} books without reading or writing any files.
+
+        Returns the HTML and the warning list.
+        """
+        self.booksUsfm = booksUsfm
+        self.f = io.StringIO()
+        warning_list = self.run()
+        self.writeFootnotes()
+        self.writeCrossReferences()
+        self.f.write('\n    </body>\n</html>\n')
+        html = self.f.getvalue()
+        self.f.close()
+        return html, warning_list
+
+
     def writeHeader(self):
         h = """
 <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
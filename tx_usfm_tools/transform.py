@@ -1,7 +1,7 @@
 import os
 import logging
 
-from tx_usfm_tools import singlehtmlRenderer
+from tx_usfm_tools import singlehtmlRenderer, books
 
 
 
@@ -104,6 +104,17 @@ class UsfmTransform:
         warning_list = c.render()
         return warning_list
 
+    @staticmethod
+    def buildSingleHtmlFromString(usfm):
+        """
+        Same as buildSingleHtml for a single book, but from and to strings rather than files.
+
+        Returns the HTML and the warning list.
+        """
+        UsfmTransform.__logger.debug("transform: building Single Page HTML from string…")
+        c = singlehtmlRenderer.SingleHTMLRenderer(None, None)
+        return c.renderString(books.loadBookString(usfm))
+
     # @staticmethod
     # def buildCSV(usfmDir, builtDir, buildName):
     #     # Convert to CSV
@@ -13,9 +13,7 @@ from tx_usfm_tools import parseUsfm, usfm_verses
 
 
 # Global variables
-lastToken = None
 vv_re = re.compile(r'([0-9]+)-([0-9]+)')
-error_log:Optional[List[str]] = None
 
 chapter_marker_re = re.compile(r'\\c(?!a)') # Don't match on \ca
 verse_marker_re = re.compile(r'\\v(?!a)') # Don't match on \va
@@ -26,134 +24,121 @@ NON_CHAPTER_BOOK_CODES = ('FRT','BAK','OTH','INT','CNC','GLO','TDX','NDX')
 
 
 class State:
-    IDs = []
-    ID = ''
-    IDE = ''
-    usfm = ''
-    toc1 = ''
-    toc2 = ''
-    toc3 = ''
-    mt = ''
-    heading = ''
-    master_chapter_label = ''
-    chapter_label = ''
-    chapter = 0
-    nParagraphs = 0
-    nMargins = 0
-    nQuotes = 0
-    verse = 0
-    lastVerse = 0
-    needVerseText = False
-    textOkayHere = False
-    referenceString = ''
-    lastReferenceString = ''
-    chapters = set()
+    """
+    Position and findings of a USFM verifier in the book being checked.
+
+    Only the verse counts and English book name words (which never change) are shared between instances.
+    """
     verseCounts = {}
-    errorRefs = set()
     englishWords = []
-    lang_code = None
-    book_code = None
+
+    def __init__(self):
+        self.IDs = []
+        self.errorRefs = set()
+        self.lang_code = None
+        self.lastChapter = 0
+        self.reset_book()
 
     def reset_all(self):
         self.reset_book()
-        State.IDs = []
-        State.errorRefs = set()
+        self.IDs = []
+        self.errorRefs = set()
 
     def reset_book(self):
-        State.ID = ''
-        State.IDE = ''
-        State.usfm = ''
-        State.toc1 = ''
-        State.toc2 = ''
-        State.toc3 = ''
-        State.mt = ''
-        State.heading = ''
-        State.master_chapter_label = ''
-        State.chapter_label = ''
-        State.chapter = 0
-        State.lastVerse = 0
-        State.verse = 0
-        State.needVerseText = False
-        State.textOkayHere = False
-        State.chapters = set()
-        State.nParagraphs = 0
-        State.nMargins = 0
-        State.nQuotes = 0
-        State.lastReferenceString = ''
-        State.referenceString = ''
-        State.book_code = None
+        self.ID = ''
+        self.IDE = ''
+        self.usfm = ''
+        self.toc1 = ''
+        self.toc2 = ''
+        self.toc3 = ''
+        self.mt = ''
+        self.heading = ''
+        self.master_chapter_label = ''
+        self.chapter_label = ''
+        self.chapter = 0
+        self.lastVerse = 0
+        self.verse = 0
+        self.needVerseText = False
+        self.textOkayHere = False
+        self.chapters = set()
+        self.nParagraphs = 0
+        self.nMargins = 0
+        self.nQuotes = 0
+        self.lastReferenceString = ''
+        self.referenceString = ''
+        self.book_code = None
 
     def set_book_code(self, book):
-        State.book_code = book
-        State.referenceString = book  # default
+        self.book_code = book
+        self.referenceString = book  # default
 
     def setLanguageCode(self, code):
-        State.lang_code = code
+        self.lang_code = code
 
     def addID(self, id):
         self.reset_book()
-        State.IDs.append(id)
-        State.ID = id
-        State.lastReferenceString = State.referenceString
-        State.referenceString = id
+        self.IDs.append(id)
+        self.ID = id
+        self.lastReferenceString = self.referenceString
+        self.referenceString = id
 
     def getIDs(self):
-        return State.IDs
+        return self.IDs
 
     def addHeading(self, heading):
-        State.heading = heading
+        self.heading = heading
 
     def addIDE(self, ide):
-        State.IDE = ide
+        self.IDE = ide
 
     def addUSFM(self, usfm):
-        State.usfm = usfm
+        self.usfm = usfm
 
     def addTOC1(self, toc):
-        State.toc1 = toc
+        self.toc1 = toc
 
     def addTOC2(self, toc):
-        State.toc2 = toc
+        self.toc2 = toc
 
     def addTOC3(self, toc):
-        State.toc3 = toc
+        self.toc3 = toc
 
     def addMT(self, mt):
-        State.mt = mt
+        self.mt = mt
 
     def addChapterLabel(self, text):
-        if State.chapter == 0:
-            State.master_chapter_label = text
+        if self.chapter == 0:
+            self.master_chapter_label = text
         else:
-            State.chapter_label = text
+            self.chapter_label = text
 
     def addChapter(self, c):
-        State.lastChapter = State.chapter
-        State.chapter = int(c)
-        State.chapters.add(State.chapter)
-        State.lastVerse = 0
-        State.nParagraphs = 0
-        State.nMargins = 0
-        State.nQuotes = 0
-        State.verse = 0
-        State.needVerseText = False
-        State.textOkayHere = False
-        State.lastReferenceString = State.referenceString
-        State.referenceString = self.get_id() + ' ' + str(State.chapter)
+        self.lastChapter = self.chapter
+        self.chapter = int(c)
+        self.chapters.add(self.chapter)
+        self.lastVerse = 0
+        self.nParagraphs = 0
+        self.nMargins = 0
+        self.nQuotes = 0
+        self.verse = 0
+        self.needVerseText = False
+        self.textOkayHere = False
+        self.lastReferenceString = self.referenceString
+        self.referenceString = self.get_id() + ' ' + str(self.chapter)
 
     def get_id(self):
-        id = State.ID
-        if not State.ID:
-            id = State.book_code  # use book code if no ID given
+        id = self.ID
+        if not self.ID:
+            id = self.book_code  # use book code if no ID given
         return id
 
     def addParagraph(self):
-        State.nParagraphs += 1
-        State.textOkayHere = True
+        self.nParagraphs += 1
+        self.textOkayHere = True
 
     def addMargin(self):
-        State.nMargins += 1
-        State.textOkayHere = True
+        self.nMargins += 1
+        self.textOkayHere = True
 
     # supports a span of verses, e.g. 3-4, if needed. Passes the verse(s) on to addVerse()
     def addVerses(self, vv):
@@ -172,33 +157,33 @@ class State:
             self.addVerse(str(vn))
 
     def addVerse(self, v):
-        State.lastVerse = State.verse
-        State.verse = int(v)
-        State.needVerseText = True
-        State.textOkayHere = True
-        State.lastReferenceString = State.referenceString
-        State.referenceString = self.get_id() + ' ' + str(State.chapter) + ':' + v
+        self.lastVerse = self.verse
+        self.verse = int(v)
+        self.needVerseText = True
+        self.textOkayHere = True
+        self.lastReferenceString = self.referenceString
+        self.referenceString = self.get_id() + ' ' + str(self.chapter) + ':' + v
 
     def textOkay(self):
-        return State.textOkayHere
+        return self.textOkayHere
 
     def needText(self):
-        return State.needVerseText
+        return self.needVerseText
 
     def addText(self):
-        State.needVerseText = False
-        State.textOkayHere = True
+        self.needVerseText = False
+        self.textOkayHere = True
 
     def addQuote(self):
-        State.nQuotes += State.nQuotes + 1
-        State.textOkayHere = True
+        self.nQuotes += self.nQuotes + 1
+        self.textOkayHere = True
 
     # Adds the specified reference to the set of error references
     # Returns True if reference can be added
     # Returns False if reference was previously added
     def addError(self, ref):
         success = False
-        if ref not in State.errorRefs:
+        if ref not in self.errorRefs:
             self.errorRefs.add(ref)
             success = True
         return success
@@ -206,14 +191,15 @@ class State:
 
     def getEnglishWords(self):
         if not State.englishWords:
+            words = []
             for book in usfm_verses.verses:
                 book_data = usfm_verses.verses[book]
                 english_name = book_data['en_name'].lower()
                 english_words = english_name.split(' ')
                 for word in english_words:
                     if word and not isNumber(word):
-                        State.englishWords.append(word)
-            State.englishWords.sort()
+                        words.append(word)
+            State.englishWords = sorted(words)
         return State.englishWords
 
 
@@ -244,212 +230,448 @@ class State:
 
 
 
-def report_error(msg):
-    if error_log is None:  # if error logging is enabled then don't print
-        sys.stderr.write(msg)
-    else:
-        error_log.append(msg.rstrip(' \t\n\r'))
+class UsfmVerifier:
+    """
+    Checks the USFM of a book, collecting the errors found.
 
+    All of the state is kept in the instance, so books can be verified at the same time
+        in different threads or processes.
+    """
 
-def verifyVerseCount():
-    state = State()
-    if not state.ID:
-        return -1
+    def __init__(self):
+        self.state = State()
+        self.error_log:Optional[List[str]] = None
+        self.lastToken = None
 
-    if state.chapter > 0 and state.verse != state.nVerses(state.ID, state.chapter):
-        # Revelation 12 may have 17 or 18 verses
-        # 3 John may have 14 or 15 verses
-        if state.referenceString != 'REV 12:18' and state.referenceString != '3JN 1:15':
-            report_error(f"{state.referenceString} - Should have {state.nVerses(state.ID, state.chapter)} verses\n")
 
+    def report_error(self, msg):
+        if self.error_log is None:  # if error logging is enabled then don't print
+            sys.stderr.write(msg)
+        else:
+            self.error_log.append(msg.rstrip(' \t\n\r'))
 
-def verifyNotEmpty(filename, book_code):
-    state = State()
-    if not state.ID \
-    or (state.chapter==0 and book_code not in NON_CHAPTER_BOOK_CODES):
-        report_error(f"{filename} - File may be empty.")
 
+    def verifyVerseCount(self):
+        state = self.state
+        if not state.ID:
+            return -1
 
-def verifyIdentification(book_code):
-    state = State()
-    if not state.ID:
-        report_error(f"{book_code} - Missing \\id tag")
-    elif (book_code is not None) and (book_code != state.ID):
-        report_error(f"{state.ID} - Found in \\id tag does not match code '{book_code}' found in filename")
+        if state.chapter > 0 and state.verse != state.nVerses(state.ID, state.chapter):
+            # Revelation 12 may have 17 or 18 verses
+            # 3 John may have 14 or 15 verses
+            if state.referenceString != 'REV 12:18' and state.referenceString != '3JN 1:15':
+                self.report_error(f"{state.referenceString} - Should have {state.nVerses(state.ID, state.chapter)} verses\n")
 
-    if not state.IDE:
-        report_error(f"{book_code} - Missing \\ide tag")
 
-    if state.heading:
-        if state.heading.isupper():
-            report_error(f"{book_code} - \\h '{state.heading}' shouldn't be UPPERCASE")
-    else:
-        report_error(f"{book_code} - Missing \\h tag")
+    def verifyNotEmpty(self, filename, book_code):
+        state = self.state
+        if not state.ID \
+        or (state.chapter==0 and book_code not in NON_CHAPTER_BOOK_CODES):
+            self.report_error(f"{filename} - File may be empty.")
 
-    if book_code not in NON_CHAPTER_BOOK_CODES:
-        if not state.toc1:
-            report_error(f"{book_code} - Missing \\toc1 tag")
 
-        if not state.toc2:
-            report_error(f"{book_code} - Missing \\toc2 tag")
+    def verifyIdentification(self, book_code):
+        state = self.state
+        if not state.ID:
+            self.report_error(f"{book_code} - Missing \\id tag")
+        elif (book_code is not None) and (book_code != state.ID):
+            self.report_error(f"{state.ID} - Found in \\id tag does not match code '{book_code}' found in filename")
 
-        if not state.toc3:
-            report_error(f"{book_code} - Missing \\toc3 tag")
+        if not state.IDE:
+            self.report_error(f"{book_code} - Missing \\ide tag")
 
-        if not state.mt:
-            report_error(f"{book_code} - Missing \\mt or \\mt1 tag")
-# end of verifyIdentification function
+        if state.heading:
+            if state.heading.isupper():
+                self.report_error(f"{book_code} - \\h '{state.heading}' shouldn't be UPPERCASE")
+        else:
+            self.report_error(f"{book_code} - Missing \\h tag")
+
+        if book_code not in NON_CHAPTER_BOOK_CODES:
+            if not state.toc1:
+                self.report_error(f"{book_code} - Missing \\toc1 tag")
+
+            if not state.toc2:
+                self.report_error(f"{book_code} - Missing \\toc2 tag")
+
+            if not state.toc3:
+                self.report_error(f"{book_code} - Missing \\toc3 tag")
+
+            if not state.mt:
+                self.report_error(f"{book_code} - Missing \\mt or \\mt1 tag")
+    # end of verifyIdentification function
+
+
+    def verifyChapterAndVerseMarkers(self, text, book):
+        pos = 0
+        last_ch = 1
+        for chapter_current in chapter_marker_re.finditer(text):
+            start_index = chapter_current.start()
+            end_index = chapter_current.end()
+            end_char = text[end_index]
+            if (end_char >= 'a') and (end_char <= 'z'):
+                continue  #  skip non-chapter markers
+            has_space = end_char in SPACE
+            if has_space:
+                end_index += 1
+            previous_char = text[start_index - 1]
+            newline_before = (previous_char == '\n') or (previous_char == '\r')
+            ch_num, has_space_after = self.get_chapter_number(text, end_index)
+            if ch_num >= 0:
+                if not has_space:
+                    self.add_error(text, book, "Missing space before chapter number: '{0}'", start_index, last_ch)
+                elif not has_space_after:
+                    self.add_error(text, book, "Missing new line after chapter number: '{0}'", start_index, last_ch)
+                elif not newline_before:
+                    self.add_error(text, book, "Missing new line before chapter marker: '{0}'", start_index-4, last_ch)
+                self.check_chapter(text, book, last_ch, pos, start_index)
+                last_ch = ch_num
+                pos = end_index
+            else:
+                self.add_error(text, book, "Invalid chapter number format: '{0}'", start_index, last_ch)
+
+        self.check_chapter(text, book, last_ch, pos, len(text))  # check last chapter
+
+
+    def add_error(self, text, book, message, pos, chapter, verse=None):
+        length = 8
+        example = text[pos: pos + length]
+        self.report_error(make_reference_string(book, chapter, verse) + " - " + message.format(example))
+
+
+    def check_chapter(self, text, book, chapter_num, start, end):
+        last_vs_range = '1'
+        for verse_current in verse_marker_re.finditer(text, start, end):
+            start = verse_current.start()
+            end = verse_current.end()
+            char = text[end]
+            has_space = char in SPACE
+            if has_space:
+                end += 1
+            char = text[start - 1]
+            space_before = char in WHITE_SPACE
+            vs_range, has_space_after = self.get_verse_range(text, end)
+            if vs_range != '':
+                if not has_space:
+                    self.add_error(text, book, "Missing space before verse number: '{0}'", start, chapter_num, vs_range)
+                elif not has_space_after:
+                    self.add_error(text, book, "Missing space after verse number: '{0}'", start, chapter_num, vs_range)
+                elif not space_before:
+                    self.add_error(text, book, "Missing space before verse marker: '{0}'", start-1, chapter_num, vs_range)
+                last_vs_range = vs_range
+            else:
+                # print("book", book, "chapter", chapter_num, "verse_current", verse_current)
+                # print(f"start='{start}' end='{end}'")
+                # print(f"char='{char}'")
+                # print(f"space_before={space_before} vs_range={vs_range} has_space_after={has_space_after}")
+                self.add_error(text, book, "Invalid verse number: '{0}'", start, chapter_num, last_vs_range)
 
 
-def make_reference_string(book, chapter, verse=None):
-    ref = book + ' ' + str(chapter)
-    if verse is not None:
-          ref += ":" + verse
-    return ref
-# end of make_reference_string function
+    def get_verse_range(self, text, start):
+        pos = start
+        verse, c, end = self.get_number(text, pos)
+        if verse == '':
+            return verse, False
 
+        if c != '-':  # not verse range
+            has_white_space = (c in WHITE_SPACE)
+            return verse, has_white_space
 
-def verifyChapterAndVerseMarkers(text, book):
-    pos = 0
-    last_ch = 1
-    for chapter_current in chapter_marker_re.finditer(text):
-        start_index = chapter_current.start()
-        end_index = chapter_current.end()
-        end_char = text[end_index]
-        if (end_char >= 'a') and (end_char <= 'z'):
-            continue  #  skip non-chapter markers
-        has_space = end_char in SPACE
-        if has_space:
-            end_index += 1
-        previous_char = text[start_index - 1]
-        newline_before = (previous_char == '\n') or (previous_char == '\r')
-        ch_num, has_space_after = get_chapter_number(text, end_index)
-        if ch_num >= 0:
-            if not has_space:
-                add_error(text, book, "Missing space before chapter number: '{0}'", start_index, last_ch)
-            elif not has_space_after:
-                add_error(text, book, "Missing new line after chapter number: '{0}'", start_index, last_ch)
-            elif not newline_before:
-                add_error(text, book, "Missing new line before chapter marker: '{0}'", start_index-4, last_ch)
-            check_chapter(text, book, last_ch, pos, start_index)
-            last_ch = ch_num
-            pos = end_index
-        else:
-            add_error(text, book, "Invalid chapter number format: '{0}'", start_index, last_ch)
-
-    check_chapter(text, book, last_ch, pos, len(text))  # check last chapter
-
-
-def add_error(text, book, message, pos, chapter, verse=None):
-    length = 8
-    example = text[pos: pos + length]
-    report_error(make_reference_string(book, chapter, verse) + " - " + message.format(example))
-
-
-def check_chapter(text, book, chapter_num, start, end):
-    last_vs_range = '1'
-    for verse_current in verse_marker_re.finditer(text, start, end):
-        start = verse_current.start()
-        end = verse_current.end()
-        char = text[end]
-        has_space = char in SPACE
-        if has_space:
-            end += 1
-        char = text[start - 1]
-        space_before = char in WHITE_SPACE
-        vs_range, has_space_after = get_verse_range(text, end)
-        if vs_range != '':
-            if not has_space:
-                add_error(text, book, "Missing space before verse number: '{0}'", start, chapter_num, vs_range)
-            elif not has_space_after:
-                add_error(text, book, "Missing space after verse number: '{0}'", start, chapter_num, vs_range)
-            elif not space_before:
-                add_error(text, book, "Missing space before verse marker: '{0}'", start-1, chapter_num, vs_range)
-            last_vs_range = vs_range
-        else:
-            # print("book", book, "chapter", chapter_num, "verse_current", verse_current)
-            # print(f"start='{start}' end='{end}'")
-            # print(f"char='{char}'")
-            # print(f"space_before={space_before} vs_range={vs_range} has_space_after={has_space_after}")
-            add_error(text, book, "Invalid verse number: '{0}'", start, chapter_num, last_vs_range)
+        second_vs, c, end = self.get_number(text, end+1)
+        if second_vs == '':
+            return '', False
 
+        verse += '-' + second_vs
+        has_white_space = (c in WHITE_SPACE)
+        return verse, has_white_space
 
-def get_verse_range(text, start):
-    pos = start
-    verse, c, end = get_number(text, pos)
-    if verse == '':
-        return verse, False
 
-    if c != '-':  # not verse range
+    def get_chapter_number(self, text, start):
+        pos = start
+        digits, c, _end = self.get_number(text, pos)
         has_white_space = (c in WHITE_SPACE)
-        return verse, has_white_space
+        if digits:
+            return int(digits), has_white_space
+        return -1, has_white_space
+
+
+    def get_number(self, text, start_index):
+        """
+        Called by get_verse_range() and get_chapter_number()
+        """
+        digits = ''
+        end_index = start_index
+        c = ''
+        for pos in range(start_index, len(text)):
+            c = text[pos]
+            if c=='0' and not digits:
+                state = self.state
+                self.report_error(f"{state.referenceString} has leading zero in following chapter/verse number")
+            if (c >= '0') and (c <= '9'):
+                digits += c
+                continue
+            end_index = pos
+            break
+        return digits, c, end_index
+
+    def verifyChapterCount(self):
+        state = self.state
+        if state.ID:
+            expected_chapters = state.nChapters(state.ID)
+            if len(state.chapters) != expected_chapters:
+                for i in range(1, expected_chapters + 1):
+                    if i not in state.chapters:
+                        self.report_error(f"{state.ID} {i} - Missing chapter\n")
+
+
+    def verifyTextTranslated(self, text:str, token) -> None:
+        found, word = self.needsTranslation(text)
+        if found:
+            self.report_error(f"Token '\\{token}' has possible untranslated word '{word}'")
+
+
+    def needsTranslation(self, text) -> Tuple[bool,Optional[str]]:
+        state = self.state
+        if state.lang_code \
+        and state.lang_code not in ('en', 'el-x-koine', 'hbo'):  # no need to translate English
+            # NOTE: We don't put booknames in original Heb/Grk documents either
+            english = state.getEnglishWords()
+            words = text.split(' ')
+            for word in words:
+                if word:
+                    found = binarySearch(english, word.lower())
+                    if found:
+                        return True, word
+        return False, None
+
+
+    def takeCL(self, text:str):
+        state = self.state
+        state.addChapterLabel(text)
+        self.verifyTextTranslated(text, 'cl')
+
+    def takeTOC1(self, text):
+        state = self.state
+        state.addTOC1(text)
+        self.verifyTextTranslated(text, 'toc1')
+
+    def takeTOC2(self, text):
+        state = self.state
+        state.addTOC2(text)
+        self.verifyTextTranslated(text, 'toc2')
+
+    def takeTOC3(self, text):
+        state = self.state
+        state.addTOC3(text)
+        # self.verifyTextTranslated(text, 'toc3') # toc3 commonly has 3-letter book code, not to be translated
+
+    def takeMT(self, text):
+        state = self.state
+        state.addMT(text)
+        self.verifyTextTranslated(text, 'mt')
+
+    def takeH(self, heading):
+        state = self.state
+        state.addHeading(heading)
+        self.verifyTextTranslated(heading, 'h')
+
+    def takeIDE(self, ide):
+        state = self.state
+        state.addIDE(ide)
+
+    def takeUSFM(self, usfm):
+        state = self.state
+        state.addUSFM(usfm)
+
+
+    def takeID(self, id):
+        state = self.state
+        code = '' if not id else id.split(' ')[0] # Take the first token in the \id field
+        if len(code) < 3:
+            self.report_error(f"{state.referenceString} - Invalid ID: '{id}'\n")
+            return
+        if code in state.getIDs():
+            self.report_error(f"{state.referenceString} - Duplicate ID: '{id}'\n")
+            return
+        if code in NON_CHAPTER_BOOK_CODES: # Books without chapters/verses
+            state.addID(code)
+            return
+        state.loadVerseCounts()
+        for k in State.verseCounts:  # look for match in bible names
+            if k == code:
+                state.addID(code)
+                return
+        self.report_error(f"{state.referenceString} - Invalid Code '{code}' in ID: '{id}'\n")
+
+
+    def takeC(self, c):
+        state = self.state
+        state.addChapter(c)
+        if not state.IDs:
+            self.report_error(f"{state.referenceString} - Missing ID before chapter\n")
+        if state.chapter < state.lastChapter:
+            self.report_error(f"{state.referenceString} - Chapter out of order\n")
+        elif state.chapter == state.lastChapter:
+            self.report_error(f"{state.referenceString} - Duplicate chapter\n")
+        elif state.chapter > state.lastChapter + 2:
+            self.report_error(f"{state.lastReferenceString} - Missing chapters between this and: {state.referenceString}\n")
+        elif state.chapter > state.lastChapter + 1:
+            self.report_error(f"{state.lastReferenceString} - Missing chapter between this and: {state.referenceString}\n")
+
+
+    def takeP(self):
+        state = self.state
+        state.addParagraph()
+
+    def takeM(self):
+        state = self.state
+        state.addMargin()
 
-    second_vs, c, end = get_number(text, end+1)
-    if second_vs == '':
-        return '', False
 
-    verse += '-' + second_vs
-    has_white_space = (c in WHITE_SPACE)
-    return verse, has_white_space
+    def takeV(self, v):
+        state = self.state
+        state.addVerses(v)
+        if state.lastVerse == 0:  # if first verse in chapter
+            if not state.IDs and state.chapter == 0:
+                self.report_error(f"{state.referenceString} {v} - Missing ID before verse\n")
+            if state.chapter == 0:
+                self.report_error(f"{state.referenceString} - Missing chapter tag\n")
+            if (state.nParagraphs == 0) and (state.nQuotes == 0) and (state.nMargins == 0):
+                self.report_error(f"{state.referenceString} - Missing paragraph marker (\\p), margin (\\m) or quote (\\q) before verse text\n")
+
+        missing = ""
+        if state.verse < state.lastVerse and state.addError(state.lastReferenceString):
+            self.report_error(f"{state.referenceString} - Verse out of order: after {state.lastReferenceString}\n")
+            state.addError(state.referenceString)
+        elif state.verse == state.lastVerse:
+            self.report_error(f"{state.referenceString} - Duplicated verse number\n")
+        elif state.verse == state.lastVerse + 2 and not isOptional(state.referenceString):
+            missing = " - Missing verse between this and: "
+        elif state.verse > state.lastVerse + 2:
+            missing = " - Missing verses between this and: "
+
+        if missing:
+            state.addError(state.lastReferenceString)
+            if not self.error_log is None:  # see if already warned for missing verses
+                gaps = False
+                for i in range(state.lastVerse+1, state.verse):
+                    ref = f"{state.ID} {state.chapter}:{i}"
+                    ref_len = len(ref)
+                    verse_warning_found = False
+                    for error in self.error_log:
+                        if error[:ref_len] == ref:
+                            verse_warning_found = True
+                            break
+                    if not verse_warning_found:
+                        gaps = True
+                if not gaps:
+                    return
+
+            self.report_error(state.lastReferenceString + missing + state.referenceString + '\n')
+
+
+    def takeText(self, t):
+        state = self.state
+        if not state.textOkay() and not (self.lastToken and isTextCarryingToken(self.lastToken)):
+            if t[0] == '\\':
+                self.report_error(f"{state.referenceString} - Nearby uncommon or invalid marker\n")
+            else:
+                print(f"Missing verse marker before text: <{t}> around {state.referenceString}")
+                self.report_error(f"Missing verse marker or extra text around {state.referenceString}: <{t[:10]}>.\n")
+                self.report_error(f"{state.referenceString} - Missing verse marker or extra text nearby\n")
+            if self.lastToken:
+                self.report_error(f"{state.referenceString} - Preceding Token.type was '{self.lastToken.getType()}'\n")
+            else:
+                self.report_error(f"{state.referenceString} - No preceding Token\n")
+        state.addText()
 
 
-def get_chapter_number(text, start):
-    pos = start
-    digits, c, _end = get_number(text, pos)
-    has_white_space = (c in WHITE_SPACE)
-    if digits:
-        return int(digits), has_white_space
-    return -1, has_white_space
+    def takeUnknown(self, state, token):
+        value = token.getValue()
+        if (value == 'v') or (value == 'c'):
+            return  # skip malformed chapter and verses - will be caught later
+        elif value == 'p':
+            self.report_error(f"{state.referenceString} - Orphan paragraph marker follows")
+        else:
+            self.report_error(f"{state.referenceString} - Unknown USFM token: '\\{value}'")
+
+
+    def take(self, token):
+        state = self.state
+        if isFootnote(token):
+            state.addText()     # footnote suffices for verse text
+        if state.needText() and not token.isTEXT() and not isTextCarryingToken(token):
+            # print(f"EMPTY VERSE {state.referenceString}: {token}")
+            self.report_error(f"{state.referenceString} - Empty verse\n")
+        if token.isID():
+            self.takeID(token.value)
+        elif token.isIDE():
+            self.takeIDE(token.value)
+        elif token.isUSFM():
+            self.takeUSFM(token.value)
+        elif token.isH():
+            self.takeH(token.value)
+        elif token.isTOC1():
+            self.takeTOC1(token.value)
+        elif token.isTOC2():
+            self.takeTOC2(token.value)
+        elif token.isTOC3():
+            self.takeTOC3(token.value)
+        elif token.isMT() or token.isMT1():
+            self.takeMT(token.value)
+        elif token.isCL():
+            self.takeCL(token.value)
+        elif token.isC():
+            self.verifyVerseCount()  # for the preceding chapter
+            self.takeC(token.value)
+        elif token.isP() \
+        or token.isPI() or token.isPI1() or token.isPI2() \
+        or token.isPC() or token.isNB() or token.is_ip():
+            self.takeP()
+        elif token.isV():
+            self.takeV(token.value)
+        elif token.isTEXT():
+            self.takeText(token.value)
+        elif token.isQ() or token.isQ1() or token.isQ2() or token.isQ3():
+            state.addQuote()
+        elif token.isM() or token.isMI() or token.is_im():
+            state.addMargin()
+        elif token.isUnknown():
+            self.takeUnknown(state, token)
+        self.lastToken = token
+    # end of take(token) function
+
+
+    def verify_contents_quiet(self, unicodestring:str, filename:str, book_code:str,
+                                                        lang_code:str) -> Tuple[List[str],str]:
+        """
+        Returns the errors found in the book, and its ID.
+        """
+        self.error_log = []  # enable error logging
+        self.lastToken = None
+        state = self.state
+        state.reset_all()  # clear out previous values
+        state.set_book_code(book_code)
+        state.setLanguageCode(lang_code)
+        self.verifyChapterAndVerseMarkers(unicodestring, book_code)
+        for token in parseUsfm.parseString(unicodestring):
+            self.take(token)
+        self.verifyNotEmpty(filename, book_code)
+        self.verifyIdentification(book_code)
+        self.verifyVerseCount()  # for last chapter
+        self.verifyChapterCount()
+        errors = self.error_log
+        self.error_log = None  # turn error logging back off
+        return errors, state.ID
+    # end of verify_contents_quiet function
+# end of UsfmVerifier class
 
 
-def get_number(text, start_index):
-    """
-    Called by get_verse_range() and get_chapter_number()
-    """
-    digits = ''
-    end_index = start_index
-    c = ''
-    for pos in range(start_index, len(text)):
-        c = text[pos]
-        if c=='0' and not digits:
-            state = State()
-            report_error(f"{state.referenceString} has leading zero in following chapter/verse number")
-        if (c >= '0') and (c <= '9'):
-            digits += c
-            continue
-        end_index = pos
-        break
-    return digits, c, end_index
-
-def verifyChapterCount():
-    state = State()
-    if state.ID:
-        expected_chapters = state.nChapters(state.ID)
-        if len(state.chapters) != expected_chapters:
-            for i in range(1, expected_chapters + 1):
-                if i not in state.chapters:
-                    report_error(f"{state.ID} {i} - Missing chapter\n")
-
-
-def verifyTextTranslated(text:str, token) -> None:
-    found, word = needsTranslation(text)
-    if found:
-        report_error(f"Token '\\{token}' has possible untranslated word '{word}'")
-
-
-def needsTranslation(text) -> Tuple[bool,Optional[str]]:
-    state = State()
-    if state.lang_code \
-    and state.lang_code not in ('en', 'el-x-koine', 'hbo'):  # no need to translate English
-        # NOTE: We don't put booknames in original Heb/Grk documents either
-        english = state.getEnglishWords()
-        words = text.split(' ')
-        for word in words:
-            if word:
-                found = binarySearch(english, word.lower())
-                if found:
-                    return True, word
-    return False, None
+def make_reference_string(book, chapter, verse=None):
+    ref = book + ' ' + str(chapter)
+    if verse is not None:
+          ref += ":" + verse
+    return ref
+# end of make_reference_string function
 
 
 def binarySearch(alist, item) -> bool:
@@ -479,158 +701,6 @@ def isNumber(s) -> bool:
     return False
 
 
-def takeCL(text:str):
-    state = State()
-    state.addChapterLabel(text)
-    verifyTextTranslated(text, 'cl')
-
-def takeTOC1(text):
-    state = State()
-    state.addTOC1(text)
-    verifyTextTranslated(text, 'toc1')
-
-def takeTOC2(text):
-    state = State()
-    state.addTOC2(text)
-    verifyTextTranslated(text, 'toc2')
-
-def takeTOC3(text):
-    state = State()
-    state.addTOC3(text)
-    # verifyTextTranslated(text, 'toc3') # toc3 commonly has 3-letter book code, not to be translated
-
-def takeMT(text):
-    state = State()
-    state.addMT(text)
-    verifyTextTranslated(text, 'mt')
-
-def takeH(heading):
-    state = State()
-    state.addHeading(heading)
-    verifyTextTranslated(heading, 'h')
-
-def takeIDE(ide):
-    state = State()
-    state.addIDE(ide)
-
-def takeUSFM(usfm):
-    state = State()
-    state.addUSFM(usfm)
-
-
-def takeID(id):
-    state = State()
-    code = '' if not id else id.split(' ')[0] # Take the first token in the \id field
-    if len(code) < 3:
-        report_error(f"{state.referenceString} - Invalid ID: '{id}'\n")
-        return
-    if code in state.getIDs():
-        report_error(f"{state.referenceString} - Duplicate ID: '{id}'\n")
-        return
-    if code in NON_CHAPTER_BOOK_CODES: # Books without chapters/verses
-        state.addID(code)
-        return
-    state.loadVerseCounts()
-    for k in State.verseCounts:  # look for match in bible names
-        if k == code:
-            state.addID(code)
-            return
-    report_error(f"{state.referenceString} - Invalid Code '{code}' in ID: '{id}'\n")
-
-
-def takeC(c):
-    state = State()
-    state.addChapter(c)
-    if not state.IDs:
-        report_error(f"{state.referenceString} - Missing ID before chapter\n")
-    if state.chapter < state.lastChapter:
-        report_error(f"{state.referenceString} - Chapter out of order\n")
-    elif state.chapter == state.lastChapter:
-        report_error(f"{state.referenceString} - Duplicate chapter\n")
-    elif state.chapter > state.lastChapter + 2:
-        report_error(f"{state.lastReferenceString} - Missing chapters between this and: {state.referenceString}\n")
-    elif state.chapter > state.lastChapter + 1:
-        report_error(f"{state.lastReferenceString} - Missing chapter between this and: {state.referenceString}\n")
-
-
-def takeP():
-    state = State()
-    state.addParagraph()
-
-def takeM():
-    state = State()
-    state.addMargin()
-
-
-def takeV(v):
-    state = State()
-    state.addVerses(v)
-    if state.lastVerse == 0:  # if first verse in chapter
-        if not state.IDs and state.chapter == 0:
-            report_error(f"{state.referenceString} {v} - Missing ID before verse\n")
-        if state.chapter == 0:
-            report_error(f"{state.referenceString} - Missing chapter tag\n")
-        if (state.nParagraphs == 0) and (state.nQuotes == 0) and (state.nMargins == 0):
-            report_error(f"{state.referenceString} - Missing paragraph marker (\\p), margin (\\m) or quote (\\q) before verse text\n")
-
-    missing = ""
-    if state.verse < state.lastVerse and state.addError(state.lastReferenceString):
-        report_error(f"{state.referenceString} - Verse out of order: after {state.lastReferenceString}\n")
-        state.addError(state.referenceString)
-    elif state.verse == state.lastVerse:
-        report_error(f"{state.referenceString} - Duplicated verse number\n")
-    elif state.verse == state.lastVerse + 2 and not isOptional(state.referenceString):
-        missing = " - Missing verse between this and: "
-    elif state.verse > state.lastVerse + 2:
-        missing = " - Missing verses between this and: "
-
-    if missing:
-        state.addError(state.lastReferenceString)
-        if not error_log is None:  # see if already warned for missing verses
-            gaps = False
-            for i in range(state.lastVerse+1, state.verse):
-                ref = f"{state.ID} {state.chapter}:{i}"
-                ref_len = len(ref)
-                verse_warning_found = False
-                for error in error_log:
-                    if error[:ref_len] == ref:
-                        verse_warning_found = True
-                        break
-                if not verse_warning_found:
-                    gaps = True
-            if not gaps:
-                return
-
-        report_error(state.lastReferenceString + missing + state.referenceString + '\n')
-
-
-def takeText(t):
-    state = State()
-    global lastToken
-    if not state.textOkay() and not isTextCarryingToken(lastToken):
-        if t[0] == '\\':
-            report_error(f"{state.referenceString} - Nearby uncommon or invalid marker\n")
-        else:
-            print(f"Missing verse marker before text: <{t}> around {state.referenceString}")
-            report_error(f"Missing verse marker or extra text around {state.referenceString}: <{t[:10]}>.\n")
-            report_error(f"{state.referenceString} - Missing verse marker or extra text nearby\n")
-        if lastToken:
-            report_error(f"{state.referenceString} - Preceding Token.type was '{lastToken.getType()}'\n")
-        else:
-            report_error(f"{state.referenceString} - No preceding Token\n")
-    state.addText()
-
-
-def takeUnknown(state, token):
-    value = token.getValue()
-    if (value == 'v') or (value == 'c'):
-        return  # skip malformed chapter and verses - will be caught later
-    elif value == 'p':
-        report_error(f"{state.referenceString} - Orphan paragraph marker follows")
-    else:
-        report_error(f"{state.referenceString} - Unknown USFM token: '\\{value}'")
-
-
 # Returns True if token is part of a footnote
 def isFootnote(token):
     return token.isF_S() or token.isF_E() \
@@ -680,72 +750,12 @@ def isTextCarryingToken(token):
         or isCharacterFormatting(token) # RJH added this (for \wj fields, etc.)
 
 
-def take(token):
-    state = State()
-    if isFootnote(token):
-        state.addText()     # footnote suffices for verse text
-    if state.needText() and not token.isTEXT() and not isTextCarryingToken(token):
-        # print(f"EMPTY VERSE {state.referenceString}: {token}")
-        report_error(f"{state.referenceString} - Empty verse\n")
-    if token.isID():
-        takeID(token.value)
-    elif token.isIDE():
-        takeIDE(token.value)
-    elif token.isUSFM():
-        takeUSFM(token.value)
-    elif token.isH():
-        takeH(token.value)
-    elif token.isTOC1():
-        takeTOC1(token.value)
-    elif token.isTOC2():
-        takeTOC2(token.value)
-    elif token.isTOC3():
-        takeTOC3(token.value)
-    elif token.isMT() or token.isMT1():
-        takeMT(token.value)
-    elif token.isCL():
-        takeCL(token.value)
-    elif token.isC():
-        verifyVerseCount()  # for the preceding chapter
-        takeC(token.value)
-    elif token.isP() \
-    or token.isPI() or token.isPI1() or token.isPI2() \
-    or token.isPC() or token.isNB() or token.is_ip():
-        takeP()
-    elif token.isV():
-        takeV(token.value)
-    elif token.isTEXT():
-        takeText(token.value)
-    elif token.isQ() or token.isQ1() or token.isQ2() or token.isQ3():
-        state.addQuote()
-    elif token.isM() or token.isMI() or token.is_im():
-        state.addMargin()
-    elif token.isUnknown():
-        takeUnknown(state, token)
-    global lastToken
-    lastToken = token
-# end of take(token) function
-
-
 def verify_contents_quiet(unicodestring:str, filename:str, book_code:str,
                                                         lang_code:str) -> Tuple[List[str],str]:
     """
     This is called by the USFM linter.
+
+    Each call uses its own verifier, so books can be checked at the same time.
     """
-    global error_log
-    error_log = []  # enable error logging
-    state = State()
-    state.reset_all()  # clear out previous values
-    state.set_book_code(book_code)
-    state.setLanguageCode(lang_code)
-    verifyChapterAndVerseMarkers(unicodestring, book_code)
-    for token in parseUsfm.parseString(unicodestring):
-        take(token)
-    verifyNotEmpty(filename, book_code)
-    verifyIdentification(book_code)
-    verifyVerseCount()  # for last chapter
-    verifyChapterCount()
-    errors = error_log
-    error_log = None  # turn error logging back off
-    return errors, state.ID
+    return UsfmVerifier().verify_contents_quiet(unicodestring, filename, book_code, lang_code)
 # end of verify_contents_quiet function
@@ -22,6 +22,7 @@ from time import time
 import sys
 sys.setrecursionlimit(1500) # Default is 1,000—beautifulSoup hits this limit with UST
 import traceback
+import multiprocessing
 import requests
 import boto3
 import watchtower
@@ -29,9 +30,11 @@ import logging
 
 from rq import get_current_job, Queue
 from statsd import StatsClient # Graphite front-end
-from rq_settings import prefix, debug_mode_flag, webhook_queue_name, WORKER_NAME
-from general_tools.file_utils import unzip, remove_tree, empty_folder
+from rq_settings import prefix, debug_mode_flag, webhook_queue_name, WORKER_NAME, usfm_workers, \
+                        concurrent_stages_flag, lint_timeout, convert_timeout
+from general_tools.file_utils import unzip, remove_tree, empty_folder, use_file_contents_cache
 from general_tools.url_utils import download_file
+from tx_usfm_tools.parseUsfm import useParseCache
 from app_settings.app_settings import AppSettings
 from linters.obs_linter import ObsLinter
 from linters.obs_notes_linter import ObsNotesLinter
@@ -163,7 +166,8 @@ def do_linting(param_dict:Dict[str,Any], source_dir:str, linter_name:str, linter
     AppSettings.logger.debug(f"do_linting( {param_dict}, {source_dir}, {linter_name}, {linter_class} )")
     param_dict['status'] = 'linting'
 
-    linter = linter_class(repo_subject=param_dict['resource_type'], source_dir=source_dir)
+    linter = linter_class(repo_subject=param_dict['resource_type'], source_dir=source_dir,
+                          cache_name=f"{param_dict['repo_owner']}/{param_dict['repo_name']}")
     lint_result = linter.run()
     linter.close()  # do cleanup after run
     param_dict['linter_success'] = lint_result['success']
@@ -227,6 +231,77 @@ def do_converting(param_dict:Dict[str,Any], source_dir:str, converter_name:str,
 # end of do_converting function
 
 
+def run_stage(stage_function, param_dict:Dict[str,Any], source_dir:str, module_name:str, module_class, connection) -> None:
+    """
+    Runs do_linting() or do_converting() in a forked process of do_linting_and_converting(),
+        and sends back the build log fields that it set.
+    """
+    stage_dict = param_dict.copy()
+    try:
+        stage_function(stage_dict, source_dir, module_name, module_class)
+    except Exception as e:
+        AppSettings.logger.critical(f"{stage_function.__name__} threw an exception: {e}: {traceback.format_exc()}")
+        stage_dict['stage_error'] = f"{module_name} failed: {e}"
+    connection.send({key: value for key, value in stage_dict.items()
+                        if key != 'status' and (key not in param_dict or param_dict[key] != value)})
+    connection.close()
+# end of run_stage function
+
+
+def do_linting_and_converting(param_dict:Dict[str,Any], source_dir:str, linter_name:str, linter_class,
+                                converter_name:str, converter_class:Type[Converter]) -> None:
+    """
+    Runs do_linting() and do_converting() at the same time, each in its own process
+        (they both only read the source files), and merges what they put in the build log into param_dict.
+
+    A stage that hasn't finished within its timeout (LINT_TIMEOUT or CONVERT_TIMEOUT seconds) is stopped.
+    The converting is waited for first, so linting never takes the job past the end of converting
+        and the lint timeout.
+
+    Updates param_dict as a side-effect.
+    """
+    AppSettings.logger.debug(f"do_linting_and_converting( {len(param_dict)} fields, {source_dir}, {linter_name}, {converter_name} )")
+    context = multiprocessing.get_context('fork')
+    start_time = time()
+    stages = []
+    for stage_function, module_name, module_class, timeout in ((do_converting, converter_name, converter_class, convert_timeout),
+                                                              (do_linting, linter_name, linter_class, lint_timeout)):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=run_stage, name=f'{module_name}_{stage_function.__name__}',
+                                  args=(stage_function, param_dict, source_dir, module_name, module_class, sender))
+        process.start()
+        sender.close() # so that the receiver gets an EOFError if the process dies without sending anything
+        stages.append((stage_function, module_name, process, receiver, timeout))
+
+    for stage_function, module_name, process, receiver, timeout in stages:
+        stage_dict = None
+        if receiver.poll(max(0, start_time + timeout - time())):
+            try:
+                stage_dict = receiver.recv()
+            except EOFError:
+                error_message = f"{module_name} stopped unexpectedly"
+        else:
+            error_message = f"{module_name} was stopped after {timeout:,} seconds"
+            process.terminate()
+        process.join()
+        receiver.close()
+        if stage_dict is not None:
+            error_message = stage_dict.pop('stage_error', None)
+            param_dict.update(stage_dict)
+        if error_message:
+            AppSettings.logger.error(error_message)
+            if stage_function is do_linting:
+                param_dict['linter_success'] = False
+                param_dict['linter_warnings'] = param_dict.get('linter_warnings', []) + [error_message]
+            else:
+                param_dict['converter_success'] = False
+                param_dict['converter_errors'] = param_dict.get('converter_errors', []) + [error_message]
+                for fieldname in ('converter_info', 'converter_warnings'):
+                    param_dict.setdefault(fieldname, [])
+    param_dict['status'] = 'converted'
+# end of do_linting_and_converting function
+
+
 def download_source_file(source_url, destination_folder):
     """
     Downloads the specified source file
@@ -379,37 +454,50 @@ def process_tx_job(pj_prefix: str, queued_json_payload) -> str:
     door43_pages_converter_name, door43_pages_converter = get_converter_module(queued_json_payload, queued_json_payload['output_format'])
     AppSettings.logger.info(f"Got door43_pages_converter = {door43_pages_converter_name}")
 
-    # Run the linter first
-    # if linter:
-    #     if queued_json_payload['output_format'] != "pdf":
-    #         build_log_dict['status'] = 'linting'
-    #         build_log_dict['message'] = 'tX job linting…'
-    #         build_log_dict['lint_module'] = linter_name
-    #         # Log dict gets updated by the following line
-    #         do_linting(build_log_dict, source_folder_path, linter_name, linter)
-    # else:
-    #     warning_message = f"No linter was found to lint {queued_json_payload['input_format']}" \
-    #                       f" {queued_json_payload['resource_type']}"
-    #     AppSettings.logger.warning(warning_message)
-    #     build_log_dict['lint_module'] = 'NO LINTER'
-    #     build_log_dict['linter_success'] = 'false'
-    #     build_log_dict['linter_warnings'] = [warning_message]
-
-    # Now run the door43_pages_converter
-    if door43_pages_converter:
-        build_log_dict['status'] = 'converting'
-        build_log_dict['message'] = 'tX job converting…'
-        build_log_dict['convert_module'] = door43_pages_converter_name
-        do_converting(build_log_dict, source_folder_path, door43_pages_converter_name, door43_pages_converter)
-    else:
-        error_message = f"No converter was found to convert {queued_json_payload['resource_type']}" \
-                        f" from {queued_json_payload['input_format']} to {queued_json_payload['output_format']}"
-        AppSettings.logger.error(error_message)
-        build_log_dict['convert_module'] = 'NO CONVERTER'
-        build_log_dict['converter_success'] = 'false'
-        build_log_dict['converter_info'] = []
-        build_log_dict['converter_warnings'] = []
-        build_log_dict['converter_errors'] = [error_message]
+    # Linting and converting share one parse of each USFM book
+    #   (pickled to a folder if the books are done by several processes)
+    #   and each process only reads each source file once
+    parse_cache_dir = f'{base_temp_dir_name}_parse_cache' if usfm_workers > 1 or concurrent_stages_flag else None
+    with useParseCache(parse_cache_dir), use_file_contents_cache():
+        # Run the linter first
+        # if linter:
+        #     if queued_json_payload['output_format'] != "pdf":
+        #         build_log_dict['status'] = 'linting'
+        #         build_log_dict['message'] = 'tX job linting…'
+        #         build_log_dict['lint_module'] = linter_name
+        #         # Log dict gets updated by the following line
+        #         do_linting(build_log_dict, source_folder_path, linter_name, linter)
+        # else:
+        #     warning_message = f"No linter was found to lint {queued_json_payload['input_format']}" \
+        #                       f" {queued_json_payload['resource_type']}"
+        #     AppSettings.logger.warning(warning_message)
+        #     build_log_dict['lint_module'] = 'NO LINTER'
+        #     build_log_dict['linter_success'] = 'false'
+        #     build_log_dict['linter_warnings'] = [warning_message]
+
+        # Now run the door43_pages_converter
+        if door43_pages_converter:
+            build_log_dict['status'] = 'converting'
+            build_log_dict['message'] = 'tX job converting…'
+            build_log_dict['convert_module'] = door43_pages_converter_name
+            if concurrent_stages_flag and linter and queued_json_payload['output_format'] != "pdf":
+                # Lint while converting, rather than first
+                build_log_dict['message'] = 'tX job linting and converting…'
+                build_log_dict['lint_module'] = linter_name
+                # Log dict gets updated by the following line
+                do_linting_and_converting(build_log_dict, source_folder_path, linter_name, linter,
+                                            door43_pages_converter_name, door43_pages_converter)
+            else:
+                do_converting(build_log_dict, source_folder_path, door43_pages_converter_name, door43_pages_converter)
+        else:
+            error_message = f"No converter was found to convert {queued_json_payload['resource_type']}" \
+                            f" from {queued_json_payload['input_format']} to {queued_json_payload['output_format']}"
+            AppSettings.logger.error(error_message)
+            build_log_dict['convert_module'] = 'NO CONVERTER'
+            build_log_dict['converter_success'] = 'false'
+            build_log_dict['converter_info'] = []
+            build_log_dict['converter_warnings'] = []
+            build_log_dict['converter_errors'] = [error_message]
 
     build_log_dict['status'] = 'finished'
     build_log_dict['message'] = 'tX job completed.'
@@ -454,6 +542,8 @@ def process_tx_job(pj_prefix: str, queued_json_payload) -> str:
         AppSettings.logger.debug(f"Temp folder '{base_temp_dir_name}' has been left on disk for debugging!")
     else:
         remove_tree(base_temp_dir_name)  # cleanup
+        if parse_cache_dir:
+            remove_tree(parse_cache_dir)
     str_build_log = str(build_log_dict)
     str_build_log_adjusted = str_build_log if len(str_build_log)<1500 \
                             else f'{str_build_log[:1000]} …… {str_build_log[-500:]}'